@@ -0,0 +1,477 @@
+"""passport.jlc.com / oshwhub.com / m.jlc.com 的本地模拟服务，供离线性能测试使用。
+
+只模拟 jlc.py 实际用到的页面和接口：
+  passport  /login 登录表单和滑块、/sso 单点登录跳转
+  oshwhub   /sign_in 签到页（含礼包按钮，页面脚本调用 /api/users/signIn）、/api/users
+  m.jlc     首页写入 localStorage token 并发出带 secretkey 请求头的接口请求，
+            getCustomerIntegral / getCurrentUserSignInConfig / signIn / receiveVoucher 等金豆接口
+
+三个站点分别监听不同的回环地址（默认 127.0.0.1 / 127.0.0.2 / 127.0.0.3），
+这样浏览器里的 Cookie 与真实站点一样互相隔离。接口延迟、抖动和故障率可配置。
+
+单独运行时启动服务并打印需要设置的环境变量：
+    python bench/mock_sites.py --accounts 5
+"""
+import json
+import time
+import random
+import secrets
+import argparse
+import threading
+from html import escape
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, quote
+
+DEFAULT_HOSTS = ('127.0.0.1', '127.0.0.2', '127.0.0.3')
+SITE_ENV_VARS = {
+    'passport': 'JLC_PASSPORT_URL',
+    'oshwhub': 'JLC_OSHWHUB_URL',
+    'm_jlc': 'JLC_M_JLC_URL',
+}
+
+
+class MockConfig:
+    """延迟和故障注入配置，时间单位为秒"""
+
+    def __init__(self, api_latency=0.05, page_latency=0.1, jitter=0.02, failure_rate=0.0, reward_every=7, seed=None):
+        self.api_latency = api_latency
+        self.page_latency = page_latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.reward_every = reward_every  # 每隔多少个账号，金豆签到走"先领奖励"分支
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self, base):
+        with self._lock:
+            jitter = self.random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        seconds = max(0.0, base + jitter)
+        if seconds:
+            time.sleep(seconds)
+
+    def should_fail(self):
+        if self.failure_rate <= 0:
+            return False
+        with self._lock:
+            return self.random.random() < self.failure_rate
+
+
+class MockAccount:
+    __slots__ = ('username', 'password', 'nickname', 'points', 'jindou',
+                 'oshwhub_signed', 'jindou_signed', 'reward_on_sign', 'reward_pending')
+
+    def __init__(self, username, password, index, reward_on_sign):
+        self.username = username
+        self.password = password
+        self.nickname = f"测试用户{index:04d}"
+        self.points = 100 + index
+        self.jindou = 50 + index
+        self.oshwhub_signed = False
+        self.jindou_signed = False
+        self.reward_on_sign = reward_on_sign
+        self.reward_pending = False
+
+
+class MockState:
+    """所有站点共享的账号、会话和请求统计"""
+
+    def __init__(self, config):
+        self.config = config
+        self.accounts = {}
+        self.sessions = {'passport': {}, 'oshwhub': {}, 'm_jlc': {}}
+        self.tickets = {}
+        self.jlc_tokens = {}  # token -> (username, secretkey)
+        self.requests = {}
+        self.injected_failures = 0
+        self.urls = {}
+        self._lock = threading.Lock()
+
+    def add_account(self, username, password):
+        index = len(self.accounts) + 1
+        reward = bool(self.config.reward_every) and index % self.config.reward_every == 0
+        self.accounts[username] = MockAccount(username, password, index, reward)
+        return self.accounts[username]
+
+    def count(self, site, path):
+        with self._lock:
+            key = f"{site} {path}"
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def note_failure(self):
+        with self._lock:
+            self.injected_failures += 1
+
+    def new_session(self, site, username):
+        sid = secrets.token_hex(16)
+        with self._lock:
+            self.sessions[site][sid] = username
+        return sid
+
+    def session_account(self, site, sid):
+        username = self.sessions[site].get(sid) if sid else None
+        return self.accounts.get(username) if username else None
+
+    def issue_ticket(self, username):
+        ticket = secrets.token_hex(12)
+        with self._lock:
+            self.tickets[ticket] = username
+        return ticket
+
+    def redeem_ticket(self, ticket):
+        with self._lock:
+            return self.tickets.pop(ticket, None)
+
+    def issue_jlc_token(self, username):
+        token = secrets.token_hex(20)
+        secretkey = secrets.token_hex(16)
+        with self._lock:
+            self.jlc_tokens[token] = (username, secretkey)
+        return token, secretkey
+
+    def jlc_account(self, token, secretkey):
+        entry = self.jlc_tokens.get(token or '')
+        if not entry or entry[1] != secretkey:
+            return None
+        return self.accounts.get(entry[0])
+
+    def summary(self):
+        accounts = list(self.accounts.values())
+        return {
+            'accounts': len(accounts),
+            'oshwhub_signed': sum(a.oshwhub_signed for a in accounts),
+            'jindou_signed': sum(a.jindou_signed for a in accounts),
+            'injected_failures': self.injected_failures,
+            'requests': dict(sorted(self.requests.items())),
+        }
+
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>登录 - 嘉立创</title>
+<style>
+#slider {{ display: none; margin-top: 12px; }}
+.nc_scale {{ position: relative; width: 300px; height: 34px; background: #e8e8e8; }}
+.btn_slide {{ position: absolute; left: 0; top: 0; width: 40px; height: 34px; background: #888; display: block; }}
+</style></head>
+<body>
+<div class="tabs"><button type="button">短信登录</button><button type="button">账号登录</button></div>
+<form id="login-form" method="post" action="/login">
+  <input type="hidden" name="redirect" value="{redirect}">
+  <input type="text" name="username" placeholder="请输入手机号码 / 客户编号 / 邮箱">
+  <input type="password" name="password" placeholder="请输入密码">
+  <button type="button" class="submit">登录</button>
+</form>
+<div id="feedback"></div>
+<div id="slider"><div class="nc_scale"><span class="btn_slide"></span></div></div>
+<script>
+var form = document.getElementById('login-form');
+var slider = document.getElementById('slider');
+var knob = document.querySelector('.btn_slide');
+document.querySelector('button.submit').addEventListener('click', function () {{
+  fetch('/api/check', {{method: 'POST', body: new URLSearchParams(new FormData(form))}})
+    .then(function (r) {{ return r.json(); }})
+    .then(function (data) {{
+      if (data.success) {{
+        slider.style.display = 'block';
+      }} else {{
+        document.getElementById('feedback').innerHTML = '<div class="err-msg">账号或密码不正确</div>';
+      }}
+    }});
+}});
+var startX = null;
+knob.addEventListener('mousedown', function (e) {{ startX = e.clientX; }});
+document.addEventListener('mousemove', function (e) {{
+  if (startX !== null) knob.style.left = Math.max(0, Math.min(260, e.clientX - startX)) + 'px';
+}});
+document.addEventListener('mouseup', function (e) {{
+  if (startX === null) return;
+  var moved = e.clientX - startX;
+  startX = null;
+  if (moved >= 200) {{ form.submit(); }} else {{ knob.style.left = '0px'; }}
+}});
+</script>
+</body></html>
+"""
+
+SIGN_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>签到 - 立创开源硬件平台</title></head>
+<body>
+<div class="sign_btn"><span id="sign-state">{state}</span></div>
+<div class="sign_text__r9zaN"><span>7天好礼</span></div>
+<div class="sign_text__r9zaN"><span>月度好礼</span></div>
+<div id="reward"></div>
+<script>
+var state = document.getElementById('sign-state');
+state.addEventListener('click', function () {{
+  if (state.textContent.indexOf('立即签到') < 0) return;
+  fetch('/api/users/signIn', {{method: 'POST'}}).then(function (r) {{
+    if (r.ok) state.textContent = '已签到';
+  }});
+}});
+document.querySelectorAll('.sign_text__r9zaN span').forEach(function (gift) {{
+  gift.addEventListener('click', function () {{
+    fetch('/api/users/gift', {{method: 'POST'}}).then(function () {{
+      document.getElementById('reward').innerHTML = '<p>恭喜获取 5 积分</p>';
+    }});
+  }});
+}});
+</script>
+</body></html>
+"""
+
+M_JLC_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>嘉立创</title></head>
+<body>
+<div class="tabbar"><div class="tab">首页</div><div class="tab" onclick="location.hash = 'my'">我的</div></div>
+<script>
+var token = {token}, secretkey = {secretkey};
+localStorage.setItem('X-JLC-AccessToken', token);
+fetch('/api/appPlatform/center/setting/selectPersonalInfo', {{
+  headers: {{'x-jlc-accesstoken': token, 'secretkey': secretkey, 'x-jlc-clienttype': 'WEB'}}
+}});
+</script>
+</body></html>
+"""
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """三个站点共用的请求处理器，site 和 state 由 make_handler 绑定"""
+
+    protocol_version = 'HTTP/1.1'  # 支持 keep-alive，连接复用与真实站点一致
+    site = None
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    # ---- 通用 ----
+    def _cookies(self):
+        cookies = {}
+        for part in (self.headers.get('Cookie') or '').split(';'):
+            name, _, value = part.strip().partition('=')
+            if name:
+                cookies[name] = value
+        return cookies
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send(self, status, body=b'', content_type='text/html; charset=utf-8', headers=()):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _json(self, data, status=200):
+        self._send(status, json.dumps(data, ensure_ascii=False), 'application/json; charset=utf-8')
+
+    def _redirect(self, location, cookie=None):
+        headers = [('Location', location)]
+        if cookie:
+            headers.append(('Set-Cookie', f"{cookie[0]}={cookie[1]}; Path=/; HttpOnly; SameSite=Lax"))
+        self._send(302, b'', headers=headers)
+
+    def _dispatch(self):
+        url = urlparse(self.path)
+        self.query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        self.state.count(self.site, url.path)
+        is_api = url.path.startswith('/api/')
+        config = self.state.config
+        config.delay(config.api_latency if is_api else config.page_latency)
+        if is_api and config.should_fail():
+            self.state.note_failure()
+            return self._json({'success': False, 'code': 500, 'message': '模拟服务故障'}, status=500)
+        handler = getattr(self, f"{self.site}_{self.command.lower()}", None)
+        if handler is None or handler(url.path) is False:
+            self._send(404, 'not found', 'text/plain; charset=utf-8')
+
+    do_GET = _dispatch
+    do_POST = _dispatch
+
+    # ---- passport ----
+    def passport_get(self, path):
+        if path == '/login':
+            redirect = self.query.get('redirect', f"{self.state.urls['oshwhub']}/sso")
+            return self._send(200, LOGIN_PAGE.format(redirect=escape(redirect)))
+        if path == '/sso':
+            redirect = self.query.get('redirect', '')
+            username = self.state.sessions['passport'].get(self._cookies().get('jlc_passport'))
+            if not username:
+                return self._redirect(f"/login?redirect={quote(redirect, safe='')}")
+            return self._redirect(f"{redirect}?ticket={self.state.issue_ticket(username)}")
+        return False
+
+    def passport_post(self, path):
+        form = {k: v[-1] for k, v in parse_qs(self._body().decode('utf-8')).items()}
+        account = self.state.accounts.get(form.get('username', ''))
+        valid = account is not None and account.password == form.get('password')
+        if path == '/api/check':
+            return self._json({'success': valid, 'message': '' if valid else '账号或密码不正确'})
+        if path == '/login':
+            if not valid:
+                return self._redirect(f"/login?redirect={quote(form.get('redirect', ''), safe='')}")
+            sid = self.state.new_session('passport', account.username)
+            ticket = self.state.issue_ticket(account.username)
+            return self._redirect(f"{form.get('redirect')}?ticket={ticket}", cookie=('jlc_passport', sid))
+        return False
+
+    def _sso_callback(self, site, cookie_name, home):
+        username = self.state.redeem_ticket(self.query.get('ticket', ''))
+        if not username:
+            return self._send(403, 'invalid ticket', 'text/plain; charset=utf-8')
+        return self._redirect(home, cookie=(cookie_name, self.state.new_session(site, username)))
+
+    # ---- oshwhub ----
+    def _oshwhub_account(self):
+        return self.state.session_account('oshwhub', self._cookies().get('oshwhub_session'))
+
+    def oshwhub_get(self, path):
+        if path == '/sso':
+            return self._sso_callback('oshwhub', 'oshwhub_session', '/sign_in')
+        account = self._oshwhub_account()
+        if path == '/sign_in':
+            if account is None:
+                service = quote(f"{self.state.urls['oshwhub']}/sso", safe='')
+                return self._redirect(f"{self.state.urls['passport']}/login?redirect={service}")
+            return self._send(200, SIGN_PAGE.format(state='已签到' if account.oshwhub_signed else '立即签到'))
+        if path == '/api/users':
+            if account is None:
+                return self._json({'success': False, 'code': 401, 'message': '未登录'})
+            return self._json({'success': True, 'result': {'nickname': account.nickname, 'points': account.points}})
+        return False
+
+    def oshwhub_post(self, path):
+        self._body()
+        account = self._oshwhub_account()
+        if path not in ('/api/users/signIn', '/api/users/gift'):
+            return False
+        if account is None:
+            return self._json({'success': False, 'code': 401, 'message': '未登录'})
+        if path == '/api/users/gift':
+            account.points += 5
+            return self._json({'success': True})
+        if account.oshwhub_signed:
+            return self._json({'success': False, 'message': '今日已签到'})
+        account.oshwhub_signed = True
+        account.points += 10
+        return self._json({'success': True})
+
+    # ---- m.jlc.com ----
+    def m_jlc_get(self, path):
+        if path == '/sso':
+            return self._sso_callback('m_jlc', 'mjlc_session', '/')
+        if not path.startswith('/api/'):
+            sid = self._cookies().get('mjlc_session')
+            account = self.state.session_account('m_jlc', sid)
+            if account is None:
+                service = quote(f"{self.state.urls['m_jlc']}/sso", safe='')
+                return self._redirect(f"{self.state.urls['passport']}/sso?redirect={service}")
+            token, secretkey = self.state.issue_jlc_token(account.username)
+            return self._send(200, M_JLC_PAGE.format(token=json.dumps(token), secretkey=json.dumps(secretkey)))
+
+        account = self.state.jlc_account(self.headers.get('x-jlc-accesstoken'), self.headers.get('secretkey'))
+        if account is None:
+            return self._json({'success': False, 'code': 401, 'message': '登录已失效'})
+        if path == '/api/appPlatform/center/setting/selectPersonalInfo':
+            return self._json({'success': True, 'data': {'customerCode': account.username}})
+        if path == '/api/activity/front/getCustomerIntegral':
+            return self._json({'success': True, 'data': {'integralVoucher': account.jindou}})
+        if path == '/api/activity/sign/getCurrentUserSignInConfig':
+            return self._json({'success': True, 'data': {'haveSignIn': account.jindou_signed}})
+        if path == '/api/activity/sign/signIn':
+            if account.jindou_signed:
+                return self._json({'success': False, 'message': '今日已签到'})
+            account.jindou_signed = True
+            if account.reward_on_sign:
+                account.reward_pending = True
+                return self._json({'success': True, 'data': {'gainNum': None}})
+            account.jindou += 1
+            return self._json({'success': True, 'data': {'gainNum': 1}})
+        if path == '/api/activity/sign/receiveVoucher':
+            if not account.reward_pending:
+                return self._json({'success': False, 'message': '没有可领取的奖励'})
+            account.reward_pending = False
+            account.jindou += 6
+            return self._json({'success': True})
+        return False
+
+    def m_jlc_post(self, path):
+        self._body()
+        return self.m_jlc_get(path)
+
+
+def make_handler(site, state):
+    return type(f"{site}Handler", (MockHandler,), {'site': site, 'state': state})
+
+
+class MockSites:
+    """启动三个模拟站点，urls 为 {站点: 基础地址}，env() 返回让 jlc.py 指向它们的环境变量"""
+
+    def __init__(self, state, hosts=DEFAULT_HOSTS, ports=(0, 0, 0)):
+        self.state = state
+        self.servers = {}
+        self.threads = []
+        for site, host, port in zip(SITE_ENV_VARS, hosts, ports):
+            server = ThreadingHTTPServer((host, port), make_handler(site, state))
+            server.daemon_threads = True
+            self.servers[site] = server
+            state.urls[site] = f"http://{host}:{server.server_address[1]}"
+        self.urls = state.urls
+
+    def start(self):
+        for server in self.servers.values():
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def stop(self):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+
+    def env(self):
+        return {SITE_ENV_VARS[site]: url for site, url in self.urls.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='启动嘉立创站点的本地模拟服务')
+    parser.add_argument('--accounts', type=int, default=3, help='生成的测试账号数量')
+    parser.add_argument('--api-latency-ms', type=float, default=50)
+    parser.add_argument('--page-latency-ms', type=float, default=100)
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='接口请求返回 500 的概率')
+    parser.add_argument('--hosts', default=','.join(DEFAULT_HOSTS), help='三个站点的监听地址，逗号分隔')
+    parser.add_argument('--base-port', type=int, default=18080, help='三个站点依次使用 base-port、+1、+2')
+    args = parser.parse_args()
+
+    config = MockConfig(args.api_latency_ms / 1000, args.page_latency_ms / 1000, args.jitter_ms / 1000, args.failure_rate)
+    state = MockState(config)
+    usernames = [f"bench{i:04d}" for i in range(1, args.accounts + 1)]
+    passwords = [f"pw-{name}" for name in usernames]
+    for username, password in zip(usernames, passwords):
+        state.add_account(username, password)
+
+    ports = [args.base_port + offset for offset in range(3)]
+    sites = MockSites(state, hosts=args.hosts.split(','), ports=ports).start()
+    for name, value in sites.env().items():
+        print(f"export {name}={value}")
+    print(f"# python jlc.py {','.join(usernames)} {','.join(passwords)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sites.stop()
+        print(json.dumps(state.summary(), ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
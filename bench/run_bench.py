@@ -0,0 +1,290 @@
+"""离线性能测试：启动本地模拟站点，用 N 个测试账号运行真实的 jlc.py，
+输出每分钟处理账号数、分阶段耗时和峰值内存，便于比较不同提交的性能。
+
+    python bench/run_bench.py --accounts 20 --workers 4
+    python bench/run_bench.py --accounts 20 --json new.json
+    git show HEAD~1:jlc.py > /tmp/jlc_old.py && python bench/run_bench.py --script /tmp/jlc_old.py --json old.json
+    python bench/run_bench.py --compare old.json new.json
+
+需要本机已安装 Chrome 和 chromedriver（与正常运行 jlc.py 相同）。
+位于 -- 之后的参数原样传给 jlc.py。
+"""
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+
+from mock_sites import DEFAULT_HOSTS, MockConfig, MockState, MockSites
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 测试时不能把结果推送出去
+PUSH_ENV_VARS = (
+    'TELEGRAM_BOT_TOKEN', 'TELEGRAM_CHAT_ID', 'WECHAT_WEBHOOK_KEY', 'DINGTALK_WEBHOOK', 'PUSHPLUS_TOKEN',
+    'SERVERCHAN_SCKEY', 'SERVERCHAN3_SCKEY', 'COOLPUSH_SKEY', 'CUSTOM_WEBHOOK',
+)
+
+
+class RssSampler:
+    """定时采样被测进程及其所有子进程(chromedriver、Chrome)的 RSS 之和，记录峰值。仅 Linux 可用"""
+
+    def __init__(self, pid, interval=0.25):
+        self.pid = pid
+        self.interval = interval
+        self.peak_bytes = 0
+        self.available = os.path.isdir('/proc')
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+    def start(self):
+        if self.available:
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _process_tree(self):
+        parents = {}
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    stat = f.read()
+            except OSError:
+                continue
+            # comm 字段可能包含空格，从最后一个 ')' 之后解析
+            fields = stat[stat.rfind(')') + 2:].split()
+            parents.setdefault(int(fields[1]), []).append(int(entry))
+        tree, pending = [], [self.pid]
+        while pending:
+            pid = pending.pop()
+            tree.append(pid)
+            pending.extend(parents.get(pid, ()))
+        return tree
+
+    def _tree_rss(self):
+        total = 0
+        for pid in self._process_tree():
+            try:
+                with open(f'/proc/{pid}/statm') as f:
+                    total += int(f.read().split()[1]) * self._page_size
+            except (OSError, IndexError, ValueError):
+                continue
+        return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, self._tree_rss())
+            self._stop.wait(self.interval)
+
+
+def percentile(sorted_values, fraction):
+    """最近秩法分位数，与 jlc.py 的统计口径一致"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(math.ceil(fraction * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def phase_latency(trace_path):
+    """从 jlc.py 导出的 Chrome trace 中按阶段统计耗时（秒）"""
+    try:
+        with open(trace_path, encoding='utf-8') as f:
+            events = json.load(f).get('traceEvents', [])
+    except (OSError, ValueError):
+        return {}
+    grouped = {}
+    for event in events:
+        grouped.setdefault(event['name'], []).append(event['dur'] / 1e6)
+    phases = {}
+    for name, durations in grouped.items():
+        durations.sort()
+        phases[name] = {
+            'count': len(durations),
+            'p50': round(percentile(durations, 0.5), 3),
+            'p95': round(percentile(durations, 0.95), 3),
+            'total': round(sum(durations), 3),
+        }
+    return phases
+
+
+def build_accounts(count, bad_passwords):
+    """生成测试账号，最后 bad_passwords 个账号传给 jlc.py 的是错误密码"""
+    accounts = []
+    for i in range(1, count + 1):
+        username = f"bench{i:04d}"
+        password = f"pw-{username}"
+        given = f"wrong-{username}" if i > count - bad_passwords else password
+        accounts.append((username, password, given))
+    return accounts
+
+
+def run(args):
+    config = MockConfig(
+        api_latency=args.api_latency_ms / 1000,
+        page_latency=args.page_latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    state = MockState(config)
+    accounts = build_accounts(args.accounts, args.bad_passwords)
+    for username, password, _ in accounts:
+        state.add_account(username, password)
+
+    sites = MockSites(state, hosts=args.hosts.split(',')).start()
+    workdir = tempfile.mkdtemp(prefix='jlc-bench-')
+    trace_path = os.path.join(workdir, 'trace.json')
+    log_path = args.log or os.path.join(workdir, 'jlc.log')
+
+    env = {k: v for k, v in os.environ.items() if k not in PUSH_ENV_VARS}
+    env.update(sites.env())
+    env.update({
+        'JLC_STATE_DIR': args.state_dir or os.path.join(workdir, 'state'),
+        'JLC_TRACE_FILE': trace_path,
+        'PYTHONUNBUFFERED': '1',
+    })
+    cmd = [sys.executable, args.script,
+           ','.join(a[0] for a in accounts), ','.join(a[2] for a in accounts), 'false']
+    if args.workers > 1:
+        cmd += ['--workers', str(args.workers)]
+    cmd += args.jlc_args
+
+    print(f"模拟站点: {', '.join(f'{site}={url}' for site, url in sites.urls.items())}")
+    print(f"运行 {os.path.relpath(args.script)}，{args.accounts} 个账号，日志: {log_path}")
+    try:
+        with open(log_path, 'w', encoding='utf-8') as log_file:
+            start = time.perf_counter()
+            process = subprocess.Popen(cmd, cwd=workdir, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+            sampler = RssSampler(process.pid).start()
+            try:
+                returncode = process.wait(timeout=args.timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                returncode = process.wait()
+            finally:
+                sampler.stop()
+            elapsed = time.perf_counter() - start
+    finally:
+        sites.stop()
+
+    mock = state.summary()
+    report = {
+        'script': os.path.abspath(args.script),
+        'accounts': args.accounts,
+        'workers': args.workers,
+        'returncode': returncode,
+        'elapsed_seconds': round(elapsed, 2),
+        'accounts_per_minute': round(args.accounts / elapsed * 60, 2) if elapsed else 0.0,
+        'peak_rss_mb': round(sampler.peak_bytes / 2**20, 1) if sampler.available else None,
+        'config': {
+            'api_latency_ms': args.api_latency_ms,
+            'page_latency_ms': args.page_latency_ms,
+            'jitter_ms': args.jitter_ms,
+            'failure_rate': args.failure_rate,
+            'bad_passwords': args.bad_passwords,
+        },
+        'signed': {'oshwhub': mock['oshwhub_signed'], 'jindou': mock['jindou_signed']},
+        'injected_failures': mock['injected_failures'],
+        'requests': mock['requests'],
+        'phases': phase_latency(trace_path),
+    }
+    if not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+
+def print_report(report):
+    print()
+    print(f"耗时 {report['elapsed_seconds']}s，退出码 {report['returncode']}")
+    print(f"吞吐量: {report['accounts_per_minute']} 账号/分钟（{report['accounts']} 个账号，{report['workers']} 个 worker）")
+    if report['peak_rss_mb'] is not None:
+        print(f"峰值内存: {report['peak_rss_mb']} MB（jlc.py + chromedriver + Chrome）")
+    print(f"模拟站点签到成功: 开源平台 {report['signed']['oshwhub']}，金豆 {report['signed']['jindou']}；"
+          f"注入故障 {report['injected_failures']} 次")
+    phases = report['phases']
+    if phases:
+        print(f"\n{'阶段':<30}{'次数':>4}{'p50':>9}{'p95':>9}{'合计':>8}")
+        for name in sorted(phases, key=lambda n: phases[n]['total'], reverse=True):
+            p = phases[name]
+            print(f"{name:<32}{p['count']:>6}{p['p50']:>9.3f}{p['p95']:>9.3f}{p['total']:>10.2f}")
+    else:
+        print("\n未找到阶段追踪文件（被测版本可能不支持 --trace-file），跳过分阶段统计")
+
+
+def compare(old_path, new_path):
+    """对比两次测试结果"""
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)
+
+    def change(a, b):
+        if not a:
+            return ''
+        return f"{(b - a) / a * 100:+.1f}%"
+
+    print(f"{'指标':<24}{'旧':>12}{'新':>12}{'变化':>10}")
+    for key, label in (('accounts_per_minute', '账号/分钟'), ('elapsed_seconds', '耗时(s)'), ('peak_rss_mb', '峰值内存(MB)')):
+        a, b = old.get(key) or 0, new.get(key) or 0
+        print(f"{label:<24}{a:>12}{b:>12}{change(a, b):>10}")
+    names = sorted(set(old.get('phases', {})) | set(new.get('phases', {})))
+    if names:
+        print(f"\n{'阶段 p50(s)':<30}{'旧':>10}{'新':>10}{'变化':>10}")
+        for name in names:
+            a = old['phases'].get(name, {}).get('p50', 0)
+            b = new['phases'].get(name, {}).get('p50', 0)
+            print(f"{name:<32}{a:>10.3f}{b:>10.3f}{change(a, b):>10}")
+
+
+def main():
+    argv = sys.argv[1:]
+    jlc_args = []
+    if '--' in argv:
+        split = argv.index('--')
+        argv, jlc_args = argv[:split], argv[split + 1:]
+
+    parser = argparse.ArgumentParser(description='用本地模拟站点对 jlc.py 做离线性能测试')
+    parser.add_argument('--accounts', type=int, default=10, help='测试账号数量')
+    parser.add_argument('--workers', type=int, default=1, help='传给 jlc.py 的 --workers')
+    parser.add_argument('--bad-passwords', type=int, default=0, help='其中使用错误密码的账号数')
+    parser.add_argument('--api-latency-ms', type=float, default=80, help='接口平均延迟')
+    parser.add_argument('--page-latency-ms', type=float, default=150, help='页面平均延迟')
+    parser.add_argument('--jitter-ms', type=float, default=30, help='延迟随机抖动范围(±)')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='接口请求返回 500 的概率')
+    parser.add_argument('--seed', type=int, default=None, help='故障注入和抖动的随机种子')
+    parser.add_argument('--hosts', default=','.join(DEFAULT_HOSTS), help='三个模拟站点的监听地址，逗号分隔')
+    parser.add_argument('--script', default=os.path.join(ROOT, 'jlc.py'), help='被测的 jlc.py 路径')
+    parser.add_argument('--state-dir', help='jlc.py 的状态目录，默认每次使用新的临时目录（不命中凭据缓存）')
+    parser.add_argument('--timeout', type=float, default=3600, help='被测进程的最长运行时间（秒）')
+    parser.add_argument('--log', help='保存 jlc.py 输出的文件')
+    parser.add_argument('--json', help='把测试结果写入 JSON 文件')
+    parser.add_argument('--keep', action='store_true', help='保留临时目录（追踪文件、日志、状态）')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='对比两个 --json 结果文件')
+    args = parser.parse_args(argv)
+    args.jlc_args = jlc_args
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
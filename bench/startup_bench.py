@@ -0,0 +1,119 @@
+"""启动开销测试：在全新的解释器中加载 jlc.py（只执行模块顶层，不运行 main），
+统计加载耗时、导入的模块数，以及 selenium / 推送 SDK 是否被加载，便于比较不同提交。
+
+    python bench/startup_bench.py
+    python bench/startup_bench.py --json new.json
+    git show HEAD~1:jlc.py > /tmp/jlc_old.py && python bench/startup_bench.py --script /tmp/jlc_old.py --json old.json
+    python bench/startup_bench.py --compare old.json new.json
+
+--load-selenium 额外模拟浏览器模式第一次启动浏览器前的导入（被测版本需要有 load_selenium）。
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在子进程中执行：加载前后对比 sys.modules，输出一行 JSON
+PROBE = r'''
+import sys, time, json, importlib.util
+start_modules = set(sys.modules)
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location('jlc_under_test', sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+sys.argv = [sys.argv[1]]
+spec.loader.exec_module(module)
+if LOAD_SELENIUM:
+    module.load_selenium()
+elapsed = time.perf_counter() - start
+loaded = set(sys.modules) - start_modules
+print(json.dumps({
+    'import_seconds': elapsed,
+    'modules': len(loaded),
+    'selenium': any(name.split('.')[0] == 'selenium' for name in loaded),
+    'serverchan_sdk': any(name.split('.')[0] == 'serverchan_sdk' for name in loaded),
+}))
+'''
+
+
+def measure_once(script, load_selenium):
+    """启动一个新解释器加载脚本，返回 (进程总耗时, 子进程报告)"""
+    code = PROBE.replace('LOAD_SELENIUM', repr(load_selenium))
+    start = time.perf_counter()
+    cmd = [sys.executable, '-c', code, os.path.abspath(script)]
+    output = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    wall = time.perf_counter() - start
+    return wall, json.loads(output.strip().splitlines()[-1])
+
+
+def run(args):
+    walls, imports, probe = [], [], None
+    for _ in range(args.runs):
+        wall, probe = measure_once(args.script, args.load_selenium)
+        walls.append(wall)
+        imports.append(probe['import_seconds'])
+    return {
+        'script': os.path.abspath(args.script),
+        'runs': args.runs,
+        'load_selenium': args.load_selenium,
+        'startup_ms': round(statistics.median(walls) * 1000, 1),
+        'import_ms': round(statistics.median(imports) * 1000, 1),
+        'modules': probe['modules'],
+        'selenium': probe['selenium'],
+        'serverchan_sdk': probe['serverchan_sdk'],
+    }
+
+
+def print_report(report):
+    print(f"{os.path.relpath(report['script'])}（{report['runs']} 次取中位数）")
+    print(f"  进程启动+加载: {report['startup_ms']} ms")
+    print(f"  加载 jlc.py:   {report['import_ms']} ms")
+    print(f"  新导入模块数:  {report['modules']}")
+    print(f"  selenium: {'已加载' if report['selenium'] else '未加载'}，"
+          f"serverchan_sdk: {'已加载' if report['serverchan_sdk'] else '未加载'}")
+
+
+def compare(old_path, new_path):
+    """对比两次测试结果"""
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)
+
+    def change(a, b):
+        if not a:
+            return ''
+        return f"{(b - a) / a * 100:+.1f}%"
+
+    print(f"{'指标':<20}{'旧':>10}{'新':>10}{'变化':>10}")
+    for key, label in (('startup_ms', '进程启动+加载(ms)'), ('import_ms', '加载 jlc.py(ms)'), ('modules', '导入模块数')):
+        a, b = old.get(key) or 0, new.get(key) or 0
+        print(f"{label:<20}{a:>10}{b:>10}{change(a, b):>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测量 jlc.py 的启动耗时和导入模块数')
+    parser.add_argument('--script', default=os.path.join(ROOT, 'jlc.py'), help='被测的 jlc.py 路径')
+    parser.add_argument('--runs', type=int, default=10, help='重复次数，结果取中位数')
+    parser.add_argument('--load-selenium', action='store_true', help='同时计入浏览器模式导入 selenium 的开销')
+    parser.add_argument('--json', help='把测试结果写入 JSON 文件')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='对比两个 --json 结果文件')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
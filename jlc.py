@@ -2,28 +2,244 @@ import os
 import sys
 import time
 import json
+import math
+import base64
+import hashlib
+import shutil
 import tempfile
+import heapq
+import bisect
+import itertools
 import random
+import csv
+import argparse
+import fnmatch
+import threading
+import contextlib
 import requests
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver import ActionChains
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from serverchan_sdk import sc_send
+
+# selenium 在第一次启动浏览器时才导入（见 load_selenium），--api-only 和纯 HTTP 流程不加载
+webdriver = By = ActionChains = Options = DesiredCapabilities = WebDriverWait = EC = TimeoutException = None
+
+def load_selenium():
+    """导入 selenium 并填充上面的模块级名称，重复调用无额外开销"""
+    global webdriver, By, ActionChains, Options, DesiredCapabilities, WebDriverWait, EC, TimeoutException
+    if webdriver is not None:
+        return
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver import ActionChains
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
+    from selenium import webdriver  # 最后赋值，其他线程看到 webdriver 非空时其余名称均已就绪
+
+# 站点地址，可通过环境变量指向本地模拟服务（见 bench/）
+PASSPORT_URL = os.getenv('JLC_PASSPORT_URL', 'https://passport.jlc.com').rstrip('/')
+OSHWHUB_URL = os.getenv('JLC_OSHWHUB_URL', 'https://oshwhub.com').rstrip('/')
+M_JLC_URL = os.getenv('JLC_M_JLC_URL', 'https://m.jlc.com').rstrip('/')
+PASSPORT_HOST = urlparse(PASSPORT_URL).netloc
+OSHWHUB_HOST = urlparse(OSHWHUB_URL).netloc
+M_JLC_HOST = urlparse(M_JLC_URL).netloc
 
 # 全局变量用于收集总结日志
 in_summary = False
 summary_logs = []
 
+# 多线程并发时保证日志整行输出，并给每行加上当前线程正在处理的账号标签
+_log_lock = threading.Lock()
+_log_context = threading.local()
+
 def log(msg):
-    full_msg = f"[{datetime.now().strftime('%H:%M:%S')}] {msg}"
-    print(full_msg, flush=True)
-    if in_summary:
-        summary_logs.append(msg)  # 只收集纯消息，无时间戳
+    tag = getattr(_log_context, 'tag', '')
+    prefix = f"[{datetime.now().strftime('%H:%M:%S')}]"
+    if tag:
+        prefix += f"[{tag}]"
+    full_msg = f"{prefix} {msg}"
+    with _log_lock:
+        print(full_msg, flush=True)
+        if in_summary:
+            summary_logs.append(msg)  # 只收集纯消息，无时间戳
+
+def get_log_tag():
+    return getattr(_log_context, 'tag', '')
+
+def set_log_tag(tag):
+    """设置当前线程的日志标签，并发模式下用于区分交错输出的各账号日志"""
+    _log_context.tag = tag
+
+# 分阶段耗时追踪：记录每个阶段的耗时、其中 sleep/条件等待的时间和重试次数，结束时导出 Chrome trace 并输出分位数统计
+class Span:
+    __slots__ = ('name', 'account', 'tid', 'start', 'end', 'sleep', 'waited', 'retries', 'failure')
+    
+    def __init__(self, name, account, tid, start):
+        self.name = name
+        self.account = account
+        self.tid = tid
+        self.start = start
+        self.end = None
+        self.sleep = 0.0
+        self.waited = 0.0
+        self.retries = 0
+        self.failure = None  # 账号尝试(account 阶段)的失败类别，成功或其他阶段为 None
+    
+    @property
+    def duration(self):
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+class PhaseRecorder:
+    """顺序阶段记录器：enter() 结束上一个阶段并开始下一个，适合一长串步骤的流程"""
+    
+    def __init__(self, tracer, account):
+        self.tracer = tracer
+        self.account = account
+        self.current = None
+    
+    def enter(self, name):
+        self.close()
+        self.current = self.tracer.begin(name, self.account)
+    
+    def close(self):
+        if self.current is not None:
+            self.tracer.end(self.current)
+            self.current = None
+
+class Tracer:
+    def __init__(self):
+        self._spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._thread_ids = {}
+        self._epoch = time.perf_counter()
+    
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+    
+    def _tid(self):
+        ident = threading.get_ident()
+        with self._lock:
+            return self._thread_ids.setdefault(ident, len(self._thread_ids) + 1)
+    
+    def begin(self, name, account=None):
+        span = Span(name, account, self._tid(), time.perf_counter())
+        self._stack().append(span)
+        return span
+    
+    def end(self, span):
+        span.end = time.perf_counter()
+        stack = self._stack()
+        if span in stack:
+            stack.remove(span)
+        with self._lock:
+            self._spans.append(span)
+        metrics.observe('jlc_phase_duration_seconds', span.end - span.start, phase=span.name)
+    
+    @contextlib.contextmanager
+    def span(self, name, account=None):
+        span = self.begin(name, account)
+        try:
+            yield span
+        finally:
+            self.end(span)
+    
+    def phases(self, account):
+        return PhaseRecorder(self, account)
+    
+    def note_sleep(self, seconds):
+        """sleep 时间计入当前线程所有未结束的阶段（外层阶段包含内层）"""
+        for span in self._stack():
+            span.sleep += seconds
+    
+    def note_wait(self, seconds):
+        for span in self._stack():
+            span.waited += seconds
+    
+    def note_retry(self):
+        """重试次数只计入最内层阶段"""
+        stack = self._stack()
+        if stack:
+            stack[-1].retries += 1
+    
+    def spans(self):
+        with self._lock:
+            return list(self._spans)
+    
+    def export_chrome_trace(self, path):
+        """导出 Chrome trace-event 格式（可在 chrome://tracing 或 Perfetto 中打开）"""
+        events = []
+        for span in self.spans():
+            events.append({
+                'name': span.name,
+                'cat': span.name.split('.', 1)[0],
+                'ph': 'X',
+                'ts': round((span.start - self._epoch) * 1e6),
+                'dur': round(span.duration * 1e6),
+                'pid': 1,
+                'tid': span.tid,
+                'args': {
+                    'account': span.account,
+                    'sleep_ms': round(span.sleep * 1000),
+                    'wait_ms': round(span.waited * 1000),
+                    'retries': span.retries,
+                },
+            })
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+    
+    def phase_stats(self):
+        """按阶段汇总，返回 {阶段: {'count', 'p50', 'p95', 'sleep', 'waited', 'retries'}}"""
+        grouped = {}
+        for span in self.spans():
+            grouped.setdefault(span.name, []).append(span)
+        stats = {}
+        for name, spans in grouped.items():
+            durations = sorted(span.duration for span in spans)
+            stats[name] = {
+                'count': len(spans),
+                'p50': percentile(durations, 0.5),
+                'p95': percentile(durations, 0.95),
+                'sleep': sum(span.sleep for span in spans) / len(spans),
+                'waited': sum(span.waited for span in spans) / len(spans),
+                'retries': sum(span.retries for span in spans),
+            }
+        return stats
+    
+    def log_phase_table(self):
+        stats = self.phase_stats()
+        if not stats:
+            return
+        log("⏱ 分阶段耗时统计（秒，sleep/等待为每次平均）:")
+        log(f"  {'阶段':<28}{'次数':>4}{'p50':>9}{'p95':>9}{'sleep':>8}{'等待':>6}{'重试':>4}")
+        for name in sorted(stats, key=lambda n: stats[n]['p50'] * stats[n]['count'], reverse=True):
+            st = stats[name]
+            log(f"  {name:<30}{st['count']:>6}{st['p50']:>9.2f}{st['p95']:>9.2f}{st['sleep']:>8.2f}{st['waited']:>8.2f}{st['retries']:>6}")
+
+def percentile(sorted_values, fraction):
+    """最近秩法分位数，sorted_values 需已排序"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(math.ceil(fraction * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+tracer = Tracer()
+
+def api_name(url):
+    """接口 URL 的最后一段路径，用作阶段名"""
+    return urlparse(url).path.rstrip('/').rsplit('/', 1)[-1] or 'root'
+
+def pause(seconds):
+    """带追踪的 sleep，时间计入当前阶段"""
+    time.sleep(seconds)
+    tracer.note_sleep(seconds)
 
 def format_nickname(nickname):
     """格式化昵称，只显示第一个字和最后一个字，中间用星号代替"""
@@ -39,130 +255,1174 @@ def format_nickname(nickname):
         return f"{nickname[0]}{'*' * (len(nickname)-2)}{nickname[-1]}"
 
 def with_retry(func, max_retries=5, delay=1):
-    """如果函数返回None或抛出异常，静默重试"""
+    """如果函数返回None或抛出异常，间隔 delay 秒静默重试（等待页面状态就绪；对站点的限速由 rate_limiter 负责）"""
     def wrapper(*args, **kwargs):
         for attempt in range(max_retries):
             try:
                 result = func(*args, **kwargs)
                 if result is not None:
                     return result
-                time.sleep(delay + random.uniform(0, 1))  # 随机延迟
             except Exception:
-                time.sleep(delay + random.uniform(0, 1))  # 随机延迟
+                pass
+            if attempt < max_retries - 1:
+                tracer.note_retry()
+                pause(delay)
         return None
     return wrapper
 
+# 运行指标：计数器、仪表和直方图，运行结束时写成 Prometheus textfile，也可以在本地端口上供抓取
+METRICS_FILE = os.getenv('JLC_METRICS_FILE')
+METRICS_PORT = int(os.getenv('JLC_METRICS_PORT', '0') or 0)
+METRICS_HOST = os.getenv('JLC_METRICS_HOST', '127.0.0.1')
+METRIC_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)  # 耗时直方图的桶上界（秒）
+METRIC_BUCKET_LABELS = tuple(repr(float(b)) for b in METRIC_BUCKETS) + ('+Inf',)
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+    
+    def __init__(self):
+        self.counts = [0] * (len(METRIC_BUCKETS) + 1)  # 最后一个为 +Inf，导出时再累加
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        self.counts[bisect.bisect_left(METRIC_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class MetricsRegistry:
+    """进程内的指标表：describe() 声明指标族，inc/set/observe 按标签更新，render() 输出文本格式"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families = {}  # 名称 -> (类型, 说明)
+        self._values = {}    # 名称 -> {标签元组: 数值或 Histogram}
+    
+    def describe(self, name, kind, help_text):
+        self._families[name] = (kind, help_text)
+        self._values.setdefault(name, {})
+    
+    def inc(self, name, value=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values[name]
+            series[key] = series.get(key, 0) + value
+    
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._values[name][tuple(sorted(labels.items()))] = value
+    
+    def observe(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            histogram = self._values[name].get(key)
+            if histogram is None:
+                histogram = self._values[name][key] = Histogram()
+            histogram.observe(value)
+    
+    @staticmethod
+    def _labels(pairs):
+        if not pairs:
+            return ''
+        escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+        return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+    
+    @staticmethod
+    def _number(value):
+        return repr(float(value)) if isinstance(value, float) else str(value)
+    
+    def render(self, openmetrics=False):
+        """openmetrics=True 输出 OpenMetrics 1.0，否则输出 Prometheus 文本格式 0.0.4（node_exporter textfile 使用）"""
+        lines = []
+        with self._lock:
+            for name, (kind, help_text) in self._families.items():
+                series = self._values[name]
+                if not series:
+                    continue
+                family = name if openmetrics or kind != 'counter' else f"{name}_total"
+                lines.append(f"# HELP {family} {help_text}")
+                lines.append(f"# TYPE {family} {kind}")
+                for key in sorted(series):
+                    value = series[key]
+                    if kind == 'histogram':
+                        cumulative = 0
+                        for bound, count in zip(METRIC_BUCKET_LABELS, value.counts):
+                            cumulative += count
+                            lines.append(f"{name}_bucket{self._labels(key + (('le', bound),))} {cumulative}")
+                        lines.append(f"{name}_sum{self._labels(key)} {self._number(value.sum)}")
+                        lines.append(f"{name}_count{self._labels(key)} {value.count}")
+                    elif kind == 'counter':
+                        lines.append(f"{name}_total{self._labels(key)} {self._number(value)}")
+                    else:
+                        lines.append(f"{name}{self._labels(key)} {self._number(value)}")
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+    
+    def write_textfile(self, path):
+        """原子写入，避免 node_exporter 读到写了一半的文件"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+    
+    def serve(self, port, host=METRICS_HOST):
+        """在后台线程中提供 /metrics，按 Accept 头返回 OpenMetrics 或 Prometheus 文本格式，返回服务器对象"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                openmetrics = 'application/openmetrics-text' in self.headers.get('Accept', '')
+                body = registry.render(openmetrics).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+                                 if openmetrics else 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+        return server
+
+metrics = MetricsRegistry()
+metrics.describe('jlc_accounts', 'gauge', '本次运行的账号数')
+metrics.describe('jlc_accounts_finished', 'counter', '已结束调度的账号数（成功、密码错误或放弃重试）')
+metrics.describe('jlc_accounts_skipped', 'counter', '无需处理直接沿用结果的账号数')
+metrics.describe('jlc_accounts_succeeded', 'gauge', '各平台签到成功的账号数')
+metrics.describe('jlc_accounts_failed', 'gauge', '各平台签到失败的账号数（不含密码错误）')
+metrics.describe('jlc_accounts_platform_skipped', 'gauge', '各平台跳过、不计入成功和失败的账号数（API 模式下的开源平台）')
+metrics.describe('jlc_accounts_password_error', 'gauge', '密码错误的账号数')
+metrics.describe('jlc_account_attempts', 'counter', '账号尝试次数，按结果分类')
+metrics.describe('jlc_retries', 'counter', '安排的重试次数，按失败类别分类')
+metrics.describe('jlc_accounts_given_up', 'counter', '达到次数、预算或时限后放弃重试的账号数')
+metrics.describe('jlc_browser_launches', 'counter', '浏览器启动次数')
+metrics.describe('jlc_phase_duration_seconds', 'histogram', '各阶段耗时')
+metrics.describe('jlc_page_load_seconds', 'histogram', '浏览器页面加载耗时，按页面分类')
+metrics.describe('jlc_page_transfer_bytes', 'counter', '浏览器页面加载传输的字节数，按页面分类')
+metrics.describe('jlc_http_requests', 'counter', 'HTTP 请求数，按主机和状态码分类')
+metrics.describe('jlc_http_request_duration_seconds', 'histogram', 'HTTP 请求耗时，按主机分类')
+metrics.describe('jlc_points_reward', 'gauge', '本次运行获得的积分合计')
+metrics.describe('jlc_jindou_reward', 'gauge', '本次运行获得的金豆合计')
+metrics.describe('jlc_run_duration_seconds', 'gauge', '本次运行处理账号的总耗时')
+metrics.describe('jlc_run_finished_timestamp_seconds', 'gauge', '本次运行结束的 Unix 时间')
+
+# 条件等待：替代原先的固定 sleep，并统计相对旧逻辑节省的等待时间
+class WaitLedger:
+    """记录每处等待的旧固定 sleep 时长和实际等待时长"""
+    
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def record(self, label, legacy_seconds, waited_seconds):
+        with self._lock:
+            count, legacy, waited = self._entries.get(label, (0, 0.0, 0.0))
+            self._entries[label] = (count + 1, legacy + legacy_seconds, waited + waited_seconds)
+    
+    def log_report(self):
+        with self._lock:
+            entries = dict(self._entries)
+        if not entries:
+            return
+        total_legacy = sum(e[1] for e in entries.values())
+        total_waited = sum(e[2] for e in entries.values())
+        log("⏱ 等待优化统计（旧固定等待 → 实际条件等待）:")
+        for label, (count, legacy, waited) in sorted(entries.items(), key=lambda item: item[1][1] - item[1][2], reverse=True):
+            log(f"  ├── {label}: {count} 次，{legacy:.1f}s → {waited:.1f}s")
+        log(f"  └── 合计节省 {total_legacy - total_waited:.1f}s（{total_legacy:.1f}s → {total_waited:.1f}s）")
+
+wait_ledger = WaitLedger()
+
+def wait_for(driver, condition, timeout, legacy_sleep, label):
+    """等待条件满足（最多 timeout 秒）代替固定 sleep，超时返回 False 而不抛异常"""
+    start = time.time()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.2).until(condition)
+        satisfied = True
+    except TimeoutException:
+        satisfied = False
+    except Exception:
+        satisfied = False  # 条件检查本身出错时与超时同样处理，由后续步骤决定如何继续
+    waited = time.time() - start
+    wait_ledger.record(label, legacy_sleep, waited)
+    tracer.note_wait(waited)
+    return satisfied
+
+def any_xpath_present(*xpaths):
+    """条件：任意一个 XPath 在页面中出现"""
+    def condition(driver):
+        return any(driver.find_elements(By.XPATH, xpath) for xpath in xpaths)
+    return condition
+
+# 页面探测：一次 execute_async_script 检查所有候选 XPath（可要求可见、文字包含关键词），都不匹配时
+# 用 MutationObserver 等待 DOM 变化，返回最先匹配的一项。代替逐个 XPath 各等几秒的串行 WebDriverWait
+PROBE_SCRIPT = """
+const probes = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+function visible(el) {
+  if (!el.getClientRects().length) return false;
+  const style = getComputedStyle(el);
+  return style.visibility !== 'hidden' && style.display !== 'none' && style.opacity !== '0';
+}
+function check() {
+  for (let i = 0; i < probes.length; i++) {
+    const probe = probes[i];
+    let found;
+    try {
+      found = document.evaluate(probe.xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    } catch (e) {
+      continue;
+    }
+    for (let j = 0; j < found.snapshotLength; j++) {
+      const el = found.snapshotItem(j);
+      if (probe.visible && !visible(el)) continue;
+      const text = (el.innerText || el.textContent || '').trim();
+      if (probe.keywords.length && !probe.keywords.some(k => text.includes(k))) continue;
+      return {index: i, element: el, text: text.slice(0, 200)};
+    }
+  }
+  return null;
+}
+let finished = false, observer = null, timer = null, poll = null;
+function finish(match) {
+  if (finished) return;
+  finished = true;
+  if (observer) observer.disconnect();
+  clearTimeout(timer);
+  clearInterval(poll);
+  done(match);
+}
+const first = check();
+if (first || timeoutMs <= 0) {
+  finish(first);
+} else {
+  const recheck = () => { const match = check(); if (match) finish(match); };
+  observer = new MutationObserver(recheck);
+  observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true, attributes: true});
+  poll = setInterval(recheck, 250);  // 只有样式变化（如动画结束后显示）时不会触发 DOM 变化
+  timer = setTimeout(() => finish(null), timeoutMs);
+}
+"""
+
+def xpath_probe(xpath, keywords=(), visible=False):
+    """一个探测项：XPath 匹配的元素中，（可选）可见且文字包含任一关键词的第一个"""
+    return {'xpath': xpath, 'keywords': list(keywords), 'visible': visible}
+
+def probe_page(driver, probes, timeout, legacy_sleep, label):
+    """在一次脚本调用中等待 probes 任一项匹配（最多 timeout 秒），返回 (探测项序号, 元素, 文字)，
+    超时、页面跳转或脚本出错时返回 None。等待时间与 wait_for 一样计入统计"""
+    start = time.time()
+    try:
+        match = driver.execute_async_script(PROBE_SCRIPT, probes, int(timeout * 1000))
+    except Exception:
+        match = None
+    waited = time.time() - start
+    wait_ledger.record(label, legacy_sleep, waited)
+    tracer.note_wait(waited)
+    if not match:
+        return None
+    return match['index'], match['element'], match['text']
+
+def url_left_passport(driver):
+    """条件：登录完成，已从 passport.jlc.com 跳回 oshwhub.com"""
+    current_url = driver.current_url
+    return OSHWHUB_HOST in current_url and PASSPORT_HOST not in current_url
+
+def login_feedback_ready(driver):
+    """条件：点击登录后出现了滑块、错误提示，或已经跳转"""
+    return (
+        url_left_passport(driver)
+        or driver.find_elements(By.CSS_SELECTOR, ".btn_slide")
+        or any_xpath_present(*LOGIN_FEEDBACK_XPATHS)(driver)
+    )
+
+def local_storage_has_token(driver):
+    """条件：m.jlc.com 已把 token 写入 localStorage（每次重新读取快照，读到后留给 extract_token_from_local_storage）"""
+    return browser_snapshot(driver, refresh=True).token is not None
+
+OSHWHUB_SIGN_STATE_XPATHS = ('//span[contains(text(),"已签到")]', '//span[contains(text(),"立即签到")]')
+OSHWHUB_GIFT_XPATH = '//div[contains(@class, "sign_text__r9zaN")]/span'
+LOGIN_FEEDBACK_XPATHS = (
+    "//*[contains(text(), '账号或密码不正确')]",
+    "//*[contains(text(), '用户名或密码错误')]",
+    "//*[contains(text(), '密码错误')]",
+    "//*[contains(text(), '登录失败')]",
+)
+PASSWORD_ERROR_KEYWORDS = ('账号或密码不正确', '用户名或密码错误', '密码错误', '登录失败')
+# 错误提示可能直接是文字，也可能在各种提示框里，只认可见且包含关键词的
+PASSWORD_ERROR_PROBES = [xpath_probe(xpath, PASSWORD_ERROR_KEYWORDS, visible=True) for xpath in LOGIN_FEEDBACK_XPATHS + (
+    "//*[contains(@class, 'error')]",
+    "//*[contains(@class, 'err-msg')]",
+    "//*[contains(@class, 'toast')]",
+    "//*[contains(@class, 'message')]",
+)]
+# m.jlc.com 上用于触发带 secretkey 请求的导航入口，按优先级排列
+M_JLC_NAV_PROBES = [xpath_probe(xpath, visible=True) for xpath in (
+    "//div[contains(text(), '我的')]",
+    "//div[contains(text(), '个人中心')]",
+    "//div[contains(text(), '用户中心')]",
+    "//a[contains(@href, 'user')]",
+    "//a[contains(@href, 'center')]",
+)]
+
+# 按主机限速：接口请求和页面跳转都先从对应站点的令牌桶取令牌，并发的 worker 共享同一组令牌桶
+class TokenBucket:
+    """令牌桶：每秒补充 rate 个令牌，最多积攒 burst 个。令牌不足时预支并返回需要等待的秒数，
+    排在后面的调用方等待更久，并发时整体速率仍不超过 rate"""
+    __slots__ = ('rate', 'burst', 'tokens', 'updated', 'acquired', 'waited')
+    
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.acquired = 0
+        self.waited = 0.0
+    
+    def reserve(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        self.acquired += 1
+        delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        self.waited += delay
+        return delay
+
+class RateLimiter:
+    """为每个站点主机维护一个令牌桶，未配置的主机（推送渠道等）不限速"""
+    
+    def __init__(self, limits):
+        self._buckets = {host: TokenBucket(rate, burst) for host, (rate, burst) in limits.items() if rate > 0}
+        self._lock = threading.Lock()
+    
+    def acquire(self, url):
+        """取一个令牌，必要时等待，返回等待秒数"""
+        bucket = self._buckets.get(urlparse(url).netloc)
+        if bucket is None:
+            return 0.0
+        with self._lock:
+            delay = bucket.reserve()
+        if delay > 0:
+            time.sleep(delay)
+            tracer.note_wait(delay)
+        return delay
+    
+    def log_stats(self):
+        with self._lock:
+            stats = [(host, bucket.acquired, bucket.waited, bucket.rate) for host, bucket in self._buckets.items() if bucket.acquired]
+        if not stats:
+            return
+        log("🚦 站点限速统计:")
+        for host, acquired, waited, rate in sorted(stats):
+            log(f"  ├── {host}: {acquired} 次请求/跳转，限速 {rate:g} 次/秒，累计等待 {waited:.1f}s")
+
+def parse_rate_limits():
+    """JLC_RATE_LIMIT / JLC_RATE_BURST 为三个站点的默认速率和突发量，
+    JLC_RATE_LIMITS 可按主机单独指定，格式 主机=速率/突发量，多个用逗号分隔"""
+    rate = float(os.getenv('JLC_RATE_LIMIT', '2'))
+    burst = float(os.getenv('JLC_RATE_BURST', '4'))
+    limits = {host: (rate, burst) for host in (PASSPORT_HOST, OSHWHUB_HOST, M_JLC_HOST)}
+    for item in os.getenv('JLC_RATE_LIMITS', '').split(','):
+        if '=' not in item:
+            continue
+        host, spec = item.split('=', 1)
+        host_rate, _, host_burst = spec.partition('/')
+        limits[host.strip()] = (float(host_rate), float(host_burst or burst))
+    return limits
+
+rate_limiter = RateLimiter(parse_rate_limits())
+
+# 页面加载统计：每次跳转/刷新后从 Resource Timing 读取本页的加载耗时和传输字节数，用于调整请求拦截规则。
+# 不读取性能日志，那里的网络事件要留给 secretkey 抓取
+PAGE_STATS_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+let bytes = nav ? nav.transferSize : 0;
+for (const r of resources) bytes += r.transferSize || 0;
+const loaded = nav && nav.loadEventEnd ? nav.loadEventEnd - nav.startTime : performance.now();
+return [location.host + location.pathname, loaded / 1000, bytes, resources.length];
+"""
+
+class PageLoadStats:
+    """按页面（主机+路径）累计加载次数、耗时、传输字节数和资源数"""
+    
+    def __init__(self):
+        self._pages = {}
+        self._lock = threading.Lock()
+    
+    def measure(self, driver):
+        try:
+            page, seconds, transferred, resources = driver.execute_script(PAGE_STATS_SCRIPT)
+        except Exception:
+            return
+        with self._lock:
+            count, total_seconds, total_bytes, total_resources = self._pages.get(page, (0, 0.0, 0, 0))
+            self._pages[page] = (count + 1, total_seconds + seconds, total_bytes + transferred, total_resources + resources)
+        metrics.observe('jlc_page_load_seconds', seconds, page=page)
+        metrics.inc('jlc_page_transfer_bytes', transferred, page=page)
+    
+    def log_report(self):
+        with self._lock:
+            pages = dict(self._pages)
+        if not pages:
+            return
+        log(f"📦 页面加载统计（请求拦截{'开启' if BLOCKED_URL_PATTERNS else '关闭'}，平均每次；跨域资源未开放 Timing-Allow-Origin 时不计字节）:")
+        for page, (count, seconds, transferred, resources) in sorted(pages.items(), key=lambda item: item[1][2], reverse=True):
+            log(f"  ├── {page}: {count} 次，{seconds / count:.2f}s，{transferred / count / 1024:.0f} KB，{resources / count:.0f} 个资源")
+        log(f"  └── 合计 {sum(p[2] for p in pages.values()) / 1024:.0f} KB，加载 {sum(p[1] for p in pages.values()):.1f}s")
+
+page_stats = PageLoadStats()
+
+def navigate(driver, url):
+    """限速后在浏览器中打开页面"""
+    rate_limiter.acquire(url)
+    invalidate_browser_snapshot()
+    driver.get(url)
+    page_stats.measure(driver)
+
+def refresh_page(driver):
+    """限速后刷新当前页面"""
+    rate_limiter.acquire(driver.current_url)
+    invalidate_browser_snapshot()
+    driver.refresh()
+    page_stats.measure(driver)
+
+# HTTP 连接池：按主机复用 keep-alive 连接，所有接口请求和推送都通过这里发出
+class HttpSessionPool:
+    """按主机维护 requests.Session，复用 TCP/TLS 连接并统计连接复用情况"""
+    
+    def __init__(self, pool_size=10, connect_timeout=5, read_timeout=10):
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self._sessions = {}
+        self._request_counts = {}
+        self._lock = threading.Lock()
+    
+    def session_for(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                # 各账号的 Cookie 通过请求头显式传入，会话本身不保存任何 Cookie，避免多账号之间串号
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[host] = session
+                self._request_counts[host] = 0
+            return session
+    
+    def request(self, method, url, **kwargs):
+        """限速后发送请求，未指定 timeout 时使用 (连接超时, 读取超时)"""
+        kwargs.setdefault('timeout', self.timeout)
+        rate_limiter.acquire(url)
+        session = self.session_for(url)
+        host = urlparse(url).netloc
+        with self._lock:
+            self._request_counts[host] += 1
+        status = 'error'
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            metrics.inc('jlc_http_requests', host=host, status=status)
+            metrics.observe('jlc_http_request_duration_seconds', time.perf_counter() - start, host=host)
+    
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+    
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+    
+    def stats(self):
+        """返回 {主机: (请求数, 新建连接数)}"""
+        stats = {}
+        with self._lock:
+            for host, session in self._sessions.items():
+                connections = 0
+                for adapter in set(session.adapters.values()):
+                    pools = adapter.poolmanager.pools
+                    for key in list(pools.keys()):
+                        try:
+                            connections += pools[key].num_connections
+                        except KeyError:
+                            pass
+                stats[host] = (self._request_counts[host], connections)
+        return stats
+    
+    def log_stats(self):
+        stats = self.stats()
+        if not stats:
+            return
+        log("🔌 HTTP 连接复用统计:")
+        for host, (requests_sent, connections) in sorted(stats.items()):
+            log(f"  ├── {host}: 请求 {requests_sent} 次，新建连接 {connections} 个，复用 {max(requests_sent - connections, 0)} 次")
+
+http_pool = HttpSessionPool(
+    pool_size=int(os.getenv('JLC_HTTP_POOL_SIZE', '10')),
+    connect_timeout=float(os.getenv('JLC_HTTP_CONNECT_TIMEOUT', '5')),
+    read_timeout=float(os.getenv('JLC_HTTP_READ_TIMEOUT', '10')),
+)
+
+# 本地状态目录：凭据缓存、运行日志等
+STATE_DIR = os.getenv('JLC_STATE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'jlc-auto-sign')
+
+def account_key(username):
+    """账号的稳定标识，落盘时代替明文账号"""
+    return hashlib.sha256(username.encode('utf-8')).hexdigest()[:24]
+
+# 凭据缓存：按账号把 token、secretkey 和 oshwhub Cookie 保存到本地（目录 0700、文件 0600），下次运行时优先直接走 HTTP 接口。
+# 安装了可选依赖 cryptography 时用 AES-GCM 加密，密钥由账号密码派生，密码修改后旧缓存自然失效
+CREDENTIAL_CACHE_ENABLED = os.getenv('JLC_CREDENTIAL_CACHE', '1').lower() not in ('0', 'false', 'no')
+CREDENTIAL_CACHE_DIR = os.getenv('JLC_CREDENTIAL_CACHE_DIR') or STATE_DIR
+CREDENTIAL_CACHE_TTL = float(os.getenv('JLC_CREDENTIAL_TTL_HOURS', '72')) * 3600
+CREDENTIAL_KDF_ROUNDS = 200000
+CREDENTIAL_FORMAT = 2
+_aesgcm = None
+
+def load_aesgcm():
+    """导入 cryptography 的 AESGCM，未安装时返回 None 并提示一次"""
+    global _aesgcm
+    if _aesgcm is None:
+        try:
+            from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+            _aesgcm = AESGCM
+        except ImportError:
+            log("⚠ 未安装 cryptography，凭据缓存不加密，只依靠文件权限保护")
+            _aesgcm = False
+    return _aesgcm or None
+
+def _credential_cache_path(username):
+    return os.path.join(CREDENTIAL_CACHE_DIR, f"{account_key(username)}.cred")
+
+def _credential_key(password, salt):
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, CREDENTIAL_KDF_ROUNDS, dklen=32)
+
+def _encode_credentials(username, password, payload):
+    aesgcm = load_aesgcm()
+    if aesgcm is None:
+        return json.dumps({'v': CREDENTIAL_FORMAT, 'alg': 'none', 'data': payload})
+    salt, nonce = os.urandom(16), os.urandom(12)
+    ciphertext = aesgcm(_credential_key(password, salt)).encrypt(
+        nonce, json.dumps(payload).encode('utf-8'), account_key(username).encode())
+    return json.dumps({
+        'v': CREDENTIAL_FORMAT,
+        'alg': 'AES-256-GCM',
+        'salt': base64.b64encode(salt).decode(),
+        'nonce': base64.b64encode(nonce).decode(),
+        'data': base64.b64encode(ciphertext).decode(),
+    })
+
+def _decode_credentials(username, password, blob):
+    """解析缓存文件，旧格式、密码已修改、文件被篡改或缺少 cryptography 时返回 None"""
+    envelope = json.loads(blob)
+    if envelope.get('v') != CREDENTIAL_FORMAT:
+        return None
+    if envelope.get('alg') == 'none':
+        return envelope['data']
+    aesgcm = load_aesgcm()
+    if aesgcm is None:
+        return None
+    from cryptography.exceptions import InvalidTag
+    try:
+        plaintext = aesgcm(_credential_key(password, base64.b64decode(envelope['salt']))).decrypt(
+            base64.b64decode(envelope['nonce']), base64.b64decode(envelope['data']), account_key(username).encode())
+    except InvalidTag:
+        return None
+    return json.loads(plaintext.decode('utf-8'))
+
+# --credentials 文件直接提供的凭据，只保存在内存中，字段优先于缓存文件
+supplied_credentials = {}
+
+def load_supplied_credentials(path):
+    """读取 JSON 凭据文件 {账号: {"token", "secretkey", "cookie", "oshwhub_sign"}}，cookie 可以是请求头字符串或 Cookie 列表，
+    oshwhub_sign 为凭据缓存中记录的开源平台签到请求，返回账号数"""
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    for username, entry in entries.items():
+        cookies = entry.get('cookies') or entry.get('cookie') or []
+        if isinstance(cookies, str):
+            pairs = (item.strip().split('=', 1) for item in cookies.split(';') if '=' in item)
+            cookies = [{'name': name, 'value': value} for name, value in pairs]
+        credentials = {'token': entry.get('token'), 'secretkey': entry.get('secretkey'), 'cookies': cookies,
+                       'oshwhub_sign': entry.get('oshwhub_sign')}
+        supplied_credentials[account_key(username.strip())] = {k: v for k, v in credentials.items() if v}
+    return len(entries)
+
+def load_cached_credentials(username, password):
+    """读取账号的缓存凭据（叠加 --credentials 提供的字段），过期、损坏或无法解密时返回 None"""
+    credentials = _read_credential_cache(username, password)
+    supplied = supplied_credentials.get(account_key(username))
+    if supplied:
+        credentials = dict(credentials or {}, **supplied)
+    return credentials
+
+def _read_credential_cache(username, password):
+    if not CREDENTIAL_CACHE_ENABLED:
+        return None
+    try:
+        with open(_credential_cache_path(username), 'r', encoding='utf-8') as f:
+            credentials = _decode_credentials(username, password, f.read())
+    except FileNotFoundError:
+        return None
+    except Exception:
+        return None
+    if not credentials:
+        return None
+    
+    now = time.time()
+    if credentials.get('expires_at', 0) <= now:
+        return None
+    # 去掉已经过期的 Cookie（get_cookies 格式用 expiry，CDP 格式的会话 Cookie 用 expires）
+    credentials['cookies'] = [c for c in credentials.get('cookies') or [] if not c.get('expiry') or c['expiry'] > now]
+    if credentials.get('session_cookies'):
+        credentials['session_cookies'] = [c for c in credentials['session_cookies'] if not c.get('expires') or c['expires'] > now]
+    if not credentials.get('token') and not credentials['cookies'] and not credentials.get('session_cookies'):
+        return None
+    return credentials
+
+def _write_credentials(username, password, credentials):
+    """原子写入缓存文件，目录和文件仅当前用户可读写"""
+    os.makedirs(CREDENTIAL_CACHE_DIR, mode=0o700, exist_ok=True)
+    os.chmod(CREDENTIAL_CACHE_DIR, 0o700)
+    path = _credential_cache_path(username)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(_encode_credentials(username, password, credentials))
+    os.replace(tmp_path, path)
+
+# 同一账号的开源平台和金豆流程可能在不同线程同时更新缓存，读改写需要串行
+_credential_lock = threading.Lock()
+
+def save_cached_credentials(username, password, **updates):
+    """更新账号的缓存凭据(token / secretkey / cookies)，并顺延过期时间。
+    只与缓存文件中的内容合并，--credentials 提供的凭据不会写入磁盘"""
+    if not CREDENTIAL_CACHE_ENABLED:
+        return
+    try:
+        with _credential_lock:
+            credentials = _read_credential_cache(username, password) or {}
+            credentials.update({k: v for k, v in updates.items() if v is not None})
+            now = time.time()
+            credentials['saved_at'] = now
+            credentials['expires_at'] = now + CREDENTIAL_CACHE_TTL
+            _write_credentials(username, password, credentials)
+    except Exception as e:
+        log(f"⚠ 保存凭据缓存失败: {e}")
+
+def invalidate_cached_credentials(username, password, *fields):
+    """凭据被服务端拒绝时清除对应字段，不传字段则删除整个缓存"""
+    supplied = supplied_credentials.get(account_key(username))
+    if supplied is not None:
+        for field in fields or list(supplied):
+            supplied.pop(field, None)
+    if not CREDENTIAL_CACHE_ENABLED:
+        return
+    try:
+        with _credential_lock:
+            credentials = _read_credential_cache(username, password) if fields else None
+            if credentials:
+                for field in fields:
+                    credentials.pop(field, None)
+                _write_credentials(username, password, credentials)
+            else:
+                os.remove(_credential_cache_path(username))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        log(f"⚠ 清除凭据缓存失败: {e}")
+
+# 运行日志：每次签到尝试后追加一行 JSON 并落盘，进程中途被杀也不会丢失已完成的账号
+JOURNAL_KEEP_DAYS = 7
+
+class RunJournal:
+    """按天分文件的追加式运行日志(JSON Lines)，--resume 时据此跳过今天已成功的账号"""
+    
+    def __init__(self, path=None):
+        self.day = datetime.now().strftime('%Y-%m-%d')
+        self.path = path or os.getenv('JLC_JOURNAL_FILE') or os.path.join(STATE_DIR, f"journal-{self.day}.jsonl")
+        self._lock = threading.Lock()
+        self._checked_tail = False
+    
+    def _terminate_partial_line(self, f):
+        """上次进程被杀时文件可能停在半行，先补一个换行，避免新记录拼接到坏行上"""
+        self._checked_tail = True
+        if f.tell() == 0:
+            return
+        with open(self.path, 'rb') as tail:
+            tail.seek(-1, os.SEEK_END)
+            if tail.read(1) != b"\n":
+                f.write("\n")
+    
+    def append(self, username, result):
+        record = {'ts': time.time(), 'day': self.day, 'account': account_key(username), 'result': result.to_dict()}
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), mode=0o700, exist_ok=True)
+                fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+                with os.fdopen(fd, 'a', encoding='utf-8') as f:
+                    if not self._checked_tail:
+                        self._terminate_partial_line(f)
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+        except Exception as e:
+            log(f"⚠ 写入运行日志失败: {e}")
+    
+    def load_results(self):
+        """读取今天的运行日志，按账号合并各次尝试，返回 {账号标识: 合并结果}"""
+        merged = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # 进程被杀时最后一行可能不完整
+                    if record.get('day') != self.day:
+                        continue
+                    key, result = record['account'], AccountResult.from_dict(record['result'])
+                    if key not in merged:
+                        merged[key] = result
+                    else:
+                        merged[key].merge(result)
+        except FileNotFoundError:
+            pass
+        return merged
+    
+    def prune(self):
+        """删除过期的运行日志文件"""
+        cutoff = time.time() - JOURNAL_KEEP_DAYS * 86400
+        try:
+            for name in os.listdir(STATE_DIR):
+                path = os.path.join(STATE_DIR, name)
+                if name.startswith('journal-') and name.endswith('.jsonl') and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+        except OSError:
+            pass
+
+run_journal = RunJournal()
+
+# 历史记录：每次运行结束后把各账号当天的结果、耗时和各阶段耗时写入本地 SQLite，供预检查、调度和统计查询使用
+HISTORY_ENABLED = os.getenv('JLC_HISTORY', '1').lower() not in ('0', 'false', 'no')
+HISTORY_KEEP_DAYS = int(os.getenv('JLC_HISTORY_DAYS', '90'))
+
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    day TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    accounts INTEGER NOT NULL,
+    shard TEXT
+);
+CREATE TABLE IF NOT EXISTS account_days (
+    account TEXT NOT NULL,
+    day TEXT NOT NULL,
+    nickname TEXT,
+    oshwhub_success INTEGER NOT NULL,
+    oshwhub_status TEXT,
+    points_reward INTEGER,
+    final_points INTEGER,
+    reward_results TEXT,
+    jindou_success INTEGER NOT NULL,
+    jindou_status TEXT,
+    jindou_reward INTEGER,
+    final_jindou INTEGER,
+    password_error INTEGER NOT NULL,
+    runs INTEGER NOT NULL DEFAULT 1,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (account, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS account_days_status ON account_days (day, oshwhub_success, jindou_success);
+CREATE TABLE IF NOT EXISTS account_runs (
+    run_id INTEGER NOT NULL,
+    account TEXT NOT NULL,
+    day TEXT NOT NULL,
+    runtime REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    success INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS account_runs_runtime ON account_runs (account, day, runtime);
+CREATE TABLE IF NOT EXISTS phase_samples (
+    run_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    failed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS phase_samples_day ON phase_samples (day, phase, failed, seconds);
+"""
+
+# 同一天多次运行时，已成功平台的状态和奖励保留第一次成功时的记录；第一次没有领到礼包时以后领到的礼包结果补写进来
+HISTORY_UPSERT = """
+INSERT INTO account_days (account, day, nickname, oshwhub_success, oshwhub_status, points_reward, final_points,
+    reward_results, jindou_success, jindou_status, jindou_reward, final_jindou, password_error, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (account, day) DO UPDATE SET
+    nickname = CASE WHEN excluded.nickname != '未知' THEN excluded.nickname ELSE nickname END,
+    oshwhub_status = CASE WHEN oshwhub_success THEN oshwhub_status ELSE excluded.oshwhub_status END,
+    points_reward = CASE WHEN oshwhub_success THEN points_reward ELSE excluded.points_reward END,
+    final_points = CASE WHEN oshwhub_success THEN final_points ELSE excluded.final_points END,
+    reward_results = CASE WHEN oshwhub_success AND reward_results != '[]' THEN reward_results ELSE excluded.reward_results END,
+    oshwhub_success = MAX(oshwhub_success, excluded.oshwhub_success),
+    jindou_status = CASE WHEN jindou_success THEN jindou_status ELSE excluded.jindou_status END,
+    jindou_reward = CASE WHEN jindou_success THEN jindou_reward ELSE excluded.jindou_reward END,
+    final_jindou = CASE WHEN jindou_success THEN final_jindou ELSE excluded.final_jindou END,
+    jindou_success = MAX(jindou_success, excluded.jindou_success),
+    password_error = excluded.password_error,
+    runs = runs + 1,
+    updated_at = excluded.updated_at
+"""
+
+class HistoryStore:
+    """按 (账号标识, 日期) 保存每天的签到结果，另存每次运行各账号的耗时和各阶段耗时。只保存账号的哈希"""
+    
+    def __init__(self, path=None):
+        self.path = path or os.getenv('JLC_HISTORY_DB') or os.path.join(STATE_DIR, 'history.sqlite3')
+        self.enabled = HISTORY_ENABLED
+        self._conn = None
+        self._lock = threading.Lock()
+    
+    def _connect(self):
+        """首次使用时导入 sqlite3 并打开数据库，失败时关闭历史记录功能，不影响签到"""
+        if self._conn is None and self.enabled:
+            import sqlite3
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), mode=0o700, exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+                conn.executescript(HISTORY_SCHEMA)
+                self._conn = conn
+            except sqlite3.Error as e:
+                log(f"⚠ 打开历史记录失败，本次不使用历史记录: {e}")
+                self.enabled = False
+        return self._conn
+    
+    def _query(self, sql, params=()):
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return []
+            import sqlite3
+            try:
+                return conn.execute(sql, params).fetchall()
+            except sqlite3.Error as e:
+                log(f"⚠ 查询历史记录失败: {e}")
+                return []
+    
+    def day_results(self, accounts, day=None):
+        """accounts 中今天已有记录的账号，返回 {账号标识: AccountResult}（包含各平台是否已成功）"""
+        if not accounts:
+            return {}
+        rows = self._query(
+            f"SELECT account, nickname, oshwhub_success, oshwhub_status, points_reward, final_points, reward_results, "
+            f"jindou_success, jindou_status, jindou_reward, final_jindou FROM account_days "
+            f"WHERE day = ? AND account IN ({','.join('?' * len(accounts))})",
+            (day or datetime.now().strftime('%Y-%m-%d'), *accounts),
+        )
+        recorded = {}
+        for (account, nickname, oshwhub_success, oshwhub_status, points_reward, final_points, reward_results,
+             jindou_success, jindou_status, jindou_reward, final_jindou) in rows:
+            result = AccountResult(0)
+            result.account = account
+            result.nickname = nickname or '未知'
+            result.oshwhub_success, result.jindou_success = bool(oshwhub_success), bool(jindou_success)
+            result.oshwhub_status, result.jindou_status = oshwhub_status, jindou_status
+            result.points_reward, result.jindou_reward = points_reward or 0, jindou_reward or 0
+            result.final_points, result.final_jindou = final_points or 0, final_jindou or 0
+            result.initial_points = result.final_points - result.points_reward
+            result.initial_jindou = result.final_jindou - result.jindou_reward
+            result.reward_results = tuple(json.loads(reward_results or '[]'))
+            recorded[account] = result
+        return recorded
+    
+    def pending_accounts(self, day=None):
+        """今天有记录但还没有全部签到成功的账号"""
+        rows = self._query(
+            "SELECT account FROM account_days WHERE day = ? AND (oshwhub_success = 0 OR jindou_success = 0)",
+            (day or datetime.now().strftime('%Y-%m-%d'),),
+        )
+        return [row[0] for row in rows]
+    
+    def median_runtimes(self, accounts=None, days=30):
+        """最近 days 天每个账号单次运行耗时的中位数（秒），accounts 为空时返回所有账号"""
+        since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        account_filter = f"AND account IN ({','.join('?' * len(accounts))})" if accounts else ""
+        rows = self._query(
+            f"""WITH ranked AS (
+                    SELECT account, runtime,
+                           ROW_NUMBER() OVER (PARTITION BY account ORDER BY runtime) AS rn,
+                           COUNT(*) OVER (PARTITION BY account) AS n
+                    FROM account_runs WHERE day >= ? AND runtime > 0 {account_filter})
+                SELECT account, AVG(runtime) FROM ranked WHERE rn IN ((n + 1) / 2, (n + 2) / 2) GROUP BY account""",
+            (since, *(accounts or ())),
+        )
+        return dict(rows)
+    
+    def phase_failure_rates(self, days=30):
+        """最近 days 天各阶段的执行次数、失败次数（账号尝试在该阶段结束且失败）、失败率和平均耗时"""
+        since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        return self._query(
+            "SELECT phase, COUNT(*), SUM(failed), AVG(failed), AVG(seconds) FROM phase_samples "
+            "WHERE day >= ? GROUP BY phase ORDER BY AVG(failed) DESC, COUNT(*) DESC",
+            (since,),
+        )
+    
+    @staticmethod
+    def _phase_rows(spans):
+        """把追踪到的阶段转成 (阶段, 耗时, 是否失败)：失败的账号尝试中最后开始的阶段记为失败阶段"""
+        by_account = {}
+        for span in spans:
+            if span.account is not None and span.name != 'account':
+                by_account.setdefault(span.account, []).append(span)
+        failed = set()
+        for attempt in spans:
+            if attempt.name != 'account' or attempt.failure is None:
+                continue
+            inner = [span for span in by_account.get(attempt.account, ()) if attempt.start <= span.start <= attempt.end]
+            if inner:
+                failed.add(id(max(inner, key=lambda span: span.start)))
+        return [(span.name, span.duration, int(id(span) in failed)) for spans_ in by_account.values() for span in spans_]
+    
+    def record_run(self, results, started_at, spans=(), shard=None):
+        """写入一次运行的所有账号结果、耗时和阶段耗时，并清理过期记录"""
+        day = datetime.now().strftime('%Y-%m-%d')
+        now = time.time()
+        attempts = {}
+        for span in spans:
+            if span.name == 'account':
+                attempts[span.account] = attempts.get(span.account, 0) + 1
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            import sqlite3
+            try:
+                with conn:
+                    run_id = conn.execute(
+                        "INSERT INTO runs (day, started_at, finished_at, accounts, shard) VALUES (?, ?, ?, ?, ?)",
+                        (day, started_at, now, len(results), f"{shard[0]}/{shard[1]}" if shard else None),
+                    ).lastrowid
+                    recorded = [result for result in results if result.account]
+                    conn.executemany(HISTORY_UPSERT, [(
+                        r.account, day, r.nickname,
+                        int(r.oshwhub_success), r.oshwhub_status, r.points_reward, r.final_points, json.dumps(list(r.reward_results), ensure_ascii=False),
+                        int(r.jindou_success), r.jindou_status, r.jindou_reward, r.final_jindou,
+                        int(r.password_error), now,
+                    ) for r in recorded])
+                    conn.executemany(
+                        "INSERT INTO account_runs (run_id, account, day, runtime, attempts, success) VALUES (?, ?, ?, ?, ?, ?)",
+                        [(run_id, r.account, day, r.elapsed, attempts.get(r.account_index, 0), int(r.oshwhub_success and r.jindou_success))
+                         for r in recorded],
+                    )
+                    conn.executemany(
+                        "INSERT INTO phase_samples (run_id, day, phase, seconds, failed) VALUES (?, ?, ?, ?, ?)",
+                        [(run_id, day, *row) for row in self._phase_rows(spans)],
+                    )
+                    cutoff = (datetime.now() - timedelta(days=HISTORY_KEEP_DAYS)).strftime('%Y-%m-%d')
+                    for table in ('runs', 'account_days', 'account_runs', 'phase_samples'):
+                        conn.execute(f"DELETE FROM {table} WHERE day < ?", (cutoff,))
+                log(f"📚 历史记录已写入: {self.path}（{len(recorded)} 个账号）")
+            except sqlite3.Error as e:
+                log(f"⚠ 写入历史记录失败: {e}")
+    
+    def log_report(self, days=30):
+        """输出历史统计：今天未完成的账号数、耗时最长的账号和各阶段失败率"""
+        pending = self.pending_accounts()
+        log(f"📚 历史记录: {self.path}")
+        log(f"  ├── 今天有记录但未全部成功的账号: {len(pending)} 个")
+        runtimes = self.median_runtimes(days=days)
+        if runtimes:
+            slowest = sorted(runtimes.items(), key=lambda item: item[1], reverse=True)[:10]
+            log(f"  ├── 近 {days} 天单次耗时中位数最长的账号（共 {len(runtimes)} 个账号有记录）:")
+            for account, runtime in slowest:
+                log(f"  │   ├── {account}: {runtime:.1f}s")
+        phases = self.phase_failure_rates(days)
+        if phases:
+            log(f"  └── 近 {days} 天各阶段失败率:")
+            log(f"      {'阶段':<28}{'次数':>6}{'失败':>6}{'失败率':>7}{'平均耗时':>8}")
+            for phase, count, failures, rate, seconds in phases:
+                log(f"      {phase:<30}{count:>8}{failures:>8}{rate * 100:>9.1f}%{seconds:>10.2f}")
+
+history = HistoryStore()
+
+def build_cookie_header(cookies):
+    """把 driver.get_cookies() 格式的 Cookie 列表拼成请求头"""
+    return "; ".join([f"{c['name']}={c['value']}" for c in cookies])
+
+# 浏览器状态快照：一次脚本调用读取 token 可能使用的 localStorage 和 sessionStorage 键，
+# 缓存到下一次跳转、刷新或切换账号为止。HttpOnly Cookie 脚本读不到，第一次需要时调用 get_cookies 并一起缓存
+TOKEN_STORAGE_KEYS = ('X-JLC-AccessToken', 'x-jlc-accesstoken', 'accessToken', 'token', 'jlc-token')
+SESSION_TOKEN_KEYS = TOKEN_STORAGE_KEYS[:2]  # sessionStorage 里的通用键名（token 等）可能属于别的组件，只认 JLC 的请求头名
+SNAPSHOT_SCRIPT = """
+const keys = arguments[0], local = {}, session = {};
+for (const key of keys) {
+  const value = localStorage.getItem(key);
+  if (value !== null) local[key] = value;
+  const sessionValue = sessionStorage.getItem(key);
+  if (sessionValue !== null) session[key] = sessionValue;
+}
+return {url: location.href, local: local, session: session};
+"""
+
+class BrowserSnapshot:
+    __slots__ = ('driver', 'url', 'local_storage', 'session_storage', '_cookies')
+    
+    def __init__(self, driver):
+        data = driver.execute_script(SNAPSHOT_SCRIPT, list(TOKEN_STORAGE_KEYS))
+        self.driver = driver
+        self.url = data['url']
+        self.local_storage = data['local']
+        self.session_storage = data['session']
+        self._cookies = None
+    
+    @property
+    def token(self):
+        """按 TOKEN_STORAGE_KEYS 顺序找到的第一个 token，返回 (存储名, 键名, token)，没有时返回 None"""
+        for storage_name, storage, keys in (('localStorage', self.local_storage, TOKEN_STORAGE_KEYS),
+                                            ('sessionStorage', self.session_storage, SESSION_TOKEN_KEYS)):
+            for key in keys:
+                if storage.get(key):
+                    return storage_name, key, storage[key]
+        return None
+    
+    def cookies(self):
+        """当前页面可见的全部 Cookie（含 HttpOnly）"""
+        if self._cookies is None:
+            self._cookies = self.driver.get_cookies()
+        return self._cookies
+    
+    def cookie_header(self):
+        return build_cookie_header(self.cookies())
+
+# 每个 worker 线程只操作自己的浏览器，快照放在线程本地
+_snapshot_local = threading.local()
+
+def browser_snapshot(driver, refresh=False):
+    """返回当前页面的状态快照，同一页面内只读取一次；refresh=True 时重新读取（等待页面写入数据时使用）"""
+    snapshot = getattr(_snapshot_local, 'snapshot', None)
+    if refresh or snapshot is None or snapshot.driver is not driver:
+        snapshot = _snapshot_local.snapshot = BrowserSnapshot(driver)
+    return snapshot
+
+def invalidate_browser_snapshot():
+    """页面即将变化（跳转、刷新、点击后换页、切换账号）时丢弃快照"""
+    _snapshot_local.snapshot = None
+
 @with_retry
 def extract_token_from_local_storage(driver):
-    """从 localStorage 提取 X-JLC-AccessToken"""
+    """从页面状态快照中提取 X-JLC-AccessToken（依次尝试几个常见键名），快照中没有时重新读取一次"""
     try:
-        token = driver.execute_script("return window.localStorage.getItem('X-JLC-AccessToken');")
-        if token:
-            log(f"✅ 成功从 localStorage 提取 token: {token[:30]}...")
+        found = browser_snapshot(driver).token or browser_snapshot(driver, refresh=True).token
+        if found:
+            storage_name, key, token = found
+            if storage_name == 'localStorage' and key == TOKEN_STORAGE_KEYS[0]:
+                log(f"✅ 成功从 localStorage 提取 token: {token[:30]}...")
+            else:
+                log(f"✅ 从 {storage_name} 的 {key} 提取到 token: {token[:30]}...")
             return token
-        else:
-            alternative_keys = [
-                "x-jlc-accesstoken",
-                "accessToken", 
-                "token",
-                "jlc-token"
-            ]
-            for key in alternative_keys:
-                token = driver.execute_script(f"return window.localStorage.getItem('{key}');")
-                if token:
-                    log(f"✅ 从 localStorage 的 {key} 提取到 token: {token[:30]}...")
-                    return token
     except Exception as e:
         log(f"❌ 从 localStorage 提取 token 失败: {e}")
     
     return None
 
-@with_retry
-def extract_secretkey_from_devtools(driver):
-    """使用 DevTools 从网络请求中提取 secretkey"""
-    secretkey = None
-    
-    try:
-        logs = driver.get_log('performance')
+SECRETKEY_HEADER_NAMES = ('secretkey', 'SecretKey', 'secretKey', 'SECRETKEY')
+
+def _secretkey_from_log_message(raw_message):
+    """解析一条性能日志，命中 m.jlc.com 且带 secretkey 请求头时返回 (secretkey, 来源)"""
+    # 先做字符串预筛，绝大多数日志不需要 json 解析
+    if M_JLC_HOST not in raw_message or not any(name in raw_message for name in SECRETKEY_HEADER_NAMES):
+        return None
+    message = json.loads(raw_message).get('message', {})
+    method = message.get('method', '')
+    params = message.get('params', {})
+    if method == 'Network.requestWillBeSent':
+        request = params.get('request', {})
+        url, headers, source = request.get('url', ''), request.get('headers', {}), '请求'
+    elif method == 'Network.responseReceived':
+        response = params.get('response', {})
+        url, headers, source = response.get('url', ''), response.get('requestHeaders', {}), '响应'
+    else:
+        return None
+    if M_JLC_HOST not in url:
+        return None
+    for name in SECRETKEY_HEADER_NAMES:
+        if headers.get(name):
+            return headers[name], source
+    return None
+
+def extract_secretkey_from_devtools(driver, timeout=10, poll_interval=0.3):
+    """从 DevTools 网络日志中流式查找第一个携带 secretkey 的 m.jlc.com 请求，找到立即返回。
+    get_log 每次只返回上次读取之后的新事件，因此轮询不会重复解析"""
+    deadline = time.time() + timeout
+    while True:
+        try:
+            for entry in driver.get_log('performance'):
+                try:
+                    found = _secretkey_from_log_message(entry['message'])
+                except Exception:
+                    continue
+                if found:
+                    secretkey, source = found
+                    log(f"✅ 从{source}中提取到 secretkey: {secretkey[:20]}...")
+                    return secretkey
+        except Exception as e:
+            log(f"❌ DevTools 提取 secretkey 出错: {e}")
+            return None
         
-        for entry in logs:
-            try:
-                message = json.loads(entry['message'])
-                message_type = message.get('message', {}).get('method', '')
-                
-                if message_type == 'Network.requestWillBeSent':
-                    request = message.get('message', {}).get('params', {}).get('request', {})
-                    url = request.get('url', '')
-                    
-                    if 'm.jlc.com' in url:
-                        headers = request.get('headers', {})
-                        secretkey = (
-                            headers.get('secretkey') or 
-                            headers.get('SecretKey') or
-                            headers.get('secretKey') or
-                            headers.get('SECRETKEY')
-                        )
-                        
-                        if secretkey:
-                            log(f"✅ 从请求中提取到 secretkey: {secretkey[:20]}...")
-                            return secretkey
-                
-                elif message_type == 'Network.responseReceived':
-                    response = message.get('message', {}).get('params', {}).get('response', {})
-                    url = response.get('url', '')
-                    
-                    if 'm.jlc.com' in url:
-                        headers = response.get('requestHeaders', {})
-                        secretkey = (
-                            headers.get('secretkey') or 
-                            headers.get('SecretKey') or
-                            headers.get('secretKey') or
-                            headers.get('SECRETKEY')
-                        )
-                        
-                        if secretkey:
-                            log(f"✅ 从响应中提取到 secretkey: {secretkey[:20]}...")
-                            return secretkey
-                            
-            except:
-                continue
-                
-    except Exception as e:
-        log(f"❌ DevTools 提取 secretkey 出错: {e}")
-    
-    return secretkey
+        if time.time() >= deadline:
+            return None
+        pause(poll_interval)
+
+OSHWHUB_HEADERS = {
+    'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'accept': 'application/json, text/plain, */*',
+}
+
+def fetch_oshwhub_user(cookie_str):
+    """用 Cookie 调用开源平台用户信息接口，成功返回 result 字典，Cookie 无效或请求失败返回 None"""
+    headers = dict(OSHWHUB_HEADERS, cookie=cookie_str)
+    response = http_pool.get(f"{OSHWHUB_URL}/api/users", headers=headers)
+    if response.status_code == 200:
+        data = response.json()
+        if data and data.get('success'):
+            return data.get('result') or {}
+    return None
 
 def get_oshwhub_points(driver, account_index):
     """获取开源平台积分数量"""
     max_retries = 5
     for attempt in range(max_retries):
         try:
-            # 获取当前页面的Cookie
-            cookies = driver.get_cookies()
-            cookie_str = "; ".join([f"{c['name']}={c['value']}" for c in cookies])
-            
-            headers = {
-                'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'accept': 'application/json, text/plain, */*',
-                'cookie': cookie_str
-            }
-            
-            # 调用用户信息API获取积分
-            response = requests.get("https://oshwhub.com/api/users", headers=headers, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                if data and data.get('success'):
-                    points = data.get('result', {}).get('points', 0)
-                    return points
+            # 获取当前页面的Cookie，调用用户信息API获取积分
+            user = fetch_oshwhub_user(browser_snapshot(driver).cookie_header())
+            if user is not None:
+                return user.get('points', 0)
         except Exception:
             pass  # 静默重试
         
         # 重试前刷新页面
         if attempt < max_retries - 1:
+            tracer.note_retry()
             try:
-                driver.refresh()
+                refresh_page(driver)
                 WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                time.sleep(1 + random.uniform(0, 1))
             except:
                 pass
     
@@ -173,14 +1433,14 @@ class JLCClient:
     """调用嘉立创接口"""
     
     def __init__(self, access_token, secretkey, account_index, driver):
-        self.base_url = "https://m.jlc.com"
+        self.base_url = M_JLC_URL
         self.headers = {
             'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'x-jlc-clienttype': 'WEB',
             'accept': 'application/json, text/plain, */*',
             'x-jlc-accesstoken': access_token,
             'secretkey': secretkey,
-            'Referer': 'https://m.jlc.com/mapp/pages/my/index',
+            'Referer': f'{M_JLC_URL}/mapp/pages/my/index',
         }
         self.account_index = account_index
         self.driver = driver
@@ -193,20 +1453,21 @@ class JLCClient:
         
     def send_request(self, url, method='GET'):
         """发送 API 请求"""
-        try:
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=self.headers, timeout=10)
-            else:
-                response = requests.post(url, headers=self.headers, timeout=10)
+        with tracer.span(f"jindou.api.{api_name(url)}", self.account_index):
+            try:
+                if method.upper() == 'GET':
+                    response = http_pool.get(url, headers=self.headers)
+                else:
+                    response = http_pool.post(url, headers=self.headers)
             
-            if response.status_code == 200:
-                return response.json()
-            else:
-                log(f"账号 {self.account_index} - ❌ 请求失败，状态码: {response.status_code}")
+                if response.status_code == 200:
+                    return response.json()
+                else:
+                    log(f"账号 {self.account_index} - ❌ 请求失败，状态码: {response.status_code}")
+                    return None
+            except Exception as e:
+                log(f"账号 {self.account_index} - ❌ 请求异常 ({url}): {e}")
                 return None
-        except Exception as e:
-            log(f"账号 {self.account_index} - ❌ 请求异常 ({url}): {e}")
-            return None
     
     def get_user_info(self):
         """获取用户信息"""
@@ -233,13 +1494,15 @@ class JLCClient:
                 jindou_count = data.get('data', {}).get('integralVoucher', 0)
                 return jindou_count
             
-            # 重试前刷新页面，重新提取 token 和 secretkey
             if attempt < max_retries - 1:
+                tracer.note_retry()
+            # 使用缓存凭据时没有浏览器，直接重试（请求间隔由 rate_limiter 控制）；有浏览器时先刷新页面，重新提取 token 和 secretkey
+            if attempt < max_retries - 1 and self.driver is not None:
                 try:
-                    self.driver.get("https://m.jlc.com/")
-                    self.driver.refresh()
+                    navigate(self.driver, f"{M_JLC_URL}/")
+                    refresh_page(self.driver)
                     WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                    time.sleep(1 + random.uniform(0, 1))
+                    wait_for(self.driver, local_storage_has_token, 10, 1.5, "金豆重试: 等待 token 写入")
                     navigate_and_interact_m_jlc(self.driver, self.account_index)
                     access_token = extract_token_from_local_storage(self.driver)
                     secretkey = extract_secretkey_from_devtools(self.driver)
@@ -343,15 +1606,15 @@ class JLCClient:
         if not self.get_user_info():
             return False
         
-        time.sleep(random.randint(1, 2))
+        # 接口按顺序调用，上一个请求返回即可继续，不再随机停顿
+        wait_ledger.record("金豆接口间隔", 1.5, 0)
         
         # 2. 获取签到前金豆数量
         self.initial_jindou = self.get_points()
         if self.initial_jindou is None:
             self.initial_jindou = 0
         log(f"账号 {self.account_index} - 签到前金豆💰: {self.initial_jindou}")
-        
-        time.sleep(random.randint(1, 2))
+        wait_ledger.record("金豆接口间隔", 1.5, 0)
         
         # 3. 检查签到状态
         sign_status = self.check_sign_status()
@@ -362,11 +1625,11 @@ class JLCClient:
             log(f"账号 {self.account_index} - 今日已签到，跳过签到操作")
         else:  # 未签到
             # 4. 执行签到
-            time.sleep(random.randint(2, 3))
+            wait_ledger.record("金豆接口间隔", 2.5, 0)
             if not self.sign_in():
                 return False
         
-        time.sleep(random.randint(1, 2))
+        wait_ledger.record("金豆接口间隔", 1.5, 0)
         
         # 5. 获取签到后金豆数量
         self.final_jindou = self.get_points()
@@ -388,27 +1651,20 @@ def navigate_and_interact_m_jlc(driver, account_index):
         driver.execute_script("window.scrollTo(0, 300);")
         WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
         
-        nav_selectors = [
-            "//div[contains(text(), '我的')]",
-            "//div[contains(text(), '个人中心')]",
-            "//div[contains(text(), '用户中心')]",
-            "//a[contains(@href, 'user')]",
-            "//a[contains(@href, 'center')]",
-        ]
-        
-        for selector in nav_selectors:
+        match = probe_page(driver, M_JLC_NAV_PROBES, 5, 5 * len(M_JLC_NAV_PROBES), "金豆: 等待导航入口")
+        if match:
+            index, element, _ = match
+            invalidate_browser_snapshot()
             try:
-                element = WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.XPATH, selector)))
                 element.click()
-                log(f"账号 {account_index} - 点击导航元素: {selector}")
-                WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                break
-            except:
-                continue
+            except Exception:
+                driver.execute_script("arguments[0].click();", element)  # 被浮层遮挡时直接触发点击
+            log(f"账号 {account_index} - 点击导航元素: {M_JLC_NAV_PROBES[index]['xpath']}")
+            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
         
         driver.execute_script("window.scrollTo(0, 500);")
         WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-        driver.refresh()
+        refresh_page(driver)
         WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
         
     except Exception as e:
@@ -425,6 +1681,10 @@ def is_last_day_of_month():
     last_day = next_month - timedelta(days=next_month.day)
     return today.day == last_day.day
 
+def has_gift_today():
+    """今天是否有需要在页面上点击领取的礼包(周日7天好礼/月底月度好礼)"""
+    return is_sunday() or is_last_day_of_month()
+
 def capture_reward_info(driver, account_index, gift_type):
     """抓取并输出奖励信息，返回礼包领取结果"""
     try:
@@ -443,7 +1703,7 @@ def click_gift_buttons(driver, account_index):
     """根据日期条件点击7天好礼和月度好礼按钮，并抓取奖励信息，返回所有领取结果"""
     reward_results = []
     
-    if not is_sunday() and not is_last_day_of_month():
+    if not has_gift_today():
         return reward_results
 
     try:
@@ -468,9 +1728,9 @@ def click_gift_buttons(driver, account_index):
                 
                 # 如果也是月底，刷新页面
                 if last_day:
-                    driver.refresh()
+                    refresh_page(driver)
                     WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                    time.sleep(12)
+                    wait_for(driver, any_xpath_present(f'{OSHWHUB_GIFT_XPATH}[text()="月度好礼"]'), 15, 12, "礼包: 等待月度好礼按钮")
                 
             except Exception as e:
                 log(f"账号 {account_index} - ⚠ 无法点击7天好礼: {e}")
@@ -499,813 +1759,1722 @@ def click_gift_buttons(driver, account_index):
 def get_user_nickname_from_api(driver, account_index):
     """通过API获取用户昵称"""
     try:
-        # 获取当前页面的Cookie
-        cookies = driver.get_cookies()
-        cookie_str = "; ".join([f"{c['name']}={c['value']}" for c in cookies])
-        
-        headers = {
-            'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'accept': 'application/json, text/plain, */*',
-            'cookie': cookie_str
-        }
-        
-        # 调用用户信息API
-        response = requests.get("https://oshwhub.com/api/users", headers=headers, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            if data and data.get('success'):
-                nickname = data.get('result', {}).get('nickname', '')
-                if nickname:
-                    formatted_nickname = format_nickname(nickname)
-                    log(f"账号 {account_index} - 👤 昵称: {formatted_nickname}")
-                    return formatted_nickname
+        # 获取当前页面的Cookie，调用用户信息API
+        user = fetch_oshwhub_user(browser_snapshot(driver).cookie_header())
+        nickname = user.get('nickname', '') if user else ''
+        if nickname:
+            formatted_nickname = format_nickname(nickname)
+            log(f"账号 {account_index} - 👤 昵称: {formatted_nickname}")
+            return formatted_nickname
         
         log(f"账号 {account_index} - ⚠ 无法获取用户昵称")
-        return None
     except Exception as e:
         log(f"账号 {account_index} - ⚠ 获取用户昵称失败: {e}")
-        return None
+    # 登录 Cookie 可能还没写入，丢弃快照让 with_retry 的下一次尝试重新读取
+    invalidate_browser_snapshot()
+    return None
 
-def ensure_login_page(driver, account_index):
-    """确保进入登录页面，如果未检测到登录页面则重启浏览器"""
-    max_restarts = 5
-    restarts = 0
-    
-    while restarts < max_restarts:
+def log_points_change(account_index, result):
+    """输出开源平台积分变化"""
+    if result.points_reward > 0:
+        log(f"账号 {account_index} - 🎉 总积分增加: {result.initial_points} → {result.final_points} (+{result.points_reward})")
+    elif result.points_reward == 0:
+        log(f"账号 {account_index} - ⚠ 总积分无变化，可能今天已签到过: {result.initial_points} → {result.final_points} (0)")
+    else:
+        log(f"账号 {account_index} - ❗ 积分减少: {result.initial_points} → {result.final_points} ({result.points_reward})")
+
+def load_oshwhub_profile(cookie_str, account_index, result):
+    """通过用户信息接口查询昵称和签到前积分，结果写入 result，Cookie 无效返回 False。
+    签到本身只在签到页面完成"""
+    try:
+        user = fetch_oshwhub_user(cookie_str)
+    except Exception:
+        user = None
+    if user is None:
+        return False
+    nickname = user.get('nickname', '')
+    if nickname:
+        result.nickname = format_nickname(nickname)
+        log(f"账号 {account_index} - 👤 昵称: {result.nickname}")
+    result.initial_points = result.final_points = user.get('points', 0)
+    log(f"账号 {account_index} - 签到前积分💰: {result.initial_points}")
+    return True
+
+# 开源平台的签到接口没有公开文档：在签到页点击"立即签到"前注入脚本，记录页面通过 fetch / XMLHttpRequest 发往本站的非 GET 请求，
+# 页面签到成功后把其中的签到请求（方法、路径、请求体、自定义请求头）保存到凭据缓存，之后带 Cookie 直接重放，以积分增加确认结果
+OSHWHUB_CAPTURE_SCRIPT = """
+if (!window.__jlcCapture) {
+    window.__jlcCapture = true;
+    window.__jlcRequests = [];
+    var record = function (method, url, body, headers) {
+        try {
+            method = String(method || 'GET').toUpperCase();
+            var target = new URL(String(url), location.href);
+            if (method === 'GET' || target.host !== location.host || window.__jlcRequests.length >= 20) return;
+            if (body instanceof URLSearchParams) body = body.toString();
+            if (body !== undefined && body !== null && typeof body !== 'string') return;  // FormData、Blob 等无法重放
+            window.__jlcRequests.push({method: method, path: target.pathname + target.search, body: body || null, headers: headers || {}});
+        } catch (e) {}
+    };
+    var headerObject = function (source) {
+        var headers = {};
+        try { new Headers(source || {}).forEach(function (value, name) { headers[name] = value; }); } catch (e) {}
+        return headers;
+    };
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function (input, init) {
+            var isRequest = typeof Request !== 'undefined' && input instanceof Request;
+            record((init && init.method) || (isRequest ? input.method : 'GET'), isRequest ? input.url : input,
+                   init ? init.body : undefined, headerObject((init && init.headers) || (isRequest ? input.headers : null)));
+            return originalFetch.apply(this, arguments);
+        };
+    }
+    var proto = XMLHttpRequest.prototype, open = proto.open, send = proto.send, setHeader = proto.setRequestHeader;
+    proto.open = function (method, url) { this.__jlc = {method: method, url: url, headers: {}}; return open.apply(this, arguments); };
+    proto.setRequestHeader = function (name, value) {
+        if (this.__jlc) this.__jlc.headers[String(name).toLowerCase()] = value;
+        return setHeader.apply(this, arguments);
+    };
+    proto.send = function (body) {
+        if (this.__jlc) record(this.__jlc.method, this.__jlc.url, body, this.__jlc.headers);
+        return send.apply(this, arguments);
+    };
+}
+"""
+# 取出并清空已记录的请求，页面刷新前调用，避免记录随页面丢失
+COLLECT_CAPTURED_SCRIPT = "var captured = window.__jlcRequests || []; window.__jlcRequests = []; return captured;"
+
+def install_request_capture(driver):
+    try:
+        driver.execute_script(OSHWHUB_CAPTURE_SCRIPT)
+    except Exception:
+        pass
+
+def collect_captured_requests(driver):
+    try:
+        return [r for r in driver.execute_script(COLLECT_CAPTURED_SCRIPT) or [] if isinstance(r, dict) and r.get('path')]
+    except Exception:
+        return []
+
+def pick_oshwhub_sign_request(captured):
+    """从点击"立即签到"期间记录的请求中选出签到请求：优先路径含 sign 的，否则取第一个"""
+    for request in captured:
+        if 'sign' in request['path'].lower():
+            return request
+    return captured[0] if captured else None
+
+def sign_oshwhub_via_api(cookie_str, sign_request, account_index, result):
+    """带 Cookie 重放签到页记录的签到请求，再查询积分：积分比 result.initial_points 增加才算签到成功并写入 result。
+    返回 False 表示无法确认（请求已失效、今天已签到过等），需要回到签到页面处理"""
+    headers = dict(OSHWHUB_HEADERS, **(sign_request.get('headers') or {}))
+    headers.update({'cookie': cookie_str, 'origin': OSHWHUB_URL, 'referer': f"{OSHWHUB_URL}/sign_in"})
+    body = sign_request.get('body')
+    try:
+        response = http_pool.request(sign_request['method'], f"{OSHWHUB_URL}{sign_request['path']}",
+                                     headers=headers, data=body.encode('utf-8') if body else None)
+        user = fetch_oshwhub_user(cookie_str) if response.status_code < 400 else None
+    except Exception as e:
+        log(f"账号 {account_index} - ⚠ 开源平台接口签到出错: {e}")
+        return False
+    points = user.get('points', 0) if user is not None else None
+    if points is None or points <= result.initial_points:
+        log(f"账号 {account_index} - ⚠ 开源平台接口签到未能确认（积分没有增加），改为在签到页面签到")
+        return False
+    result.final_points = points
+    result.points_reward = points - result.initial_points
+    result.oshwhub_success = True
+    result.oshwhub_status = '签到成功'
+    log(f"账号 {account_index} - ✅ 开源平台签到成功（接口）")
+    log(f"账号 {account_index} - 签到后积分💰: {result.final_points}")
+    return True
+
+def oshwhub_api_usable(credentials, claim_gifts):
+    """有 oshwhub Cookie 和已记录的签到请求时可以不打开签到页签到；礼包只能在页面领取，要领礼包的日子仍走页面"""
+    return bool(credentials and credentials.get('cookies') and credentials.get('oshwhub_sign')
+                and not (claim_gifts and has_gift_today()))
+
+def open_background_tab(driver, url):
+    """新开一个标签页加载 url（带请求拦截规则），不等待加载完成，返回新标签页句柄；当前标签页保持不变"""
+    current = driver.current_window_handle
+    existing = set(driver.window_handles)
+    driver.execute_script("window.open('about:blank', '_blank');")
+    handle = next(h for h in driver.window_handles if h not in existing)
+    switch_to_tab(driver, handle)
+    # setBlockedURLs 只对当前标签页生效，新标签页需要单独设置
+    if BLOCKED_URL_PATTERNS:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+    rate_limiter.acquire(url)
+    driver.execute_script("location.href = arguments[0];", url)
+    switch_to_tab(driver, current)
+    return handle
+
+def switch_to_tab(driver, handle):
+    invalidate_browser_snapshot()
+    driver.switch_to.window(handle)
+
+def close_tab(driver, handle, back_to):
+    """关闭标签页并回到 back_to，失败时忽略（切换账号前会统一关闭多余窗口）"""
+    try:
+        if driver.current_window_handle != handle:
+            switch_to_tab(driver, handle)
+        driver.close()
+        switch_to_tab(driver, back_to)
+    except Exception:
+        pass
+
+def run_jindou_process(username, password, access_token, secretkey, account_index, result, log_tag):
+    """在后台线程通过 HTTP 完成金豆签到（不使用浏览器），与浏览器中的开源平台签到同时进行，只写 result 的金豆字段"""
+    set_log_tag(log_tag)
+    try:
+        jlc_client = JLCClient(access_token, secretkey, account_index, None)
+        with tracer.span("jindou.process", account_index):
+            jindou_success = jlc_client.execute_full_process()
+        
+        # 记录金豆签到结果
+        result.jindou_success = jindou_success
+        result.jindou_status = jlc_client.sign_status
+        result.initial_jindou = jlc_client.initial_jindou
+        result.final_jindou = jlc_client.final_jindou
+        result.jindou_reward = jlc_client.jindou_reward
+        result.has_jindou_reward = jlc_client.has_reward
+        
+        if jindou_success:
+            log(f"账号 {account_index} - ✅ 金豆签到流程完成")
+            save_cached_credentials(
+                username, password,
+                token=jlc_client.headers['x-jlc-accesstoken'],
+                secretkey=jlc_client.headers['secretkey'],
+            )
+        else:
+            log(f"账号 {account_index} - ❌ 金豆签到流程失败")
+    except Exception as e:
+        log(f"账号 {account_index} - ❌ 金豆签到出错: {e}")
+        result.jindou_status = '执行异常'
+    finally:
+        set_log_tag('')
+
+def sign_oshwhub_in_browser(driver, username, password, account_index, result, wait, claim_gifts):
+    """在当前标签页（开源平台签到页）查询昵称和积分并签到，结果写入 result。
+    有已记录的签到请求时先通过接口签到，无法确认时再在页面上点击签到"""
+    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+    page_stats.measure(driver)
+    cookie_str = browser_snapshot(driver).cookie_header()
+    if load_oshwhub_profile(cookie_str, account_index, result):
+        # 接口调用成功说明 oshwhub Cookie 有效，写入凭据缓存
+        save_cached_credentials(username, password, cookies=browser_snapshot(driver).cookies(), nickname=result.nickname)
+        credentials = load_cached_credentials(username, password)
+        if oshwhub_api_usable(credentials, claim_gifts):
+            if sign_oshwhub_via_api(cookie_str, credentials['oshwhub_sign'], account_index, result):
+                log_points_change(account_index, result)
+                return
+            invalidate_cached_credentials(username, password, 'oshwhub_sign')
+    else:
+        result.nickname = get_user_nickname_from_api(driver, account_index) or '未知'
+        result.initial_points = get_oshwhub_points(driver, account_index) or 0
+        log(f"账号 {account_index} - 签到前积分💰: {result.initial_points}")
+    if has_gift_today() and not claim_gifts:
+        log(f"账号 {account_index} - ⚠ 今天有礼包，本次只签到不领取礼包")
+    sign_request = sign_oshwhub_via_page(driver, account_index, result, wait, claim_gifts)
+    if sign_request:
+        save_cached_credentials(username, password, oshwhub_sign=sign_request)
+    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+    result.final_points = get_oshwhub_points(driver, account_index) or 0
+    result.points_reward = result.final_points - result.initial_points
+    log(f"账号 {account_index} - 签到后积分💰: {result.final_points}")
+    log_points_change(account_index, result)
+
+def sign_oshwhub_via_page(driver, account_index, result, wait, claim_gifts=True):
+    """在签到页面点击"立即签到"并刷新校验，结果写入 result；claim_gifts 为 False 时不点击礼包按钮。
+    本次点击签到成功时返回页面发出的签到请求，否则返回 None"""
+    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+    sign_request = None
+
+    try:
+        refresh_page(driver)
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+    except:
+        pass
+    # 等待签到按钮渲染出来（"已签到"或"立即签到"）
+    wait_for(driver, any_xpath_present(*OSHWHUB_SIGN_STATE_XPATHS), 10, 6, "开源平台: 等待签到按钮")
+    # 执行开源平台签到
+    try:
+        # 先检查是否已经签到
         try:
-            driver.get("https://oshwhub.com/sign_in")
-            log(f"账号 {account_index} - 已打开 JLC 签到页")
+            signed_element = driver.find_element(By.XPATH, '//span[contains(text(),"已签到")]')
+            log(f"账号 {account_index} - ✅ 今天已经在开源平台签到过了！")
+            result.oshwhub_status = '已签到过'
+            result.oshwhub_success = True
             
-            WebDriverWait(driver, 10).until(lambda d: "passport.jlc.com/login" in d.current_url)
-            current_url = driver.current_url
-
-            # 检查是否在登录页面
-            if "passport.jlc.com/login" in current_url:
-                log(f"账号 {account_index} - ✅ 检测到未登录状态")
-                return True
-            else:
-                restarts += 1
-                if restarts < max_restarts:
-                    # 静默重启浏览器
-                    driver.quit()
-                    
-                    # 重新初始化浏览器
-                    chrome_options = Options()
-                    chrome_options.add_argument("--headless=new")
-                    chrome_options.add_argument("--no-sandbox")
-                    chrome_options.add_argument("--disable-dev-shm-usage")
-                    chrome_options.add_argument("--disable-gpu")
-                    chrome_options.add_argument("--window-size=1920,1080")
-                    chrome_options.add_argument(f"--user-data-dir={tempfile.mkdtemp()}")
-                    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-                    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
-                    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-                    chrome_options.add_experimental_option('useAutomationExtension', False)
-
-                    caps = DesiredCapabilities.CHROME
-                    caps['goog:loggingPrefs'] = {'performance': 'ALL'}
-                    
-                    driver = webdriver.Chrome(options=chrome_options, desired_capabilities=caps)
-                    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-                    
-                    # 静默等待后继续循环
-                    time.sleep(2)
-                else:
-                    log(f"账号 {account_index} - ❌ 重启浏览器{max_restarts}次后仍无法进入登录页面")
-                    return False
-                    
-        except Exception as e:
-            restarts += 1
-            if restarts < max_restarts:
+            # 即使已签到，也尝试点击礼包按钮
+            if claim_gifts:
+                result.reward_results = click_gift_buttons(driver, account_index)
+            
+        except:
+            # 如果没有找到"已签到"元素，则尝试点击"立即签到"按钮，并验证是否变为"已签到"
+            signed = False
+            captured = []
+            max_attempts = 5
+            for attempt in range(max_attempts):
                 try:
-                    driver.quit()
+                    sign_btn = wait.until(
+                        EC.element_to_be_clickable((By.XPATH, '//span[contains(text(),"立即签到")]'))
+                    )
+                    install_request_capture(driver)
+                    sign_btn.click()
+                    # 等待按钮变为"已签到"，没变化再刷新页面确认状态
+                    settled = wait_for(driver, any_xpath_present(OSHWHUB_SIGN_STATE_XPATHS[0]), 5, 2, "开源平台: 等待签到生效")
+                    captured.extend(collect_captured_requests(driver))
+                    if not settled:
+                        refresh_page(driver)
+                        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+                        wait_for(driver, any_xpath_present(*OSHWHUB_SIGN_STATE_XPATHS), 10, 2, "开源平台: 刷新后等待签到状态")
+
+                    # 检查是否变为"已签到"
+                    signed_element = driver.find_element(By.XPATH, '//span[contains(text(),"已签到")]')
+                    signed = True
+                    break  # 成功，退出循环
                 except:
-                    pass
-                
-                # 重新初始化浏览器
-                chrome_options = Options()
-                chrome_options.add_argument("--headless=new")
-                chrome_options.add_argument("--no-sandbox")
-                chrome_options.add_argument("--disable-dev-shm-usage")
-                chrome_options.add_argument("--disable-gpu")
-                chrome_options.add_argument("--window-size=1920,1080")
-                chrome_options.add_argument(f"--user-data-dir={tempfile.mkdtemp()}")
-                chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-                chrome_options.add_argument("--blink-settings=imagesEnabled=false")
-                chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-                chrome_options.add_experimental_option('useAutomationExtension', False)
-
-                caps = DesiredCapabilities.CHROME
-                caps['goog:loggingPrefs'] = {'performance': 'ALL'}
+                    pass  # 静默继续下一次尝试
+
+            if signed:
+                log(f"账号 {account_index} - ✅ 开源平台签到成功！")
+                result.oshwhub_status = '签到成功'
+                result.oshwhub_success = True
+                sign_request = pick_oshwhub_sign_request(captured)
                 
-                driver = webdriver.Chrome(options=chrome_options, desired_capabilities=caps)
-                driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+                # 等待签到完成
+                WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
                 
-                time.sleep(2)
+                # 6. 签到完成后点击7天好礼和月度好礼
+                if claim_gifts:
+                    result.reward_results = click_gift_buttons(driver, account_index)
             else:
-                log(f"账号 {account_index} - ❌ 重启浏览器{max_restarts}次后仍出现异常: {e}")
-                return False
-    
-    return False
-
-def check_password_error(driver, account_index):
-    """检查页面是否显示密码错误提示"""
-    try:
-        # 等待可能出现的错误提示元素
-        error_selectors = [
-            "//*[contains(text(), '账号或密码不正确')]",
-            "//*[contains(text(), '用户名或密码错误')]",
-            "//*[contains(text(), '密码错误')]",
-            "//*[contains(text(), '登录失败')]",
-            "//*[contains(@class, 'error')]",
-            "//*[contains(@class, 'err-msg')]",
-            "//*[contains(@class, 'toast')]",
-            "//*[contains(@class, 'message')]"
-        ]
-        
-        for selector in error_selectors:
-            try:
-                # 使用短暂的等待来检查错误提示
-                error_element = WebDriverWait(driver, 2).until(
-                    EC.presence_of_element_located((By.XPATH, selector))
-                )
-                if error_element.is_displayed():
-                    error_text = error_element.text.strip()
-                    if any(keyword in error_text for keyword in ['账号或密码不正确', '用户名或密码错误', '密码错误', '登录失败']):
-                        log(f"账号 {account_index} - ❌ 检测到账号或密码错误，跳过此账号")
-                        return True
-            except:
-                continue
+                log(f"账号 {account_index} - ❌ 开源平台签到失败")
+                result.oshwhub_status = '签到失败'
                 
-        return False
     except Exception as e:
-        log(f"账号 {account_index} - ⚠ 检查密码错误时出现异常: {e}")
-        return False
+        log(f"账号 {account_index} - ❌ 开源平台签到异常: {e}")
+        result.oshwhub_status = '签到异常'
+    return sign_request
 
-def sign_in_account(username, password, account_index, total_accounts, retry_count=0, is_final_retry=False):
-    """为单个账号执行完整的签到流程（包含重试机制）"""
-    retry_label = ""
-    if retry_count > 0:
-        retry_label = f" (重试{retry_count})"
-    if is_final_retry:
-        retry_label = " (最终重试)"
-    
-    log(f"开始处理账号 {account_index}/{total_accounts}{retry_label}")
-    
+# 请求拦截：通过 DevTools 的 Network.setBlockedURLs 阻止与签到无关的资源，规则中的 * 匹配任意字符
+BLOCK_REQUESTS = os.getenv('JLC_BLOCK_REQUESTS', '1').lower() not in ('0', 'false', 'no')
+BLOCKED_TYPES = os.getenv('JLC_BLOCK_TYPES', 'image,font,media')
+# setBlockedURLs 只能按 URL 匹配，资源类型按扩展名换算成规则。规则没有例外，只对这些主机生成，
+# 滑块验证所在的 alicdn 等第三方主机上的图片和字体不受影响
+BLOCKED_TYPE_HOSTS = os.getenv('JLC_BLOCK_TYPE_HOSTS') or ','.join((PASSPORT_HOST, OSHWHUB_HOST, M_JLC_HOST))
+RESOURCE_TYPE_EXTENSIONS = {
+    'image': ('png', 'jpg', 'jpeg', 'gif', 'webp', 'svg', 'ico', 'bmp'),
+    'font': ('woff', 'woff2', 'ttf', 'otf', 'eot'),
+    'media': ('mp4', 'webm', 'mp3', 'ogg', 'wav', 'm3u8'),
+    'stylesheet': ('css',),
+}
+# 统计和广告脚本
+DEFAULT_BLOCKED_URLS = (
+    '*hm.baidu.com/*', '*.cnzz.com/*', '*google-analytics.com/*', '*googletagmanager.com/*',
+    '*doubleclick.net/*', '*growingio.com/*', '*sensorsdata.cn/*', '*clarity.ms/*', '*zhugeio.com/*',
+)
+# 登录页的滑块验证和风控脚本，与这些规则重叠的阻止规则不会生效
+DEFAULT_ALLOWED_URLS = ('*alicdn.com/*', '*aliyuncs.com/*', '*aliapp.org/*')
+
+def split_patterns(value):
+    return [pattern.strip() for pattern in (value or '').split(',') if pattern.strip()]
+
+def build_blocked_url_patterns():
+    """返回 (生效的阻止规则, 与允许列表重叠而被忽略的规则)。
+    一条阻止规则和任一允许规则按通配符能匹配对方时即视为重叠。资源类型规则限定在 BLOCKED_TYPE_HOSTS 中的主机"""
+    patterns = list(DEFAULT_BLOCKED_URLS) + split_patterns(os.getenv('JLC_BLOCK_URLS'))
+    for resource_type in split_patterns(BLOCKED_TYPES):
+        for extension in RESOURCE_TYPE_EXTENSIONS.get(resource_type, ()):
+            for host in split_patterns(BLOCKED_TYPE_HOSTS):
+                patterns += [f"*://{host}/*.{extension}", f"*://{host}/*.{extension}?*"]
+    allowed = list(DEFAULT_ALLOWED_URLS) + split_patterns(os.getenv('JLC_ALLOW_URLS'))
+    effective, ignored = [], []
+    for pattern in dict.fromkeys(patterns):
+        if any(fnmatch.fnmatchcase(allow, pattern) or fnmatch.fnmatchcase(pattern, allow) for allow in allowed):
+            ignored.append(pattern)
+        else:
+            effective.append(pattern)
+    return effective, ignored
+
+BLOCKED_URL_PATTERNS, IGNORED_URL_PATTERNS = build_blocked_url_patterns() if BLOCK_REQUESTS else ([], [])
+
+def create_chrome_driver():
+    """创建配置好的无头 Chrome，返回 (driver, 用户数据目录)"""
+    load_selenium()
+    profile_dir = tempfile.mkdtemp()
     chrome_options = Options()
     chrome_options.add_argument("--headless=new")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument(f"--user-data-dir={tempfile.mkdtemp()}")
+    chrome_options.add_argument(f"--user-data-dir={profile_dir}")
     chrome_options.add_argument("--disable-blink-features=AutomationControlled")
     chrome_options.add_argument("--blink-settings=imagesEnabled=false")  # 禁用图像加载
     chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
     chrome_options.add_experimental_option('useAutomationExtension', False)
+    # 性能日志只用于抓取 secretkey，只记录 Network 事件，不缓存页面和时间线事件
+    chrome_options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
 
-    caps = DesiredCapabilities.CHROME
+    caps = DesiredCapabilities.CHROME.copy()
     caps['goog:loggingPrefs'] = {'performance': 'ALL'}
     
     driver = webdriver.Chrome(options=chrome_options, desired_capabilities=caps)
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    driver.set_script_timeout(30)  # 页面探测（probe_page）在异步脚本中等待，需长于最长的探测时间
+    if BLOCKED_URL_PATTERNS:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+    return driver, profile_dir
+
+BROWSER_MAX_USES = int(os.getenv('JLC_BROWSER_MAX_USES', '10'))
+# 账号之间需要清空存储的站点
+BROWSER_RESET_ORIGINS = [
+    PASSPORT_URL,
+    OSHWHUB_URL,
+    M_JLC_URL,
+    "https://www.jlc.com",
+]
+
+class BrowserManager:
+    """管理一个可复用的 Chrome 实例：账号之间清空 Cookie 和存储后继续使用，
+    只在浏览器崩溃或使用次数达到上限时重新启动"""
     
-    wait = WebDriverWait(driver, 25)
+    def __init__(self, max_uses=BROWSER_MAX_USES):
+        self.max_uses = max(1, max_uses)
+        self.driver = None
+        self.profile_dir = None
+        self.uses = 0
+        self.launches = 0
     
-    # 记录详细结果
-    result = {
-        'account_index': account_index,
-        'nickname': '未知',
-        'oshwhub_status': '未知',
-        'oshwhub_success': False,
-        'initial_points': 0,      # 签到前积分
-        'final_points': 0,        # 签到后积分
-        'points_reward': 0,       # 本次获得积分
-        'reward_results': [],     # 礼包领取结果
-        'jindou_status': '未知',
-        'jindou_success': False,
-        'initial_jindou': 0,
-        'final_jindou': 0,
-        'jindou_reward': 0,
-        'has_jindou_reward': False,  # 金豆是否有额外奖励
-        'token_extracted': False,
-        'secretkey_extracted': False,
-        'retry_count': retry_count,
-        'is_final_retry': is_final_retry,
-        'password_error': False  #标记密码错误
-    }
+    def is_alive(self):
+        if self.driver is None:
+            return False
+        try:
+            self.driver.window_handles
+            return True
+        except Exception:
+            return False
+    
+    def launch(self):
+        invalidate_browser_snapshot()
+        self.quit()
+        self.driver, self.profile_dir = create_chrome_driver()
+        self.launches += 1
+        metrics.inc('jlc_browser_launches')
+        self.uses = 0
+        return self.driver
+    
+    def relaunch(self):
+        """浏览器异常时强制重启"""
+        return self.launch()
+    
+    def reset(self):
+        """清空 Cookie、各站点存储和多余窗口，并丢弃上一个账号遗留的性能日志"""
+        invalidate_browser_snapshot()
+        driver = self.driver
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.get("about:blank")
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        for origin in BROWSER_RESET_ORIGINS:
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+        driver.get_log('performance')
+    
+    def acquire(self):
+        """取得一个干净的浏览器供下一个账号使用"""
+        if not self.is_alive() or self.uses >= self.max_uses:
+            self.launch()
+        elif self.uses > 0:
+            try:
+                self.reset()
+            except Exception:
+                self.launch()
+        self.uses += 1
+        return self.driver
+    
+    def quit(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
 
-    try:
-        # 1. 确保进入登录页面
-        if not ensure_login_page(driver, account_index):
-            result['oshwhub_status'] = '无法进入登录页'
-            return result
+# 每个线程一个浏览器，并发模式下各 worker 互不干扰
+_browser_local = threading.local()
+_browser_managers = []
+_browser_managers_lock = threading.Lock()
 
-        current_url = driver.current_url
+def get_browser_manager():
+    """返回当前线程的浏览器管理器"""
+    manager = getattr(_browser_local, 'manager', None)
+    if manager is None:
+        manager = BrowserManager()
+        _browser_local.manager = manager
+        with _browser_managers_lock:
+            _browser_managers.append(manager)
+    return manager
 
-        # 2. 登录流程
-        log(f"账号 {account_index} - 检测到未登录状态，正在执行登录流程...")
+def shutdown_browsers():
+    """关闭所有线程的浏览器"""
+    with _browser_managers_lock:
+        managers = list(_browser_managers)
+        _browser_managers.clear()
+    for manager in managers:
+        manager.quit()
+    _browser_local.manager = None
 
+def ensure_login_page(browser, account_index):
+    """确保进入登录页面，如果未检测到登录页面则重启浏览器（重启后调用方需使用 browser.driver）。
+    只做一次重启，登录页持续打不开时交给重试调度器按站点故障统一退避"""
+    max_restarts = 2
+    restarts = 0
+    
+    while restarts < max_restarts:
+        driver = browser.driver
         try:
-            phone_btn = wait.until(
-                EC.element_to_be_clickable((By.XPATH, '//button[contains(text(),"账号登录")]'))
-            )
-            phone_btn.click()
-            log(f"账号 {account_index} - 已切换账号登录")
-            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.XPATH, '//input[@placeholder="请输入手机号码 / 客户编号 / 邮箱"]')))
+            navigate(driver, f"{OSHWHUB_URL}/sign_in")
+            log(f"账号 {account_index} - 已打开 JLC 签到页")
+            
+            WebDriverWait(driver, 10).until(lambda d: f"{PASSPORT_HOST}/login" in d.current_url)
+            current_url = driver.current_url
+
+            # 检查是否在登录页面
+            if f"{PASSPORT_HOST}/login" in current_url:
+                log(f"账号 {account_index} - ✅ 检测到未登录状态")
+                return True
+            else:
+                restarts += 1
+                if restarts < max_restarts:
+                    # 静默重启浏览器后继续循环
+                    tracer.note_retry()
+                    browser.relaunch()
+                else:
+                    log(f"账号 {account_index} - ❌ 重启浏览器{max_restarts}次后仍无法进入登录页面")
+                    return False
+                    
         except Exception as e:
-            log(f"账号 {account_index} - 账号登录按钮可能已默认选中: {e}")
+            restarts += 1
+            if restarts < max_restarts:
+                tracer.note_retry()
+                browser.relaunch()
+            else:
+                log(f"账号 {account_index} - ❌ 重启浏览器{max_restarts}次后仍出现异常: {e}")
+                return False
+    
+    return False
 
-        # 输入账号密码
-        try:
-            user_input = wait.until(
-                EC.presence_of_element_located((By.XPATH, '//input[@placeholder="请输入手机号码 / 客户编号 / 邮箱"]'))
-            )
-            user_input.clear()
-            user_input.send_keys(username)
+def check_password_error(driver, account_index, timeout=2):
+    """检查页面是否显示密码错误提示：一次探测检查所有候选元素，最多等待 timeout 秒"""
+    legacy_sleep = 2 * len(PASSWORD_ERROR_PROBES)  # 旧逻辑逐个选择器各等 2 秒
+    if probe_page(driver, PASSWORD_ERROR_PROBES, timeout, legacy_sleep, "登录: 检查密码错误提示"):
+        log(f"账号 {account_index} - ❌ 检测到账号或密码错误，跳过此账号")
+        return True
+    return False
 
-            pwd_input = wait.until(
-                EC.presence_of_element_located((By.XPATH, '//input[@type="password"]'))
-            )
-            pwd_input.clear()
-            pwd_input.send_keys(password)
-            log(f"账号 {account_index} - 已输入账号密码")
-        except Exception as e:
-            log(f"账号 {account_index} - ❌ 登录输入框未找到: {e}")
-            result['oshwhub_status'] = '登录失败'
-            return result
+# 重试时只补做失败的平台
+PLATFORM_OSHWHUB = 'oshwhub'
+PLATFORM_JINDOU = 'jindou'
+ALL_PLATFORMS = (PLATFORM_OSHWHUB, PLATFORM_JINDOU)
+PLATFORM_LABELS = {PLATFORM_OSHWHUB: '开源平台', PLATFORM_JINDOU: '金豆'}
+# Network.setCookies 接受的 Cookie 字段
+SESSION_COOKIE_FIELDS = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expires')
 
-        # 点击登录
+def snapshot_session_cookies(driver):
+    """导出浏览器中所有站点的 Cookie（含 passport 登录态），供重试时恢复会话"""
+    cookies = driver.execute_cdp_cmd('Network.getAllCookies', {}).get('cookies', [])
+    snapshot = []
+    for cookie in cookies:
+        item = {k: cookie[k] for k in SESSION_COOKIE_FIELDS if k in cookie}
+        if cookie.get('session') or item.get('expires', -1) < 0:
+            item.pop('expires', None)
+        snapshot.append(item)
+    return snapshot
+
+def restore_session(driver, cookies, account_index, platforms):
+    """把缓存的会话 Cookie 写回浏览器并确认登录态仍然有效，有效时跳过账号密码登录和滑块"""
+    try:
+        driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+        if PLATFORM_OSHWHUB in platforms:
+            navigate(driver, f"{OSHWHUB_URL}/sign_in")
+            valid = fetch_oshwhub_user(browser_snapshot(driver).cookie_header()) is not None
+        else:
+            navigate(driver, f"{M_JLC_URL}/")
+            valid = wait_for(driver, local_storage_has_token, 10, 0, "登录: 恢复会话后等待 token")
+    except Exception as e:
+        log(f"账号 {account_index} - ⚠ 恢复登录会话失败: {e}")
+        valid = False
+    if valid:
+        log(f"账号 {account_index} - 🔑 已恢复登录会话，跳过登录")
+    else:
+        log(f"账号 {account_index} - 登录会话已失效，重新登录")
         try:
-            login_btn = wait.until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "button.submit"))
-            )
-            login_btn.click()
-            log(f"账号 {account_index} - 已点击登录按钮")
-        except Exception as e:
-            log(f"账号 {account_index} - ❌ 登录按钮定位失败: {e}")
-            result['oshwhub_status'] = '登录失败'
-            return result
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        except Exception:
+            pass
+    return valid
 
-        # 立即检查密码错误提示（点击登录按钮后）
-        time.sleep(1)  # 给错误提示一点时间显示
-        if check_password_error(driver, account_index):
-            result['password_error'] = True
-            result['oshwhub_status'] = '密码错误'
-            return result
+def login_with_password(browser, username, password, account_index, result, phases):
+    """打开签到页跳转到 passport 完成账号密码和滑块登录，成功返回 True；失败时把原因写入 result"""
+    # 确保进入登录页面（期间可能重启浏览器，之后统一使用 browser.driver）
+    phases.enter("login.page")
+    if not ensure_login_page(browser, account_index):
+        result.oshwhub_status = '无法进入登录页'
+        return False
 
-        # 处理滑块验证
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, ".btn_slide")))
-        try:
-            slider = wait.until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, ".btn_slide"))
-            )
-            
-            track = wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".nc_scale"))
-            )
-            
-            track_width = track.size['width']
-            slider_width = slider.size['width']
-            move_distance = track_width - slider_width - 10
-            
-            log(f"账号 {account_index} - 检测到滑块验证码，滑动距离: {move_distance}px")
-            
-            actions = ActionChains(driver)
-            actions.click_and_hold(slider).perform()
-            time.sleep(0.5)
-            
-            quick_distance = int(move_distance * random.uniform(0.6, 0.8))
-            slow_distance = move_distance - quick_distance
-            
-            y_offset1 = random.randint(-2, 2)
-            actions.move_by_offset(quick_distance, y_offset1).perform()
-            time.sleep(random.uniform(0.1, 0.3))
-            
-            y_offset2 = random.randint(-2, 2)
-            actions.move_by_offset(slow_distance, y_offset2).perform()
-            time.sleep(random.uniform(0.05, 0.15))
-            
-            actions.release().perform()
-            log(f"账号 {account_index} - 滑块拖动完成")
-            
-            # 滑块验证后立即检查密码错误提示
-            time.sleep(1)  # 给错误提示一点时间显示
-            if check_password_error(driver, account_index):
-                result['password_error'] = True
-                result['oshwhub_status'] = '密码错误'
-                return result
-                
-            WebDriverWait(driver, 10).until(lambda d: "oshwhub.com" in d.current_url and "passport.jlc.com" not in d.current_url)
-            
-        except Exception as e:
-            log(f"账号 {account_index} - 滑块验证处理: {e}")
-            # 滑块验证失败后检查密码错误
-            time.sleep(1)
-            if check_password_error(driver, account_index):
-                result['password_error'] = True
-                result['oshwhub_status'] = '密码错误'
-                return result
-
-        # 等待跳转
-        log(f"账号 {account_index} - 等待登录跳转...")
-        max_wait = 15
-        jumped = False
-        for i in range(max_wait):
-            current_url = driver.current_url
-            
-            # 检查是否成功跳转回签到页面
-            if "oshwhub.com" in current_url and "passport.jlc.com" not in current_url:
-                log(f"账号 {account_index} - 成功跳转回签到页面")
-                jumped = True
-                break
-            
-            time.sleep(1)
-        
-        if not jumped:
-            current_title = driver.title
-            log(f"账号 {account_index} - ❌ 跳转超时，当前页面标题: {current_title}")
-            result['oshwhub_status'] = '跳转失败'
-            return result
+    driver = browser.driver
+    wait = WebDriverWait(driver, 25)
 
-        # 3. 获取用户昵称
-        time.sleep(1)
-        nickname = get_user_nickname_from_api(driver, account_index)
-        if nickname:
-            result['nickname'] = nickname
-        else:
-            result['nickname'] = '未知'
+    # 账号密码登录
+    phases.enter("login.credentials")
+    log(f"账号 {account_index} - 检测到未登录状态，正在执行登录流程...")
 
-        # 4. 获取签到前积分数量
-        initial_points = get_oshwhub_points(driver, account_index)
-        result['initial_points'] = initial_points if initial_points is not None else 0
-        log(f"账号 {account_index} - 签到前积分💰: {result['initial_points']}")
+    try:
+        phone_btn = wait.until(
+            EC.element_to_be_clickable((By.XPATH, '//button[contains(text(),"账号登录")]'))
+        )
+        phone_btn.click()
+        log(f"账号 {account_index} - 已切换账号登录")
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.XPATH, '//input[@placeholder="请输入手机号码 / 客户编号 / 邮箱"]')))
+    except Exception as e:
+        log(f"账号 {account_index} - 账号登录按钮可能已默认选中: {e}")
 
-        # 5. 开源平台签到
-        log(f"账号 {account_index} - 正在签到中...")
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+    # 输入账号密码
+    try:
+        user_input = wait.until(
+            EC.presence_of_element_located((By.XPATH, '//input[@placeholder="请输入手机号码 / 客户编号 / 邮箱"]'))
+        )
+        user_input.clear()
+        user_input.send_keys(username)
 
-        try:
-            driver.refresh()
-            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-        except:
-            pass
-        time.sleep(6)
-        # 执行开源平台签到
-        try:
-            # 先检查是否已经签到
-            try:
-                signed_element = driver.find_element(By.XPATH, '//span[contains(text(),"已签到")]')
-                log(f"账号 {account_index} - ✅ 今天已经在开源平台签到过了！")
-                result['oshwhub_status'] = '已签到过'
-                result['oshwhub_success'] = True
-                
-                # 即使已签到，也尝试点击礼包按钮
-                result['reward_results'] = click_gift_buttons(driver, account_index)
-                
-            except:
-                # 如果没有找到"已签到"元素，则尝试点击"立即签到"按钮，并验证是否变为"已签到"
-                signed = False
-                max_attempts = 5
-                for attempt in range(max_attempts):
-                    try:
-                        sign_btn = wait.until(
-                            EC.element_to_be_clickable((By.XPATH, '//span[contains(text(),"立即签到")]'))
-                        )
-                        sign_btn.click()
-                        time.sleep(2)  # 等待页面更新
-                        driver.refresh()  # 刷新页面以确保状态更新
-                        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                        time.sleep(2)  # 额外等待
-
-                        # 检查是否变为"已签到"
-                        signed_element = driver.find_element(By.XPATH, '//span[contains(text(),"已签到")]')
-                        signed = True
-                        break  # 成功，退出循环
-                    except:
-                        pass  # 静默继续下一次尝试
-
-                if signed:
-                    log(f"账号 {account_index} - ✅ 开源平台签到成功！")
-                    result['oshwhub_status'] = '签到成功'
-                    result['oshwhub_success'] = True
-                    
-                    # 等待签到完成
-                    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                    
-                    # 6. 签到完成后点击7天好礼和月度好礼
-                    result['reward_results'] = click_gift_buttons(driver, account_index)
-                else:
-                    log(f"账号 {account_index} - ❌ 开源平台签到失败")
-                    result['oshwhub_status'] = '签到失败'
-                    
-        except Exception as e:
-            log(f"账号 {account_index} - ❌ 开源平台签到异常: {e}")
-            result['oshwhub_status'] = '签到异常'
+        pwd_input = wait.until(
+            EC.presence_of_element_located((By.XPATH, '//input[@type="password"]'))
+        )
+        pwd_input.clear()
+        pwd_input.send_keys(password)
+        log(f"账号 {account_index} - 已输入账号密码")
+    except Exception as e:
+        log(f"账号 {account_index} - ❌ 登录输入框未找到: {e}")
+        result.oshwhub_status = '登录失败'
+        return False
 
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+    # 点击登录
+    try:
+        login_btn = wait.until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "button.submit"))
+        )
+        login_btn.click()
+        log(f"账号 {account_index} - 已点击登录按钮")
+    except Exception as e:
+        log(f"账号 {account_index} - ❌ 登录按钮定位失败: {e}")
+        result.oshwhub_status = '登录失败'
+        return False
 
-        # 7. 获取签到后积分数量
-        final_points = get_oshwhub_points(driver, account_index)
-        result['final_points'] = final_points if final_points is not None else 0
-        log(f"账号 {account_index} - 签到后积分💰: {result['final_points']}")
-
-        # 8. 计算积分差值
-        result['points_reward'] = result['final_points'] - result['initial_points']
-        if result['points_reward'] > 0:
-            log(f"账号 {account_index} - 🎉 总积分增加: {result['initial_points']} → {result['final_points']} (+{result['points_reward']})")
-        elif result['points_reward'] == 0:
-            log(f"账号 {account_index} - ⚠ 总积分无变化，可能今天已签到过: {result['initial_points']} → {result['final_points']} (0)")
-        else:
-            log(f"账号 {account_index} - ❗ 积分减少: {result['initial_points']} → {result['final_points']} ({result['points_reward']})")
+    # 立即检查密码错误提示（点击登录按钮后）：等到滑块、错误提示或跳转任一出现
+    phases.enter("login.slider")
+    wait_for(driver, login_feedback_ready, 5, 1, "登录: 等待登录反馈")
+    if check_password_error(driver, account_index):
+        result.password_error = True
+        result.oshwhub_status = '密码错误'
+        return False
 
-        # 9. 金豆签到流程
-        log(f"账号 {account_index} - 开始金豆签到流程...")
-        driver.get("https://m.jlc.com/")
-        log(f"账号 {account_index} - 已访问 m.jlc.com，等待页面加载...")
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+    # 处理滑块验证
+    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, ".btn_slide")))
+    try:
+        slider = wait.until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, ".btn_slide"))
+        )
+        
+        track = wait.until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, ".nc_scale"))
+        )
         
-        navigate_and_interact_m_jlc(driver, account_index)
+        track_width = track.size['width']
+        slider_width = slider.size['width']
+        move_distance = track_width - slider_width - 10
         
-        access_token = extract_token_from_local_storage(driver)
-        secretkey = extract_secretkey_from_devtools(driver)
+        log(f"账号 {account_index} - 检测到滑块验证码，滑动距离: {move_distance}px")
         
-        result['token_extracted'] = bool(access_token)
-        result['secretkey_extracted'] = bool(secretkey)
+        actions = ActionChains(driver)
+        actions.click_and_hold(slider).perform()
+        pause(0.5)
         
-        if access_token and secretkey:
-            log(f"账号 {account_index} - ✅ 成功提取 token 和 secretkey")
+        quick_distance = int(move_distance * random.uniform(0.6, 0.8))
+        slow_distance = move_distance - quick_distance
+        
+        y_offset1 = random.randint(-2, 2)
+        actions.move_by_offset(quick_distance, y_offset1).perform()
+        pause(random.uniform(0.1, 0.3))
+        
+        y_offset2 = random.randint(-2, 2)
+        actions.move_by_offset(slow_distance, y_offset2).perform()
+        pause(random.uniform(0.05, 0.15))
+        
+        actions.release().perform()
+        log(f"账号 {account_index} - 滑块拖动完成")
+        
+        # 滑块验证后等待跳转或错误提示，已跳转则无需检查密码错误
+        wait_for(driver, lambda d: url_left_passport(d) or any_xpath_present(*LOGIN_FEEDBACK_XPATHS)(d), 10, 1, "登录: 等待滑块验证结果")
+        if not url_left_passport(driver) and check_password_error(driver, account_index):
+            result.password_error = True
+            result.oshwhub_status = '密码错误'
+            return False
             
-            jlc_client = JLCClient(access_token, secretkey, account_index, driver)
-            jindou_success = jlc_client.execute_full_process()
+        WebDriverWait(driver, 10).until(url_left_passport)
+        
+    except Exception as e:
+        log(f"账号 {account_index} - 滑块验证处理: {e}")
+        # 滑块验证失败后检查密码错误
+        wait_for(driver, login_feedback_ready, 3, 1, "登录: 等待登录反馈")
+        if check_password_error(driver, account_index):
+            result.password_error = True
+            result.oshwhub_status = '密码错误'
+            return False
+
+    # 等待跳转
+    phases.enter("login.redirect")
+    log(f"账号 {account_index} - 等待登录跳转...")
+    # 原来每秒轮询一次，平均多等半秒；现在 URL 一变化立即继续
+    jumped = wait_for(driver, url_left_passport, 15, 0.5, "登录: 等待跳转回签到页")
+    invalidate_browser_snapshot()
+    if jumped:
+        log(f"账号 {account_index} - 成功跳转回签到页面")
+    else:
+        current_title = driver.title
+        log(f"账号 {account_index} - ❌ 跳转超时，当前页面标题: {current_title}")
+        result.oshwhub_status = '跳转失败'
+        return False
+
+    # 等登录 Cookie 写入后保存整个会话，重试时可以跳过登录和滑块
+    wait_for(driver, lambda d: d.get_cookies(), 5, 1, "登录: 等待登录 Cookie")
+    save_cached_credentials(username, password, session_cookies=snapshot_session_cookies(driver))
+    return True
+
+def sign_in_account(username, password, account_index, total_accounts, retry_count=0, is_final_retry=False,
+                    platforms=ALL_PLATFORMS, session_cookies=None, claim_gifts=True):
+    """为单个账号执行签到流程。platforms 指定需要处理的平台，重试时只补做失败的平台；
+    session_cookies 为缓存的登录会话，仍有效时直接复用，不再输入密码和拖动滑块；
+    claim_gifts 为 False 时礼包日只签到不领取礼包"""
+    retry_label = ""
+    if retry_count > 0:
+        retry_label = f" (重试{retry_count})"
+    if is_final_retry:
+        retry_label = " (最终重试)"
+    
+    if tuple(platforms) != ALL_PLATFORMS:
+        retry_label += f"，仅{'、'.join(PLATFORM_LABELS[p] for p in platforms)}"
+    
+    log(f"开始处理账号 {account_index}/{total_accounts}{retry_label}")
+    
+    browser = get_browser_manager()
+    
+    # 记录详细结果
+    result = AccountResult(account_index, retry_count, is_final_retry)
+
+    phases = tracer.phases(account_index)
+
+    # 复用当前线程的浏览器（上一个账号的 Cookie 和存储已清空），必要时才重新启动
+    phases.enter("browser.acquire")
+    try:
+        browser.acquire()
+    except Exception as e:
+        phases.close()
+        log(f"账号 {account_index} - ❌ 浏览器启动失败: {e}")
+        result.oshwhub_status = '浏览器启动失败'
+        return result
+
+    try:
+        driver = browser.driver
+        logged_in = False
+        if session_cookies:
+            phases.enter("login.restore")
+            logged_in = restore_session(driver, session_cookies, account_index, platforms)
+            if not logged_in:
+                invalidate_cached_credentials(username, password, 'session_cookies')
+        if not logged_in and not login_with_password(browser, username, password, account_index, result, phases):
+            return result
+
+        driver = browser.driver
+        wait = WebDriverWait(driver, 25)
+
+        # 登录后两个平台互不依赖：两个平台都要处理时开源平台签到页在第二个标签页中提前加载，
+        # 主标签页提取金豆 token 后金豆接口在后台线程通过 HTTP 执行，同时浏览器切到开源平台标签页签到。
+        # 浏览器只在当前线程中操作，任一平台出错都不影响另一个平台
+        main_tab = driver.current_window_handle
+        oshwhub_tab = None
+        if PLATFORM_OSHWHUB in platforms and PLATFORM_JINDOU in platforms:
+            try:
+                oshwhub_tab = open_background_tab(driver, f"{OSHWHUB_URL}/sign_in")
+            except Exception as e:
+                log(f"账号 {account_index} - ⚠ 打开开源平台标签页失败，稍后在当前标签页签到: {e}")
+        
+        with ThreadPoolExecutor(max_workers=1) as side:
+            if PLATFORM_JINDOU in platforms:
+                try:
+                    # 金豆签到流程：在浏览器中提取 token 和 secretkey 后调用接口
+                    phases.enter("jindou.navigate")
+                    log(f"账号 {account_index} - 开始金豆签到流程...")
+                    navigate(driver, f"{M_JLC_URL}/")
+                    log(f"账号 {account_index} - 已访问 m.jlc.com，等待页面加载...")
+                    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+                    
+                    navigate_and_interact_m_jlc(driver, account_index)
+                    
+                    # token 写入 localStorage 后再提取，避免提取函数的重试延迟
+                    phases.enter("jindou.token")
+                    wait_for(driver, local_storage_has_token, 10, 0, "金豆: 等待 token 写入")
+                    access_token = extract_token_from_local_storage(driver)
+                    phases.enter("jindou.secretkey")
+                    secretkey = extract_secretkey_from_devtools(driver)
+                    phases.close()
+                    
+                    result.token_extracted = bool(access_token)
+                    result.secretkey_extracted = bool(secretkey)
+                    
+                    if access_token and secretkey:
+                        log(f"账号 {account_index} - ✅ 成功提取 token 和 secretkey")
+                        side.submit(run_jindou_process, username, password, access_token, secretkey,
+                                    account_index, result, get_log_tag())
+                    else:
+                        log(f"账号 {account_index} - ❌ 无法提取到 token 或 secretkey，跳过金豆签到")
+                        result.jindou_status = 'Token提取失败'
+                except Exception as e:
+                    log(f"账号 {account_index} - ❌ 金豆签到流程出错: {e}")
+                    result.jindou_status = '执行异常'
             
-            # 记录金豆签到结果
-            result['jindou_success'] = jindou_success
-            result['jindou_status'] = jlc_client.sign_status
-            result['initial_jindou'] = jlc_client.initial_jindou
-            result['final_jindou'] = jlc_client.final_jindou
-            result['jindou_reward'] = jlc_client.jindou_reward
-            result['has_jindou_reward'] = jlc_client.has_reward
+            if PLATFORM_OSHWHUB in platforms:
+                try:
+                    phases.enter("oshwhub.page")
+                    if oshwhub_tab is not None:
+                        switch_to_tab(driver, oshwhub_tab)
+                    else:
+                        navigate(driver, f"{OSHWHUB_URL}/sign_in")
+                    sign_oshwhub_in_browser(driver, username, password, account_index, result, wait, claim_gifts)
+                except Exception as e:
+                    log(f"账号 {account_index} - ❌ 开源平台签到出错: {e}")
+                    if not result.oshwhub_success:
+                        result.oshwhub_status = '执行异常'
+                finally:
+                    if oshwhub_tab is not None:
+                        close_tab(driver, oshwhub_tab, main_tab)
             
-            if jindou_success:
-                log(f"账号 {account_index} - ✅ 金豆签到流程完成")
-            else:
-                log(f"账号 {account_index} - ❌ 金豆签到流程失败")
-        else:
-            log(f"账号 {account_index} - ❌ 无法提取到 token 或 secretkey，跳过金豆签到")
-            result['jindou_status'] = 'Token提取失败'
+            phases.enter("jindou.wait")
+        # 离开 with 时等待金豆后台线程结束
 
     except Exception as e:
         log(f"账号 {account_index} - ❌ 程序执行错误: {e}")
-        result['oshwhub_status'] = '执行异常'
+        if not result.oshwhub_success:
+            result.oshwhub_status = '执行异常'
     finally:
-        driver.quit()
-        log(f"账号 {account_index} - 浏览器已关闭")
+        phases.close()
+        # 浏览器保留给下一个账号复用，使用前会清空 Cookie 和存储
+        log(f"账号 {account_index} - 浏览器已释放（第 {browser.uses} 次使用，共启动 {browser.launches} 次）")
     
     return result
 
-def should_retry(merged_success, password_error):
-    """判断是否需要重试：如果开源平台或金豆签到未成功，且不是密码错误"""
-    need_retry = (not merged_success['oshwhub'] or not merged_success['jindou']) and not password_error
-    return need_retry
-
-def process_single_account(username, password, account_index, total_accounts):
-    """处理单个账号，包含重试机制，并合并多次尝试的最佳结果"""
-    max_retries = 3  # 最多重试3次
-    merged_result = {
-        'account_index': account_index,
-        'nickname': '未知',
-        'oshwhub_status': '未知',
-        'oshwhub_success': False,
-        'initial_points': 0,
-        'final_points': 0,
-        'points_reward': 0,
-        'reward_results': [],
-        'jindou_status': '未知',
-        'jindou_success': False,
-        'initial_jindou': 0,
-        'final_jindou': 0,
-        'jindou_reward': 0,
-        'has_jindou_reward': False,
-        'token_extracted': False,
-        'secretkey_extracted': False,
-        'retry_count': 0,  # 记录最后使用的retry_count
-        'is_final_retry': False,
-        'password_error': False  # 标记密码错误
-    }
+class AccountResult:
+    """单个账号的签到结果。账号很多时结果要一直保留到总结和推送，用 __slots__ 减少每条记录的内存"""
+    
+    __slots__ = (
+        'account_index', 'nickname',
+        'oshwhub_status', 'oshwhub_success', 'initial_points', 'final_points', 'points_reward', 'reward_results',
+        'jindou_status', 'jindou_success', 'initial_jindou', 'final_jindou', 'jindou_reward', 'has_jindou_reward',
+        'token_extracted', 'secretkey_extracted', 'retry_count', 'is_final_retry', 'password_error',
+        'account', 'elapsed',
+    )
+    # 各平台成功时整体替换的字段
+    OSHWHUB_FIELDS = ('oshwhub_status', 'initial_points', 'final_points', 'points_reward', 'reward_results')
+    JINDOU_FIELDS = ('jindou_status', 'initial_jindou', 'final_jindou', 'jindou_reward', 'has_jindou_reward')
+    
+    def __init__(self, account_index, retry_count=0, is_final_retry=False):
+        self.account_index = account_index
+        self.nickname = '未知'
+        self.oshwhub_status = '未知'
+        self.oshwhub_success = False
+        self.initial_points = 0      # 签到前积分
+        self.final_points = 0        # 签到后积分
+        self.points_reward = 0       # 本次获得积分
+        self.reward_results = ()     # 礼包领取结果
+        self.jindou_status = '未知'
+        self.jindou_success = False
+        self.initial_jindou = 0
+        self.final_jindou = 0
+        self.jindou_reward = 0
+        self.has_jindou_reward = False  # 金豆是否有额外奖励
+        self.token_extracted = False
+        self.secretkey_extracted = False
+        self.retry_count = retry_count
+        self.is_final_retry = is_final_retry
+        self.password_error = False  # 标记密码错误
+        self.account = ''            # 账号标识(account_key)，写入历史记录时使用
+        self.elapsed = 0.0           # 各次尝试的累计耗时（秒）
+    
+    def needs_retry(self):
+        """开源平台或金豆签到未成功，且不是密码错误"""
+        return (not self.oshwhub_success or not self.jindou_success) and not self.password_error
+    
+    def pending_platforms(self):
+        """还没有签到成功的平台"""
+        return tuple(p for p, ok in ((PLATFORM_OSHWHUB, self.oshwhub_success), (PLATFORM_JINDOU, self.jindou_success)) if not ok)
+    
+    def merge(self, other):
+        """把一次尝试的结果合并进来（各平台取首次成功的结果），检测到密码错误时返回 True"""
+        if other.password_error:
+            self.password_error = True
+            self.oshwhub_status = '密码错误'
+            self.nickname = '未知'
+            return True
+        self.merge_platforms(other)
+        self.retry_count = other.retry_count  # 记录最后一次尝试的 retry_count
+        return False
     
-    merged_success = {'oshwhub': False, 'jindou': False}
+    def merge_platforms(self, other):
+        """只合并两个平台的成功结果和昵称等信息，不处理密码错误和重试次数"""
+        if other.oshwhub_success and not self.oshwhub_success:
+            self.oshwhub_success = True
+            for field in self.OSHWHUB_FIELDS:
+                setattr(self, field, getattr(other, field))
+        if other.jindou_success and not self.jindou_success:
+            self.jindou_success = True
+            for field in self.JINDOU_FIELDS:
+                setattr(self, field, getattr(other, field))
+        if self.nickname == '未知' and other.nickname != '未知':
+            self.nickname = other.nickname
+        self.token_extracted = self.token_extracted or other.token_extracted
+        self.secretkey_extracted = self.secretkey_extracted or other.secretkey_extracted
+    
+    def to_dict(self):
+        data = {field: getattr(self, field) for field in self.__slots__}
+        data['reward_results'] = list(self.reward_results)
+        return data
+    
+    @classmethod
+    def from_dict(cls, data):
+        result = cls(data.get('account_index', 0))
+        for field in cls.__slots__:
+            if field in data:
+                setattr(result, field, data[field])
+        result.reward_results = tuple(result.reward_results or ())
+        return result
 
-    for attempt in range(max_retries + 1):  # 第一次执行 + 重试次数
-        result = sign_in_account(username, password, account_index, total_accounts, retry_count=attempt)
-        
-        # 如果检测到密码错误，立即停止重试
-        if result.get('password_error'):
-            merged_result['password_error'] = True
-            merged_result['oshwhub_status'] = '密码错误'
-            merged_result['nickname'] = '未知'
-            break
-        
-        # 合并开源平台结果：如果本次成功且之前未成功，则更新
-        if result['oshwhub_success'] and not merged_success['oshwhub']:
-            merged_success['oshwhub'] = True
-            merged_result['oshwhub_status'] = result['oshwhub_status']
-            merged_result['initial_points'] = result['initial_points']
-            merged_result['final_points'] = result['final_points']
-            merged_result['points_reward'] = result['points_reward']
-            merged_result['reward_results'] = result['reward_results']  # 合并礼包结果
-        
-        # 合并金豆结果：如果本次成功且之前未成功，则更新
-        if result['jindou_success'] and not merged_success['jindou']:
-            merged_success['jindou'] = True
-            merged_result['jindou_status'] = result['jindou_status']
-            merged_result['initial_jindou'] = result['initial_jindou']
-            merged_result['final_jindou'] = result['final_jindou']
-            merged_result['jindou_reward'] = result['jindou_reward']
-            merged_result['has_jindou_reward'] = result['has_jindou_reward']
-        
-        # 更新其他字段（如果之前未知）
-        if merged_result['nickname'] == '未知' and result['nickname'] != '未知':
-            merged_result['nickname'] = result['nickname']
-        
-        if not merged_result['token_extracted'] and result['token_extracted']:
-            merged_result['token_extracted'] = result['token_extracted']
-        
-        if not merged_result['secretkey_extracted'] and result['secretkey_extracted']:
-            merged_result['secretkey_extracted'] = result['secretkey_extracted']
-        
-        # 更新retry_count为最后一次尝试的
-        merged_result['retry_count'] = result['retry_count']
-        
-        # 检查是否还需要重试（排除密码错误的情况）
-        if not should_retry(merged_success, merged_result['password_error']) or attempt >= max_retries:
-            break
+class ResultSummary:
+    """单次遍历汇总所有账号结果：成功数、奖励合计和各类失败账号列表。
+    账号按完成顺序加入，并发时可能乱序，账号列表按序号有序插入；add 可在多个 worker 线程中调用"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.oshwhub_success = 0
+        self.jindou_success = 0
+        self.points_reward = 0
+        self.jindou_reward = 0
+        self.retried = []
+        self.password_error = []
+        self.failed = []          # 任一平台失败（不含密码错误）
+        self.failed_oshwhub = []
+        self.failed_jindou = []
+        self.skipped_oshwhub = []  # API 模式下跳过开源平台的账号，不计入开源平台的成功和失败
+    
+    def add(self, result):
+        with self._lock:
+            self._add(result)
+    
+    def _add(self, result):
+        index = result.account_index
+        self.total += 1
+        if result.retry_count > 0 or result.is_final_retry:
+            bisect.insort(self.retried, index)
+        if result.password_error:
+            bisect.insort(self.password_error, index)
+            return
+        oshwhub_skipped = not result.oshwhub_success and result.oshwhub_status == OSHWHUB_SKIPPED_STATUS
+        if result.oshwhub_success:
+            self.oshwhub_success += 1
+        elif oshwhub_skipped:
+            bisect.insort(self.skipped_oshwhub, index)
+        else:
+            bisect.insort(self.failed_oshwhub, index)
+        if result.jindou_success:
+            self.jindou_success += 1
         else:
-            log(f"账号 {account_index} - 🔄 准备第 {attempt + 1} 次重试，等待 {random.randint(2, 6)} 秒后重新开始...")
-            time.sleep(random.randint(2, 6))
+            bisect.insort(self.failed_jindou, index)
+        if not (result.oshwhub_success or oshwhub_skipped) or not result.jindou_success:
+            bisect.insort(self.failed, index)
+        if result.points_reward > 0:
+            self.points_reward += result.points_reward
+        if result.jindou_reward > 0:
+            self.jindou_reward += result.jindou_reward
+
+def cache_covers(credentials, platforms, claim_gifts=True):
+    """缓存凭据能否直接处理 platforms 中的某个平台（金豆需要 token / secretkey，开源平台需要 Cookie 和已记录的签到请求）"""
+    if not credentials:
+        return False
+    if PLATFORM_JINDOU in platforms and credentials.get('token') and credentials.get('secretkey'):
+        return True
+    return PLATFORM_OSHWHUB in platforms and oshwhub_api_usable(credentials, claim_gifts)
+
+def sign_in_account_from_cache(username, password, account_index, credentials, platforms=ALL_PLATFORMS, claim_gifts=True):
+    """使用缓存的凭据直接通过 HTTP 签到，不启动浏览器：金豆用 token / secretkey，开源平台用 Cookie 重放已记录的签到请求
+    （要领礼包的日子开源平台只查询昵称和积分）。缓存凭据被服务端拒绝或签到无法确认时清除对应缓存，
+    返回的结果中未成功的部分由浏览器流程补上"""
+    log(f"账号 {account_index} - 🔑 使用缓存凭据执行签到...")
+    result = AccountResult(account_index)
+    phases = tracer.phases(account_index)
     
-    # 最终设置success字段基于合并
-    merged_result['oshwhub_success'] = merged_success['oshwhub']
-    merged_result['jindou_success'] = merged_success['jindou']
+    cookies = credentials.get('cookies')
+    if cookies and PLATFORM_OSHWHUB in platforms:
+        phases.enter("cache.oshwhub")
+        cookie_str = build_cookie_header(cookies)
+        if not load_oshwhub_profile(cookie_str, account_index, result):
+            log(f"账号 {account_index} - ⚠ 缓存的开源平台 Cookie 已失效")
+            invalidate_cached_credentials(username, password, 'cookies')
+        elif oshwhub_api_usable(credentials, claim_gifts):
+            if sign_oshwhub_via_api(cookie_str, credentials['oshwhub_sign'], account_index, result):
+                log_points_change(account_index, result)
+                save_cached_credentials(username, password)  # 顺延缓存有效期
+            else:
+                invalidate_cached_credentials(username, password, 'oshwhub_sign')
+    
+    # 金豆：用缓存的 token 和 secretkey 直接调用接口
+    access_token = credentials.get('token')
+    secretkey = credentials.get('secretkey')
+    if access_token and secretkey and PLATFORM_JINDOU in platforms:
+        phases.enter("cache.jindou")
+        jlc_client = JLCClient(access_token, secretkey, account_index, None)
+        jindou_success = jlc_client.execute_full_process()
+        if jindou_success:
+            result.token_extracted = True
+            result.secretkey_extracted = True
+            result.jindou_success = True
+            result.jindou_status = jlc_client.sign_status
+            result.initial_jindou = jlc_client.initial_jindou
+            result.final_jindou = jlc_client.final_jindou
+            result.jindou_reward = jlc_client.jindou_reward
+            result.has_jindou_reward = jlc_client.has_reward
+            log(f"账号 {account_index} - ✅ 金豆签到流程完成（缓存凭据）")
+            save_cached_credentials(username, password)  # 顺延缓存有效期
+        else:
+            log(f"账号 {account_index} - ⚠ 缓存的 token 已失效，将通过浏览器重新登录")
+            invalidate_cached_credentials(username, password, 'token', 'secretkey')
     
-    return merged_result
+    phases.close()
+    return result
 
-def execute_final_retry_for_failed_accounts(all_results, usernames, passwords, total_accounts):
-    """对失败的账号执行最终重试（排除密码错误的账号）"""
-    log("=" * 70)
-    log("🔄 执行最终重试 - 处理所有重试后仍失败的账号")
-    log("=" * 70)
+# 账号来源：命令行中逗号分隔的账号密码，或账号文件（JSONL / CSV）。账号文件逐行读取，worker 需要时才取下一个账号
+ACCOUNTS_FILE = os.getenv('JLC_ACCOUNTS_FILE')
+JINDOU_SKIPPED_STATUS = '已跳过（账号配置）'
+# API 模式下没有接口签到凭据时开源平台不处理：仍记为未成功（之后的浏览器运行会补做），但不计入成功和失败统计
+OSHWHUB_SKIPPED_STATUS = '已跳过（API 模式）'
+
+class AccountEntry:
+    """一个待处理的账号及其选项：skip_jindou 不做金豆签到，claim_gifts 为 False 时礼包日只签到不领礼包，
+    priority 越大越先处理（在预读窗口内生效）"""
     
-    # 找出需要最终重试的账号（排除密码错误的）
-    failed_accounts = []
-    for i, result in enumerate(all_results):
-        if (not result['oshwhub_success'] or not result['jindou_success']) and not result.get('password_error', False):
-            failed_accounts.append({
-                'index': i,
-                'account_index': result['account_index'],
-                'username': usernames[result['account_index'] - 1],
-                'password': passwords[result['account_index'] - 1],
-                'previous_retry_count': result['retry_count']
-            })
+    __slots__ = ('index', 'username', 'password', 'skip_jindou', 'claim_gifts', 'priority')
     
-    if not failed_accounts:
-        log("✅ 没有需要最终重试的账号")
-        return all_results
+    def __init__(self, index, username, password, skip_jindou=False, claim_gifts=True, priority=0):
+        self.index = index
+        self.username = username
+        self.password = password
+        self.skip_jindou = skip_jindou
+        self.claim_gifts = claim_gifts
+        self.priority = priority
+
+def parse_flag(value, default):
+    """账号文件中的布尔选项：true/1/yes/是 为真，空值取默认值"""
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y', '是')
+
+class AccountSource:
+    """可重复遍历的账号来源，每次遍历都从头逐行读取，不把整个账号列表载入内存。
+    账号文件中每行一个账号：JSONL 为 {"username", "password", "skip_jindou", "gift", "priority"}，
+    CSV 为带同名表头的表格；以 # 开头的行和空行忽略"""
     
-    log(f"📋 需要最终重试的账号: {', '.join(str(acc['account_index']) for acc in failed_accounts)}")
+    def __init__(self, path=None, usernames=(), passwords=(), shard=None):
+        self.path = path
+        self.usernames = usernames
+        self.passwords = passwords
+        self.shard = shard  # (分片序号, 分片数)，只产出属于该分片的账号，账号序号保持全局编号
     
-    # 等待一段时间再开始最终重试
-    wait_time = random.randint(2, 3)
-    log(f"⏳ 等待 {wait_time} 秒后开始最终重试...")
-    time.sleep(wait_time)
+    def _rows(self, f):
+        """CSV 逐行产出 dict，JSONL 逐行产出原始字符串（坏行在 _entries 中跳过，不会中断读取）"""
+        lines = (line for line in f if line.strip() and not line.lstrip().startswith('#'))
+        if self.path.lower().endswith('.csv'):
+            return csv.DictReader(lines)
+        return lines
     
-    # 执行最终重试
-    for failed_acc in failed_accounts:
-        log(f"🔄 开始最终重试账号 {failed_acc['account_index']}")
-        
-        # 执行最终重试（只执行一次），retry_count 设置为之前的 +1，但不超过3+1
-        final_result = sign_in_account(
-            failed_acc['username'], 
-            failed_acc['password'], 
-            failed_acc['account_index'], 
-            total_accounts, 
-            retry_count=failed_acc['previous_retry_count'] + 1,
-            is_final_retry=True
-        )
-        
-        # 如果最终重试检测到密码错误，标记但不更新其他状态
-        if final_result.get('password_error'):
-            original_result = all_results[failed_acc['index']]
-            original_result['password_error'] = True
-            original_result['oshwhub_status'] = '密码错误'
-            original_result['nickname'] = '未知'
-            original_result['is_final_retry'] = True
-            original_result['retry_count'] = failed_acc['previous_retry_count'] + 1
-            log(f"账号 {failed_acc['account_index']} - ❌ 最终重试检测到密码错误")
-            continue
-        
-        original_result = all_results[failed_acc['index']]
-        
-        # 更新开源平台结果
-        if final_result['oshwhub_success'] and not original_result['oshwhub_success']:
-            original_result['oshwhub_success'] = True
-            original_result['oshwhub_status'] = final_result['oshwhub_status']
-            original_result['initial_points'] = final_result['initial_points']
-            original_result['final_points'] = final_result['final_points']
-            original_result['points_reward'] = final_result['points_reward']
-            original_result['reward_results'] = final_result['reward_results']
-            log(f"✅ 账号 {failed_acc['account_index']} - 开源平台签到成功")
-        
-        # 更新金豆结果
-        if final_result['jindou_success'] and not original_result['jindou_success']:
-            original_result['jindou_success'] = True
-            original_result['jindou_status'] = final_result['jindou_status']
-            original_result['initial_jindou'] = final_result['initial_jindou']
-            original_result['final_jindou'] = final_result['final_jindou']
-            original_result['jindou_reward'] = final_result['jindou_reward']
-            original_result['has_jindou_reward'] = final_result['has_jindou_reward']
-            log(f"✅ 账号 {failed_acc['account_index']} - 金豆签到成功")
-        
-        # 更新其他信息
-        if original_result['nickname'] == '未知' and final_result['nickname'] != '未知':
-            original_result['nickname'] = final_result['nickname']
-        
-        if not original_result['token_extracted'] and final_result['token_extracted']:
-            original_result['token_extracted'] = final_result['token_extracted']
-        
-        if not original_result['secretkey_extracted'] and final_result['secretkey_extracted']:
-            original_result['secretkey_extracted'] = final_result['secretkey_extracted']
-        
-        original_result['is_final_retry'] = True
-        original_result['retry_count'] = failed_acc['previous_retry_count'] + 1
-        
-        # 如果不是最后一个账号，等待一段时间
-        if failed_acc != failed_accounts[-1]:
-            wait_time = random.randint(3, 5)
-            log(f"⏳ 等待 {wait_time} 秒后处理下一个重试账号...")
-            time.sleep(wait_time)
+    def _entries(self, report_errors):
+        entries = self._all_entries(report_errors)
+        if not self.shard:
+            return entries
+        shard_index, shard_count = self.shard
+        return (entry for entry in entries if shard_of(entry.username, shard_count) == shard_index)
+    
+    def _all_entries(self, report_errors):
+        if not self.path:
+            for i, (username, password) in enumerate(zip(self.usernames, self.passwords), 1):
+                yield AccountEntry(i, username, password)
+            return
+        index = 0
+        with open(self.path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in self._rows(f):
+                try:
+                    if isinstance(row, str):
+                        row = json.loads(row)
+                    username = str(row.get('username') or '').strip()
+                    password = str(row.get('password') or '')
+                    if not username or not password:
+                        raise ValueError('缺少 username 或 password')
+                    entry = AccountEntry(
+                        index + 1, username, password,
+                        skip_jindou=parse_flag(row.get('skip_jindou'), False),
+                        claim_gifts=parse_flag(row.get('gift'), True),
+                        priority=int(row.get('priority') or 0),
+                    )
+                except (ValueError, TypeError, AttributeError) as e:
+                    if report_errors:
+                        log(f"⚠ 账号文件 {self.path} 中有一行无法解析，已跳过: {e}")
+                    continue
+                index += 1
+                yield entry
+    
+    def __iter__(self):
+        return self._entries(report_errors=True)
+    
+    def count(self):
+        """账号数量（账号文件或分片时需要完整读一遍，只计数不保存）"""
+        if not self.path and not self.shard:
+            return min(len(self.usernames), len(self.passwords))
+        return sum(1 for _ in self._entries(report_errors=False))
+
+def shard_of(username, shard_count):
+    """账号所属的分片（1 ~ shard_count），只由账号本身的哈希决定，账号列表增减时其他账号不会换分片"""
+    return int(account_key(username), 16) % shard_count + 1
+
+def parse_shard(value):
+    """解析 --shard i/n，返回 (i, n)"""
+    index, _, count = (value or '').partition('/')
+    index, count = int(index), int(count)
+    if not 1 <= index <= count:
+        raise ValueError(f"分片序号应在 1 ~ {count} 之间")
+    return index, count
+
+# 重试调度：所有账号的尝试进入同一个按就绪时间排序的队列，按失败类别退避，并受单账号和整次运行的预算限制
+FAILURE_FATAL = 'fatal'          # 密码错误，不再重试
+FAILURE_TRANSIENT = 'transient'  # token 提取失败、接口偶发错误等，只影响当前账号
+FAILURE_SITE = 'site'            # 登录页打不开等站点故障，所有账号一起暂停
+FAILURE_LABELS = {FAILURE_FATAL: '密码错误', FAILURE_TRANSIENT: '临时故障', FAILURE_SITE: '站点故障'}
+# 各类失败的退避 (基础秒数, 上限秒数)，按次数指数增长并加随机抖动
+RETRY_BACKOFF = {
+    FAILURE_TRANSIENT: (3, 30),
+    FAILURE_SITE: (30, 300),
+}
+SITE_FAILURE_STATUSES = ('无法进入登录页', '登录失败')
+RETRY_MAX_ATTEMPTS = int(os.getenv('JLC_RETRY_MAX_ATTEMPTS', '5'))  # 每个账号最多尝试次数（含首次）
+RETRY_BUDGET = int(os.getenv('JLC_RETRY_BUDGET', '0'))  # 整次运行最多重试次数，0 表示按账号数自动设定
+RETRY_DEADLINE = float(os.getenv('JLC_RETRY_DEADLINE_MINUTES', '60')) * 60  # 超过此时长不再安排重试
+
+def classify_failure(result):
+    """判断一次尝试的失败类别"""
+    if result.password_error:
+        return FAILURE_FATAL
+    if result.oshwhub_status in SITE_FAILURE_STATUSES:
+        return FAILURE_SITE
+    return FAILURE_TRANSIENT
+
+def retry_delay(failure, count):
+    """第 count 次遇到该类失败后的等待秒数（指数退避 + 抖动）"""
+    base, cap = RETRY_BACKOFF[failure]
+    return min(cap, base * 2 ** (count - 1)) * random.uniform(0.5, 1.0)
+
+class AccountTask:
+    """调度队列中的一个账号：result 为各次尝试合并后的结果"""
+    
+    __slots__ = ('account_index', 'username', 'password', 'claim_gifts', 'priority', 'expected_runtime', 'result', 'attempts')
+    
+    def __init__(self, entry, previous_result=None, expected_runtime=0.0):
+        self.account_index = entry.index
+        self.username = entry.username
+        self.password = entry.password
+        self.claim_gifts = entry.claim_gifts
+        self.priority = entry.priority
+        self.expected_runtime = expected_runtime  # 历史耗时中位数，同优先级时耗时长的先开始，并发时整体更早结束
+        self.result = AccountResult(entry.index)
+        self.result.account = account_key(entry.username)
+        self.attempts = 0
+        if entry.skip_jindou:
+            self.result.jindou_success = True
+            self.result.jindou_status = JINDOU_SKIPPED_STATUS
+        # previous_result 为 --resume 时从运行日志恢复的本日结果，已成功的部分会保留
+        if previous_result:
+            self.result.merge_platforms(previous_result)
+
+class RetryScheduler:
+    """全局重试调度器：最小堆按就绪时间（同时就绪时按优先级、历史耗时）取任务，站点故障时所有任务一起顺延。
+    新账号从 tasks 迭代器按需读取，队列中最多预读 lookahead 个未开始的账号；新账号以读入时间为就绪时间，
+    已到期的重试与新账号按时间先后交替执行，不会一直排在所有未读账号之后"""
+    
+    def __init__(self, tasks, lookahead=1, max_attempts=RETRY_MAX_ATTEMPTS, budget=RETRY_BUDGET, deadline=RETRY_DEADLINE):
+        self.max_attempts = max(1, max_attempts)
+        self.budget = budget
+        self.lookahead = max(1, lookahead)
+        self.deadline = time.monotonic() + deadline
+        self._source = iter(tasks)
+        self._source_lock = threading.Lock()
+        self._exhausted = False
+        self._fresh = 0  # 队列中尚未开始的账号数
+        self._heap = []
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._site_not_before = 0.0
+        self._site_failures = 0  # 连续站点故障次数
+        self.seen = 0
+        self.attempts = 0
+        self.retries = {FAILURE_TRANSIENT: 0, FAILURE_SITE: 0}
+        self.given_up = []
+    
+    @property
+    def retries_left(self):
+        """剩余重试预算；未配置时为已读取账号数的 2 倍，至少 5 次"""
+        budget = self.budget if self.budget > 0 else max(5, 2 * self.seen)
+        return budget - sum(self.retries.values())
+    
+    def _push(self, task, ready_at):
+        heapq.heappush(self._heap, (ready_at, -task.priority, -task.expected_runtime, self._seq, task))
+        self._seq += 1
+    
+    def _fill(self):
+        """从账号来源补充新任务。已有线程在读取时直接返回，读到后会唤醒等待的线程"""
+        if self._exhausted or not self._source_lock.acquire(blocking=False):
+            return
+        try:
+            read_at = time.monotonic()  # 同一次读入的账号就绪时间相同，按优先级和历史耗时排序
+            while not self._exhausted and self._fresh < self.lookahead:
+                try:
+                    task = next(self._source, None)
+                except Exception as e:
+                    log(f"❌ 读取账号出错，不再读取后续账号: {e}")
+                    task = None
+                with self._cond:
+                    if task is None:
+                        self._exhausted = True
+                    else:
+                        self._push(task, read_at)
+                        self._fresh += 1
+                        self.seen += 1
+                    self._cond.notify_all()
+        finally:
+            self._source_lock.release()
+    
+    def next_task(self):
+        """取出下一个到期的任务，没有到期任务时等待；全部完成后返回 None"""
+        while True:
+            self._fill()
+            with self._cond:
+                now = time.monotonic()
+                if self._heap:
+                    ready_at = max(self._heap[0][0], self._site_not_before)
+                    if ready_at <= now:
+                        task = heapq.heappop(self._heap)[-1]
+                        if task.attempts == 0:
+                            self._fresh -= 1
+                        self._in_flight += 1
+                        self.attempts += 1
+                        return task
+                    self._cond.wait(ready_at - now)
+                elif not self._exhausted:
+                    self._cond.wait(1)  # 其他线程正在读取账号
+                elif self._in_flight == 0:
+                    return None
+                else:
+                    self._cond.wait()
+    
+    def is_final(self, task):
+        """即将开始的这次尝试是否为该账号的最后一次"""
+        return task.attempts + 1 >= self.max_attempts or (task.attempts > 0 and self.retries_left <= 0)
+    
+    def finish(self, task, failure):
+        """一次尝试结束，failure 为 None 表示已全部成功；需要时按失败类别安排重试。账号不再重试时返回 True"""
+        with self._cond:
+            self._in_flight -= 1
+            task.attempts += 1
+            index = task.account_index
+            now = time.monotonic()
+            if failure == FAILURE_SITE:
+                self._site_failures += 1
+                delay = retry_delay(FAILURE_SITE, self._site_failures)
+                self._site_not_before = max(self._site_not_before, now + delay)
+                log(f"账号 {index} - 🚧 疑似站点故障（连续 {self._site_failures} 次），所有账号暂停 {delay:.0f} 秒")
+            elif failure is None or failure == FAILURE_TRANSIENT:
+                self._site_failures = 0
+            
+            metrics.inc('jlc_account_attempts', outcome=failure or 'success')
+            retried = False
+            if failure is None or failure == FAILURE_FATAL:
+                pass
+            elif task.attempts >= self.max_attempts:
+                log(f"账号 {index} - ⛔ 已尝试 {task.attempts} 次，不再重试")
+                self._give_up(index, 'attempts')
+            elif self.retries_left <= 0:
+                log(f"账号 {index} - ⛔ 本次运行的重试预算已用完，不再重试")
+                self._give_up(index, 'budget')
+            else:
+                delay = retry_delay(failure, task.attempts) if failure == FAILURE_TRANSIENT else 0.0
+                ready_at = max(now + delay, self._site_not_before)
+                if ready_at > self.deadline:
+                    log(f"账号 {index} - ⛔ 已超过重试时限，不再重试")
+                    self._give_up(index, 'deadline')
+                else:
+                    self.retries[failure] += 1
+                    metrics.inc('jlc_retries', failure=failure)
+                    log(f"账号 {index} - 🔄 {FAILURE_LABELS[failure]}，{ready_at - now:.0f} 秒后进行第 {task.attempts} 次重试")
+                    self._push(task, now + delay)
+                    retried = True
+            if not retried:
+                metrics.inc('jlc_accounts_finished')
+            self._cond.notify_all()
+            return not retried
+    
+    def _give_up(self, index, reason):
+        self.given_up.append(index)
+        metrics.inc('jlc_accounts_given_up', reason=reason)
+    
+    def log_report(self):
+        retried = sum(self.retries.values())
+        if not retried and not self.given_up:
+            return
+        log(f"🔁 重试调度: 共 {self.attempts} 次尝试，重试 {retried} 次"
+            f"（临时故障 {self.retries[FAILURE_TRANSIENT]}，站点故障 {self.retries[FAILURE_SITE]}）"
+            + (f"，放弃 {len(self.given_up)} 个账号: {', '.join(map(str, sorted(self.given_up)))}" if self.given_up else ""))
+
+def run_account_attempt(task, total_accounts, is_final_retry=False, api_only=False):
+    """执行账号的一次尝试并合并进 task.result，返回失败类别，全部成功返回 None。
+    api_only 时只使用缓存或 --credentials 提供的凭据走 HTTP，不启动浏览器，处理不了的开源平台记为跳过"""
+    username, password, account_index = task.username, task.password, task.account_index
+    merged_result = task.result
+    
+    # 有缓存凭据时先直接走 HTTP 签到，缓存处理不了的平台再启动浏览器；重试时只处理尚未成功的平台
+    platforms = merged_result.pending_platforms()
+    credentials = load_cached_credentials(username, password)
+    # 礼包只能在页面领取，API 模式下礼包日也直接通过接口签到
+    claim_gifts = task.claim_gifts and not api_only
+    if api_only and task.claim_gifts and has_gift_today() and PLATFORM_OSHWHUB in platforms:
+        log(f"账号 {account_index} - ⚠ 今天有礼包，API 模式下开源平台只签到不领取礼包")
+    if cache_covers(credentials, platforms, claim_gifts):
+        result = sign_in_account_from_cache(username, password, account_index, credentials, platforms, claim_gifts)
+        run_journal.append(username, result)
+        merged_result.merge(result)
+        if not merged_result.needs_retry():
+            return None
+        if api_only and PLATFORM_JINDOU in merged_result.pending_platforms():
+            return classify_failure(result)
+        platforms = merged_result.pending_platforms()
+        credentials = load_cached_credentials(username, password)
+        if not api_only:
+            log(f"账号 {account_index} - 缓存凭据未能完成全部签到，启动浏览器继续")
+    elif api_only and PLATFORM_JINDOU in platforms:
+        # 没有可用凭据，API 模式下无法登录，重试也没有意义
+        log(f"账号 {account_index} - ❌ 没有可用的缓存凭据，API 模式下跳过")
+        merged_result.jindou_status = '无可用凭据'
+    if api_only:
+        # 开源平台没有可用的 Cookie 和已记录的签到请求时只能在签到页面签到，API 模式下跳过，不算失败也不重试
+        if PLATFORM_OSHWHUB in platforms:
+            log(f"账号 {account_index} - ⏭ 开源平台没有可用的接口签到凭据，需要浏览器签到，API 模式下跳过")
+            merged_result.oshwhub_status = OSHWHUB_SKIPPED_STATUS
+        return None if merged_result.jindou_success else FAILURE_FATAL
+    
+    result = sign_in_account(username, password, account_index, total_accounts,
+                             retry_count=task.attempts, is_final_retry=is_final_retry and task.attempts > 0,
+                             platforms=platforms, session_cookies=(credentials or {}).get('session_cookies'),
+                             claim_gifts=task.claim_gifts)
+    run_journal.append(username, result)
+    if merged_result.merge(result):
+        return FAILURE_FATAL
+    if is_final_retry and task.attempts > 0:
+        merged_result.is_final_retry = True
+    return classify_failure(result) if merged_result.needs_retry() else None
+
+# 预检查：开始签到前用缓存的 token / secretkey 并发查询金豆今日签到状态，已签到的账号不再打开 m.jlc.com。
+# 开源平台的签到状态只能通过签到页面或签到请求确认，不做预检查
+PRECHECK_ENABLED = os.getenv('JLC_PRECHECK', '1').lower() not in ('0', 'false', 'no')
+PRECHECK_WORKERS = int(os.getenv('JLC_PRECHECK_WORKERS', '8'))
+
+def precheck_account(entry):
+    """用缓存凭据查询金豆今天是否已签到，已签到时返回只含金豆结果的记录，否则返回 None"""
+    credentials = load_cached_credentials(entry.username, entry.password)
+    if not credentials or not credentials.get('token') or not credentials.get('secretkey'):
+        return None
+    jlc_client = JLCClient(credentials['token'], credentials['secretkey'], entry.index, None)
+    if not jlc_client.check_sign_status():
+        return None
+    result = AccountResult(entry.index)
+    result.account = account_key(entry.username)
+    result.jindou_success = True
+    result.jindou_status = '已签到过'
+    result.initial_jindou = result.final_jindou = jlc_client.get_points()
+    result.token_extracted = True
+    result.secretkey_extracted = True
+    return result
+
+def precheck_accounts(entries):
+    """并发预检查一批账号的金豆签到状态，返回 {账号序号: 结果}，只包含金豆今天已签到的账号"""
+    entries = [entry for entry in entries if not entry.skip_jindou]
+    if not PRECHECK_ENABLED or not entries:
+        return {}
+    
+    def check(entry):
+        try:
+            with tracer.span("precheck", entry.index):
+                result = precheck_account(entry)
+        except Exception as e:
+            log(f"账号 {entry.index} - ⚠ 预检查出错: {e}")
+            return entry.index, None
+        if result:
+            run_journal.append(entry.username, result)
+        return entry.index, result
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(PRECHECK_WORKERS, len(entries)))) as executor:
+        return {i: result for i, result in executor.map(check, entries) if result}
+
+# 根据历史记录跳过今天已签到的账号需要显式开启：历史记录可能来自别的机器的缓存，或者当天的礼包还没领到
+HISTORY_SKIP = os.getenv('JLC_HISTORY_SKIP', '').lower() in ('1', 'true', 'yes')
+ACCOUNT_BATCH = 32  # 账号按批读取并查询历史记录，内存占用与账号总数无关
+
+def run_accounts(source, total_accounts, workers=1, resumed=None, api_only=False, summary=None):
+    """处理 source 中的所有账号，workers > 1 时最多同时运行 workers 个相互隔离的浏览器，结果始终按账号顺序返回。
+    账号由 worker 按需从 source 逐批读取；resumed 为运行日志中恢复的今日结果，两个平台都已成功的账号直接沿用，不再处理；
+    api_only 时只走 HTTP 接口，不启动浏览器；summary 为 ResultSummary 时每个账号完成或被跳过后立即计入"""
+    resumed = resumed or {}
+    results = {}
+    prechecked_count = 0
+    
+    def record_done(result):
+        if summary is not None:
+            summary.add(result)
+    gifts_today = int(is_sunday()) + int(is_last_day_of_month())  # 今天要在页面领取的礼包数
+    
+    def resumed_complete(username):
+        previous = resumed.get(account_key(username))
+        return bool(previous and previous.oshwhub_success and previous.jindou_success)
+    
+    def pending_tasks():
+        """逐批读取账号，跳过运行日志和历史记录中今天已完成的账号，预检查显示金豆已签到的账号只处理开源平台，其余生成调度任务"""
+        nonlocal prechecked_count
+        entries = iter(source)
+        while True:
+            batch = list(itertools.islice(entries, ACCOUNT_BATCH))
+            if not batch:
+                return
+            keys = {entry.index: account_key(entry.username) for entry in batch}
+            # 历史记录显示今天已全部签到的账号直接跳过，只成功了一个平台的账号只补做另一个平台。
+            # 要领礼包的账号今天的礼包没有全部领到时，开源平台仍然交给页面流程处理
+            recorded = history.day_results(list(keys.values())) if HISTORY_SKIP else {}
+            for entry in batch:
+                previous = recorded.get(keys[entry.index])
+                if previous and entry.claim_gifts and len(previous.reward_results) < gifts_today:
+                    previous.oshwhub_success = False
+            completed = {key for key, result in recorded.items() if result.oshwhub_success and result.jindou_success}
+            # 运行日志和历史记录中金豆还没有成功的账号，用缓存凭据向站点确认金豆今天是否已签到
+            known = {i: resumed.get(key) or recorded.get(key) for i, key in keys.items()}
+            prechecked = precheck_accounts([
+                entry for entry in batch if not (known[entry.index] and known[entry.index].jindou_success)
+            ])
+            prechecked_count += len(prechecked)
+            runtimes = history.median_runtimes(list(keys.values())) if workers > 1 else {}
+            for entry in batch:
+                i, key = entry.index, keys[entry.index]
+                if resumed_complete(entry.username):
+                    log(f"账号 {i} - ⏭ 运行日志显示今天已全部签到成功，跳过")
+                    metrics.inc('jlc_accounts_skipped', reason='journal')
+                    previous = resumed[key]
+                    previous.account_index = i
+                    previous.account = key
+                    results[i] = previous
+                    record_done(previous)
+                elif key in completed:
+                    log(f"账号 {i} - ⏭ 历史记录显示今天已全部签到，跳过")
+                    metrics.inc('jlc_accounts_skipped', reason='history')
+                    recorded[key].account_index = i
+                    results[i] = recorded[key]
+                    record_done(recorded[key])
+                else:
+                    task = AccountTask(entry, known[i], runtimes.get(key, 0.0))
+                    results[i] = task.result
+                    if i in prechecked:
+                        task.result.merge_platforms(prechecked[i])
+                        if not task.result.pending_platforms():
+                            log(f"账号 {i} - ⏭ 预检查显示今天已全部签到，跳过")
+                            metrics.inc('jlc_accounts_skipped', reason='precheck')
+                            record_done(task.result)
+                            continue
+                    yield task
+    
+    scheduler = RetryScheduler(pending_tasks(), lookahead=max(workers, ACCOUNT_BATCH))
+    
+    def worker():
+        while True:
+            task = scheduler.next_task()
+            if task is None:
+                return
+            if workers > 1:
+                set_log_tag(f"#{task.account_index}")
+            failure = FAILURE_TRANSIENT
+            try:
+                if task.attempts == 0:
+                    log(f"开始处理第 {task.account_index} 个账号")
+                with tracer.span("account", task.account_index) as attempt:
+                    try:
+                        failure = run_account_attempt(task, total_accounts, scheduler.is_final(task), api_only)
+                    finally:
+                        attempt.failure = failure
+                        task.result.elapsed += attempt.duration
+            except Exception as e:
+                log(f"账号 {task.account_index} - ❌ 处理出错: {e}")
+            finally:
+                if scheduler.finish(task, failure):
+                    record_done(task.result)
+                set_log_tag('')
     
-    log("✅ 最终重试完成")
-    return all_results
+    if workers <= 1:
+        worker()
+    else:
+        log(f"并发模式: 最多同时处理 {workers} 个账号")
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for future in [executor.submit(worker) for _ in range(min(workers, max(1, total_accounts)))]:
+                    future.result()
+        finally:
+            shutdown_browsers()
+    
+    if prechecked_count:
+        log(f"⚡ 预检查: {prechecked_count} 个账号的金豆今天已签到，无需再打开 m.jlc.com")
+    scheduler.log_report()
+    return [results[i] for i in sorted(results)]
 
 # 推送函数
-def push_summary():
-    if not summary_logs:
-        return
+PUSH_DEADLINE = float(os.getenv('JLC_PUSH_TIMEOUT', '15'))  # 每个推送渠道的总时限（秒）
+PUSH_MAX_RETRIES = int(os.getenv('JLC_PUSH_RETRIES', '2'))  # 遇到 5xx 或连接错误时的重试次数
+
+def _http_push(method, url, **kwargs):
+    """构造一个 HTTP 推送动作，返回 (是否成功, 是否值得重试, 说明)"""
+    def send(timeout):
+        response = http_pool.request(method, url, timeout=(http_pool.timeout[0], timeout), **kwargs)
+        return response.status_code == 200, response.status_code >= 500, f"HTTP {response.status_code}"
+    return send
+
+def _deliver_push(name, send, deadline):
+    """在时限内执行一个推送渠道，5xx 和连接错误按指数退避重试"""
+    start = time.time()
+    attempts = 0
+    while True:
+        attempts += 1
+        remaining = max(deadline - (time.time() - start), 1)
+        try:
+            ok, retryable, detail = send(remaining)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            ok, retryable, detail = False, True, type(e).__name__
+        except Exception as e:
+            ok, retryable, detail = False, False, str(e)[:60]
+        
+        if ok or not retryable or attempts > PUSH_MAX_RETRIES:
+            break
+        backoff = 2 ** (attempts - 1) + random.uniform(0, 0.5)
+        if time.time() - start + backoff >= deadline:
+            break
+        pause(backoff)
     
-    title = "嘉立创签到总结"
-    text = "\n".join(summary_logs)
-    full_text = f"{title}\n{text}"  # 有些平台不需要单独标题
+    if ok:
+        log(f"{name}-日志已推送")
+    return {'name': name, 'ok': ok, 'attempts': attempts, 'elapsed': time.time() - start, 'detail': detail}
+
+def _serverchan3_push(sckey, title):
+    """Server酱3：与 serverchan_sdk.sc_send 相同的接口，经连接池发送，受推送时限约束（SDK 的请求没有超时）"""
+    def send(timeout):
+        if sckey.startswith('sctp'):
+            uid = sckey[4:].split('t', 1)[0]
+            if not uid.isdigit():
+                return False, False, "SendKey 格式不正确"
+            url = f"https://{uid}.push.ft07.com/send/{sckey}.send"
+        else:
+            url = f"https://sctapi.ftqq.com/{sckey}.send"
+        body = {"title": title, "desp": "\n\n".join(summary_logs), "tags": "嘉立创|签到"}
+        response = http_pool.post(url, json=body, timeout=(http_pool.timeout[0], timeout))
+        if response.status_code >= 500:
+            return False, True, f"HTTP {response.status_code}"
+        data = response.json()
+        if data.get("code") == 0:  # 新版成功返回 code=0
+            return True, False, "code 0"
+        return False, False, str(data.get('message'))
+    return send
+
+def collect_push_channels(title, text, full_text):
+    """根据环境变量收集已配置的推送渠道，返回 [(名称, 推送动作)]"""
+    channels = []
     
     # Telegram
     telegram_bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
     telegram_chat_id = os.getenv('TELEGRAM_CHAT_ID')
     if telegram_bot_token and telegram_chat_id:
-        try:
-            url = f"https://api.telegram.org/bot{telegram_bot_token}/sendMessage"
-            params = {'chat_id': telegram_chat_id, 'text': full_text}
-            response = requests.get(url, params=params)
-            if response.status_code == 200:
-                log("Telegram-日志已推送")
-        except:
-            pass  # 静默失败
+        url = f"https://api.telegram.org/bot{telegram_bot_token}/sendMessage"
+        params = {'chat_id': telegram_chat_id, 'text': full_text}
+        channels.append(("Telegram", _http_push('GET', url, params=params)))
 
     # 企业微信 (WeChat Work)
     wechat_webhook_key = os.getenv('WECHAT_WEBHOOK_KEY')
     if wechat_webhook_key:
-        try:
-            if wechat_webhook_key.startswith('https://'):
-                url = wechat_webhook_key
-            else:
-                url = f"https://qyapi.weixin.qq.com/cgi-bin/webhook/send?key={wechat_webhook_key}"
-            body = {"msgtype": "text", "text": {"content": full_text}}
-            response = requests.post(url, json=body)
-            if response.status_code == 200:
-                log("企业微信-日志已推送")
-        except:
-            pass
+        if wechat_webhook_key.startswith('https://'):
+            url = wechat_webhook_key
+        else:
+            url = f"https://qyapi.weixin.qq.com/cgi-bin/webhook/send?key={wechat_webhook_key}"
+        body = {"msgtype": "text", "text": {"content": full_text}}
+        channels.append(("企业微信", _http_push('POST', url, json=body)))
 
     # 钉钉 (DingTalk)
     dingtalk_webhook = os.getenv('DINGTALK_WEBHOOK')
     if dingtalk_webhook:
-        try:
-            if dingtalk_webhook.startswith('https://'):
-                url = dingtalk_webhook
-            else:
-                url = f"https://oapi.dingtalk.com/robot/send?access_token={dingtalk_webhook}"
-            body = {"msgtype": "text", "text": {"content": full_text}}
-            response = requests.post(url, json=body)
-            if response.status_code == 200:
-                log("钉钉-日志已推送")
-        except:
-            pass
+        if dingtalk_webhook.startswith('https://'):
+            url = dingtalk_webhook
+        else:
+            url = f"https://oapi.dingtalk.com/robot/send?access_token={dingtalk_webhook}"
+        body = {"msgtype": "text", "text": {"content": full_text}}
+        channels.append(("钉钉", _http_push('POST', url, json=body)))
 
     # PushPlus
     pushplus_token = os.getenv('PUSHPLUS_TOKEN')
     if pushplus_token:
-        try:
-            url = "http://www.pushplus.plus/send"
-            body = {"token": pushplus_token, "title": title, "content": text}
-            response = requests.post(url, json=body)
-            if response.status_code == 200:
-                log("PushPlus-日志已推送")
-        except:
-            pass
+        body = {"token": pushplus_token, "title": title, "content": text}
+        channels.append(("PushPlus", _http_push('POST', "http://www.pushplus.plus/send", json=body)))
 
     # Server酱
     serverchan_sckey = os.getenv('SERVERCHAN_SCKEY')
     if serverchan_sckey:
-        try:
-            url = f"https://sctapi.ftqq.com/{serverchan_sckey}.send"
-            body = {"title": title, "desp": text}
-            response = requests.post(url, data=body)
-            if response.status_code == 200:
-                log("Server酱-日志已推送")
-        except:
-            pass
+        body = {"title": title, "desp": text}
+        channels.append(("Server酱", _http_push('POST', f"https://sctapi.ftqq.com/{serverchan_sckey}.send", data=body)))
 
     # Server酱3
-    serverchan3_sckey = os.getenv('SERVERCHAN3_SCKEY') 
+    serverchan3_sckey = os.getenv('SERVERCHAN3_SCKEY')
     if serverchan3_sckey:
-        try:
-            textSC3 = "\n\n".join(summary_logs)
-            titleSC3 = title
-            options = {"tags": "嘉立创|签到"}  # 可选参数，根据需求添加
-            response = sc_send(serverchan3_sckey, titleSC3, textSC3, options)            
-            if response.get("code") == 0:  # 新版成功返回 code=0
-                log("Server酱3-日志已推送")
-            else:
-                log(f"Server酱推送失败: {response.get('message')}")                
-        except Exception as e:
-            log(f"Server酱推送异常: {str(e)}")    
+        channels.append(("Server酱3", _serverchan3_push(serverchan3_sckey, title)))
 
     # 酷推 (CoolPush)
     coolpush_skey = os.getenv('COOLPUSH_SKEY')
     if coolpush_skey:
-        try:
-            url = f"https://push.xuthus.cc/send/{coolpush_skey}?c={full_text}"
-            response = requests.get(url)
-            if response.status_code == 200:
-                log("酷推-日志已推送")
-        except:
-            pass
+        channels.append(("酷推", _http_push('GET', f"https://push.xuthus.cc/send/{coolpush_skey}?c={full_text}")))
 
     # 自定义API
     custom_webhook = os.getenv('CUSTOM_WEBHOOK')
     if custom_webhook:
-        try:
-            body = {"title": title, "content": text}
-            response = requests.post(custom_webhook, json=body)
-            if response.status_code == 200:
-                log("自定义API-日志已推送")
-        except:
-            pass
-
-def main():
-    global in_summary
-    
-    if len(sys.argv) < 3:
-        print("用法: python jlc.py 账号1,账号2,账号3... 密码1,密码2,密码3... [失败退出标志]")
-        print("示例: python jlc.py user1,user2,user3 pwd1,pwd2,pwd3")
-        print("示例: python jlc.py user1,user2,user3 pwd1,pwd2,pwd3 true")
-        print("失败退出标志: 不传或任意值-关闭, true-开启(任意账号签到失败时返回非零退出码)")
-        sys.exit(1)
-    
-    usernames = [u.strip() for u in sys.argv[1].split(',') if u.strip()]
-    passwords = [p.strip() for p in sys.argv[2].split(',') if p.strip()]
+        body = {"title": title, "content": text}
+        channels.append(("自定义API", _http_push('POST', custom_webhook, json=body)))
     
-    # 解析失败退出标志，默认为关闭
-    enable_failure_exit = False
-    if len(sys.argv) >= 4:
-        enable_failure_exit = (sys.argv[3].lower() == 'true')
-    
-    log(f"失败退出功能: {'开启' if enable_failure_exit else '关闭'}")
+    return channels
+
+def push_summary():
+    """并发推送到所有已配置的渠道，最多等待最慢渠道的时限，最后输出各渠道的送达情况"""
+    if not summary_logs:
+        return
     
-    if len(usernames) != len(passwords):
-        log("❌ 错误: 账号和密码数量不匹配!")
-        sys.exit(1)
+    title = "嘉立创签到总结"
+    text = "\n".join(summary_logs)
+    full_text = f"{title}\n{text}"  # 有些平台不需要单独标题
     
-    total_accounts = len(usernames)
-    log(f"开始处理 {total_accounts} 个账号的签到任务")
+    channels = collect_push_channels(title, text, full_text)
+    if not channels:
+        return
     
-    # 存储所有账号的结果
-    all_results = []
+    # 每个渠道一个守护线程：超过时限仍未返回的渠道不会阻止进程退出
+    delivered = {}
+    threads = []
+    for name, send in channels:
+        def deliver(name=name, send=send):
+            delivered[name] = _deliver_push(name, send, PUSH_DEADLINE)
+        thread = threading.Thread(target=deliver, name=f"push-{name}", daemon=True)
+        thread.start()
+        threads.append(thread)
+    deadline = time.monotonic() + PUSH_DEADLINE + 1
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
     
-    for i, (username, password) in enumerate(zip(usernames, passwords), 1):
-        log(f"开始处理第 {i} 个账号")
-        result = process_single_account(username, password, i, total_accounts)
-        all_results.append(result)
-        
-        if i < total_accounts:
-            wait_time = random.randint(3, 5)
-            log(f"等待 {wait_time} 秒后处理下一个账号...")
-            time.sleep(wait_time)
+    reports = [delivered.get(name) or {'name': name, 'ok': False, 'attempts': '-', 'elapsed': PUSH_DEADLINE, 'detail': '超时'}
+               for name, _ in channels]
     
-    # 检查是否有失败的账号，执行最终重试（排除密码错误的）
-    has_failed_accounts = any((not result['oshwhub_success'] or not result['jindou_success']) and not result.get('password_error', False) for result in all_results)
+    log("📨 推送结果:")
+    for report in reports:
+        status = "✅" if report['ok'] else "❌"
+        log(f"  ├── {report['name']}: {status} {report['elapsed']:.2f}s 尝试 {report['attempts']} 次 ({report['detail']})")
+
+# 分片运行：每个分片把结果写成 JSON 文件，最后由 merge 汇总输出总结并统一推送一次
+RESULTS_ARTIFACT_VERSION = 1
+
+def write_results_artifact(path, results, total_accounts, shard=None):
+    """原子写入本次运行的结果文件"""
+    payload = {
+        'version': RESULTS_ARTIFACT_VERSION,
+        'day': datetime.now().strftime('%Y-%m-%d'),
+        'shard': list(shard) if shard else None,
+        'accounts': total_accounts,
+        'finished_at': time.time(),
+        'results': [result.to_dict() for result in results],
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def merge_results_artifacts(paths):
+    """读取多个分片的结果文件，按账号序号合并，返回 (按序号排列的结果列表, 分片是否齐全)；分片缺失或日期不一致时给出提示"""
+    merged = {}
+    shards = {}
+    days = set()
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        if payload.get('version') != RESULTS_ARTIFACT_VERSION:
+            raise ValueError(f"{path} 不是本脚本生成的结果文件")
+        days.add(payload.get('day'))
+        if payload.get('shard'):
+            shard_index, shard_count = payload['shard']
+            shards.setdefault(shard_count, set()).add(shard_index)
+        log(f"读取结果文件: {path}（{len(payload['results'])} 个账号）")
+        for data in payload['results']:
+            result = AccountResult.from_dict(data)
+            if result.account_index in merged:
+                merged[result.account_index].merge(result)  # 同一分片重跑过时合并成功的部分
+            else:
+                merged[result.account_index] = result
     
-    if has_failed_accounts:
-        all_results = execute_final_retry_for_failed_accounts(all_results, usernames, passwords, total_accounts)
+    if len(days) > 1:
+        log(f"⚠ 结果文件来自不同日期: {', '.join(sorted(d or '未知' for d in days))}")
+    if len(shards) > 1:
+        log(f"⚠ 结果文件的分片数不一致: {', '.join(map(str, sorted(shards)))}")
+    complete = True
+    for shard_count, seen in shards.items():
+        missing = sorted(set(range(1, shard_count + 1)) - seen)
+        if missing:
+            complete = False
+            log(f"⚠ 缺少分片 {', '.join(f'{i}/{shard_count}' for i in missing)} 的结果文件，总结中不包含这些账号")
+    return [merged[i] for i in sorted(merged)], complete
+
+def log_results_summary(all_results, total_accounts, summary=None):
+    """输出每个账号的详细结果和总体统计（同时收集到推送内容中），返回 ResultSummary。
+    summary 为运行中已逐个计入结果的汇总时直接使用，否则在输出时汇总"""
+    global in_summary
     
     # 输出详细总结
     log("=" * 70)
@@ -1313,32 +3482,17 @@ def main():
     log("📊 详细签到任务完成总结")
     log("=" * 70)
     
-    oshwhub_success_count = 0
-    jindou_success_count = 0
-    total_points_reward = 0
-    total_jindou_reward = 0
-    retried_accounts = []  # 合并所有重试过的账号，包括最终重试
-    password_error_accounts = []  # 密码错误的账号
-    
-    # 记录失败的账号
-    failed_accounts = []
+    counted = summary is not None
+    summary = summary or ResultSummary()
     
     for result in all_results:
-        account_index = result['account_index']
-        nickname = result.get('nickname', '未知')
-        retry_count = result.get('retry_count', 0)
-        is_final_retry = result.get('is_final_retry', False)
-        password_error = result.get('password_error', False)
-        
-        if password_error:
-            password_error_accounts.append(account_index)
-        
-        if retry_count > 0 or is_final_retry:
-            retried_accounts.append(account_index)
-        
-        # 检查是否有失败情况（排除密码错误）
-        if (not result['oshwhub_success'] or not result['jindou_success']) and not password_error:
-            failed_accounts.append(account_index)
+        if not counted:
+            summary.add(result)
+        account_index = result.account_index
+        nickname = result.nickname
+        retry_count = result.retry_count
+        is_final_retry = result.is_final_retry
+        password_error = result.password_error
         
         retry_label = ""
         if retry_count > 0:
@@ -1352,90 +3506,112 @@ def main():
             log("  └── 状态: ❌ 账号或密码错误，跳过此账号")
         else:
             log(f"账号 {account_index} ({nickname}) 详细结果:{retry_label}")
-            log(f"  ├── 开源平台: {result['oshwhub_status']}")
+            log(f"  ├── 开源平台: {result.oshwhub_status}")
             
             # 显示积分变化
-            if result['points_reward'] > 0:
-                log(f"  ├── 积分变化: {result['initial_points']} → {result['final_points']} (+{result['points_reward']})")
-                total_points_reward += result['points_reward']
-            elif result['points_reward'] == 0 and result['initial_points'] > 0:
-                log(f"  ├── 积分变化: {result['initial_points']} → {result['final_points']} (0)")
+            if result.points_reward > 0:
+                log(f"  ├── 积分变化: {result.initial_points} → {result.final_points} (+{result.points_reward})")
+            elif result.points_reward == 0 and result.initial_points > 0:
+                log(f"  ├── 积分变化: {result.initial_points} → {result.final_points} (0)")
             else:
                 log(f"  ├── 积分状态: 无法获取积分信息")
             
-            log(f"  ├── 金豆签到: {result['jindou_status']}")
+            log(f"  ├── 金豆签到: {result.jindou_status}")
             
             # 显示金豆变化
-            if result['jindou_reward'] > 0:
-                jindou_text = f"  ├── 金豆变化: {result['initial_jindou']} → {result['final_jindou']} (+{result['jindou_reward']})"
-                if result['has_jindou_reward']:
+            if result.jindou_reward > 0:
+                jindou_text = f"  ├── 金豆变化: {result.initial_jindou} → {result.final_jindou} (+{result.jindou_reward})"
+                if result.has_jindou_reward:
                     jindou_text += "（有奖励）"
                 log(jindou_text)
-                total_jindou_reward += result['jindou_reward']
-            elif result['jindou_reward'] == 0 and result['initial_jindou'] > 0:
-                log(f"  ├── 金豆变化: {result['initial_jindou']} → {result['final_jindou']} (0)")
-            else:
+            elif result.jindou_reward == 0 and result.initial_jindou > 0:
+                log(f"  ├── 金豆变化: {result.initial_jindou} → {result.final_jindou} (0)")
+            elif result.jindou_status != JINDOU_SKIPPED_STATUS:
                 log(f"  ├── 金豆状态: 无法获取金豆信息")
             
             # 显示礼包领取结果
-            for reward_result in result['reward_results']:
+            for reward_result in result.reward_results:
                 log(f"  ├── {reward_result}")
-            
-            if result['oshwhub_success']:
-                oshwhub_success_count += 1
-            if result['jindou_success']:
-                jindou_success_count += 1
         
         log("  " + "-" * 50)
     
     # 总体统计
     log("📈 总体统计:")
     log(f"  ├── 总账号数: {total_accounts}")
-    log(f"  ├── 开源平台签到成功: {oshwhub_success_count}/{total_accounts}")
-    log(f"  ├── 金豆签到成功: {jindou_success_count}/{total_accounts}")
+    # API 模式下跳过的开源平台账号不计入开源平台的成功率
+    oshwhub_total = total_accounts - len(summary.skipped_oshwhub)
+    log(f"  ├── 开源平台签到成功: {summary.oshwhub_success}/{oshwhub_total}")
+    if summary.skipped_oshwhub:
+        log(f"  ├── 开源平台已跳过（API 模式）: {len(summary.skipped_oshwhub)}")
+    log(f"  ├── 金豆签到成功: {summary.jindou_success}/{total_accounts}")
     
-    if total_points_reward > 0:
-        log(f"  ├── 总计获得积分: +{total_points_reward}")
+    if summary.points_reward > 0:
+        log(f"  ├── 总计获得积分: +{summary.points_reward}")
     
-    if total_jindou_reward > 0:
-        log(f"  ├── 总计获得金豆: +{total_jindou_reward}")
+    if summary.jindou_reward > 0:
+        log(f"  ├── 总计获得金豆: +{summary.jindou_reward}")
     
     # 计算成功率
-    oshwhub_rate = (oshwhub_success_count / total_accounts) * 100 if total_accounts > 0 else 0
-    jindou_rate = (jindou_success_count / total_accounts) * 100 if total_accounts > 0 else 0
+    oshwhub_rate = (summary.oshwhub_success / oshwhub_total) * 100 if oshwhub_total > 0 else 0
+    jindou_rate = (summary.jindou_success / total_accounts) * 100 if total_accounts > 0 else 0
     
     log(f"  ├── 开源平台成功率: {oshwhub_rate:.1f}%")
     log(f"  └── 金豆签到成功率: {jindou_rate:.1f}%")
     
     # 失败账号列表（排除密码错误）
-    failed_oshwhub = [r['account_index'] for r in all_results if not r['oshwhub_success'] and not r.get('password_error', False)]
-    failed_jindou = [r['account_index'] for r in all_results if not r['jindou_success'] and not r.get('password_error', False)]
+    failed_oshwhub = summary.failed_oshwhub
+    failed_jindou = summary.failed_jindou
+    password_error_accounts = summary.password_error
     
     if failed_oshwhub:
         log(f"  ⚠ 开源平台失败账号: {', '.join(map(str, failed_oshwhub))}")
     
     if failed_jindou:
         log(f"  ⚠ 金豆签到失败账号: {', '.join(map(str, failed_jindou))}")
+    
+    if summary.skipped_oshwhub:
+        log(f"  ⏭ 开源平台已跳过的账号（需浏览器签到）: {', '.join(map(str, summary.skipped_oshwhub))}")
         
     if password_error_accounts:
         log(f"  ⚠密码错误的账号: {', '.join(map(str, password_error_accounts))}")
        
     if not failed_oshwhub and not failed_jindou and not password_error_accounts:
-        log("  🎉 所有账号全部签到成功!")
+        log("  🎉 除已跳过的开源平台外，所有账号全部签到成功!" if summary.skipped_oshwhub else "  🎉 所有账号全部签到成功!")
     elif password_error_accounts and not failed_oshwhub and not failed_jindou:
         log("  ⚠除了密码错误账号，其他账号全部签到成功!")
     
     log("=" * 70)
-    
-    # 推送总结
-    push_summary()
-    
-    # 根据失败退出标志决定退出码
-    all_failed_accounts = failed_accounts + password_error_accounts
+    return summary
+
+def record_summary_metrics(summary, total_accounts, duration=None):
+    """把总结中的成功数和奖励合计写入指标"""
+    metrics.set('jlc_accounts', total_accounts)
+    metrics.set('jlc_accounts_succeeded', summary.oshwhub_success, platform=PLATFORM_OSHWHUB)
+    metrics.set('jlc_accounts_succeeded', summary.jindou_success, platform=PLATFORM_JINDOU)
+    metrics.set('jlc_accounts_failed', len(summary.failed_oshwhub), platform=PLATFORM_OSHWHUB)
+    metrics.set('jlc_accounts_failed', len(summary.failed_jindou), platform=PLATFORM_JINDOU)
+    metrics.set('jlc_accounts_platform_skipped', len(summary.skipped_oshwhub), platform=PLATFORM_OSHWHUB)
+    metrics.set('jlc_accounts_password_error', len(summary.password_error))
+    metrics.set('jlc_points_reward', summary.points_reward)
+    metrics.set('jlc_jindou_reward', summary.jindou_reward)
+    if duration is not None:
+        metrics.set('jlc_run_duration_seconds', round(duration, 3))
+    metrics.set('jlc_run_finished_timestamp_seconds', round(time.time(), 3))
+
+def write_metrics_file(path):
+    try:
+        metrics.write_textfile(path)
+        log(f"📈 运行指标已写入 {path}")
+    except OSError as e:
+        log(f"⚠ 写入运行指标失败: {e}")
+
+def exit_with_summary(summary, enable_failure_exit):
+    """根据失败退出标志决定退出码"""
+    all_failed_accounts = summary.failed + summary.password_error
     if enable_failure_exit and all_failed_accounts:
         log(f"❌ 检测到失败的账号: {', '.join(map(str, all_failed_accounts))}")
-        if password_error_accounts:
-            log(f"❌ 其中密码错误的账号: {', '.join(map(str, password_error_accounts))}")
+        if summary.password_error:
+            log(f"❌ 其中密码错误的账号: {', '.join(map(str, summary.password_error))}")
         log("❌ 由于失败退出功能已开启，返回报错退出码以获得邮件提醒")
         sys.exit(1)
     else:
@@ -1445,5 +3621,239 @@ def main():
             log("✅ 程序正常退出")
         sys.exit(0)
 
+def print_usage():
+    print("用法: python jlc.py 账号1,账号2,账号3... 密码1,密码2,密码3... [失败退出标志] [--workers N]")
+    print("示例: python jlc.py user1,user2,user3 pwd1,pwd2,pwd3")
+    print("示例: python jlc.py user1,user2,user3 pwd1,pwd2,pwd3 true")
+    print("示例: python jlc.py user1,user2,user3 pwd1,pwd2,pwd3 true --workers 3")
+    print("或: python jlc.py [失败退出标志] --accounts-file 账号文件.jsonl|账号文件.csv [--workers N]")
+    print("失败退出标志: 不传或任意值-关闭, true-开启(任意账号签到失败时返回非零退出码)")
+    print("--workers N: 同时处理的账号数(每个账号使用独立的浏览器)，默认读取环境变量 JLC_WORKERS，未设置则为1(逐个处理)")
+    print("--resume: 从今天的运行日志恢复，跳过已全部签到成功的账号(用于中断后重跑)")
+    print("--accounts-file FILE: 逐行读取账号文件(JSONL 或 CSV)，每行可设置 skip_jindou、gift、priority，默认读取环境变量 JLC_ACCOUNTS_FILE")
+    print("--shard i/n: 按账号哈希把账号分成 n 份，只处理第 i 份，结果写入 --results-file(默认 jlc_results_IofN.json)，不推送")
+    print("合并分片: python jlc.py merge 结果文件1 结果文件2 ... [失败退出标志]，输出汇总并统一推送")
+    print("查看历史: python jlc.py history [天数]，输出今天未完成的账号数、耗时最长的账号和各阶段失败率")
+    print("--api-only: 只用缓存凭据或 --credentials 提供的凭据调用接口签到，不启动浏览器(不加载 selenium)，没有开源平台签到请求记录的账号跳过开源平台")
+    print("--credentials FILE: JSON 凭据文件 {账号: {\"token\", \"secretkey\", \"cookie\", \"oshwhub_sign\"}}，优先于凭据缓存")
+    print("--trace-file FILE: 运行结束时把各阶段时间线导出为 Chrome trace JSON，默认读取环境变量 JLC_TRACE_FILE，未设置则不导出")
+    print("--metrics-file FILE: 运行结束时把运行指标写成 Prometheus textfile，默认读取环境变量 JLC_METRICS_FILE")
+    print("--metrics-port PORT: 运行期间在本地端口提供 /metrics 供 Prometheus 抓取，默认读取环境变量 JLC_METRICS_PORT")
+    print("请求拦截: JLC_BLOCK_REQUESTS=0 关闭，JLC_BLOCK_TYPES 资源类型(image,font,media,stylesheet)，JLC_BLOCK_URLS/JLC_ALLOW_URLS 追加阻止/允许规则"
+          "，JLC_BLOCK_TYPE_HOSTS 资源类型规则生效的主机(默认为三个站点)")
+
+def build_option_parser():
+    """--选项 解析器，位置参数(账号、密码、失败退出标志)另外处理，避免以 - 开头的密码被误当成选项"""
+    parser = argparse.ArgumentParser(prog='jlc.py', add_help=False)
+    parser.add_argument('--workers', type=int, default=int(os.getenv('JLC_WORKERS', '1') or 1))
+    parser.add_argument('--resume', action='store_true')
+    parser.add_argument('--trace-file', default=os.getenv('JLC_TRACE_FILE'))
+    parser.add_argument('--api-only', action='store_true', default=os.getenv('JLC_API_ONLY', '').lower() in ('1', 'true', 'yes'))
+    parser.add_argument('--credentials', default=os.getenv('JLC_CREDENTIALS_FILE'))
+    parser.add_argument('--accounts-file', default=ACCOUNTS_FILE)
+    parser.add_argument('--shard', default=os.getenv('JLC_SHARD'))
+    parser.add_argument('--results-file', default=os.getenv('JLC_RESULTS_FILE'))
+    parser.add_argument('--metrics-file', default=METRICS_FILE)
+    parser.add_argument('--metrics-port', type=int, default=METRICS_PORT)
+    return parser
+
+def parse_arguments(argv):
+    """解析命令行参数，位置参数保持原有用法，其余功能通过 --选项 开启"""
+    parser = build_option_parser()
+    option_names = set()
+    takes_value = set()
+    for action in parser._actions:
+        option_names.update(action.option_strings)
+        if action.nargs != 0:
+            takes_value.update(action.option_strings)
+    
+    positional = []
+    options = []
+    i = 0
+    while i < len(argv):
+        token = argv[i]
+        name = token.split('=', 1)[0]
+        if name in option_names:
+            options.append(token)
+            if name in takes_value and '=' not in token and i + 1 < len(argv):
+                options.append(argv[i + 1])
+                i += 1
+        else:
+            positional.append(token)
+        i += 1
+    
+    try:
+        args = parser.parse_args(options)
+    except SystemExit:
+        print_usage()
+        raise
+    
+    # 使用账号文件时只剩可选的失败退出标志
+    if args.accounts_file:
+        positional = ['', ''] + positional
+    elif len(positional) < 2:
+        print_usage()
+        sys.exit(1)
+    # 与旧版本一致，多余的位置参数忽略，不再退出
+    if len(positional) > 3:
+        log(f"⚠ 忽略多余的 {len(positional) - 3} 个位置参数（不输出内容，以免泄露密码）")
+    args.usernames = positional[0]
+    args.passwords = positional[1]
+    args.error_flag = positional[2] if len(positional) > 2 else ''
+    args.workers = max(1, args.workers)
+    try:
+        args.shard = parse_shard(args.shard) if args.shard else None
+    except ValueError as e:
+        print(f"--shard 格式应为 i/n: {e}")
+        print_usage()
+        sys.exit(1)
+    if args.shard and not args.results_file:
+        args.results_file = f"jlc_results_{args.shard[0]}of{args.shard[1]}.json"
+    return args
+
+def main():
+    global in_summary
+    
+    args = parse_arguments(sys.argv[1:])
+    
+    workers = args.workers
+    shard = args.shard
+    
+    # 解析失败退出标志，默认为关闭
+    enable_failure_exit = (args.error_flag.lower() == 'true')
+    
+    log(f"失败退出功能: {'开启' if enable_failure_exit else '关闭'}")
+    
+    if args.accounts_file:
+        source = AccountSource(path=args.accounts_file, shard=shard)
+        try:
+            total_accounts = source.count()
+        except OSError as e:
+            log(f"❌ 错误: 无法读取账号文件: {e}")
+            sys.exit(1)
+        log(f"账号文件: {args.accounts_file}")
+    else:
+        usernames = [u.strip() for u in args.usernames.split(',') if u.strip()]
+        passwords = [p.strip() for p in args.passwords.split(',') if p.strip()]
+        if len(usernames) != len(passwords):
+            log("❌ 错误: 账号和密码数量不匹配!")
+            sys.exit(1)
+        source = AccountSource(usernames=usernames, passwords=passwords, shard=shard)
+        total_accounts = source.count()
+    if shard:
+        log(f"分片 {shard[0]}/{shard[1]}: 按账号哈希只处理属于本分片的账号")
+    log(f"开始处理 {total_accounts} 个账号的签到任务")
+    metrics.set('jlc_accounts', total_accounts)
+    if args.metrics_port:
+        try:
+            metrics.serve(args.metrics_port)
+            log(f"📈 运行指标: http://{METRICS_HOST}:{args.metrics_port}/metrics")
+        except OSError as e:
+            log(f"⚠ 无法在端口 {args.metrics_port} 提供运行指标: {e}")
+    
+    # 运行日志：每次尝试后落盘，--resume 时恢复今天已完成的结果
+    run_journal.prune()
+    resumed = None
+    if args.resume:
+        resumed = run_journal.load_results()
+        log(f"从运行日志恢复: {run_journal.path}（{len(resumed)} 个账号有记录）")
+    
+    if args.credentials:
+        try:
+            log(f"已读取凭据文件: {args.credentials}（{load_supplied_credentials(args.credentials)} 个账号）")
+        except (OSError, ValueError, AttributeError) as e:
+            log(f"❌ 读取凭据文件失败: {e}")
+            sys.exit(1)
+    if args.api_only:
+        log("API 模式: 只通过接口签到，不启动浏览器，没有开源平台签到请求记录的账号跳过开源平台（不计入成功和失败）")
+    elif BLOCK_REQUESTS:
+        unknown = [t for t in split_patterns(BLOCKED_TYPES) if t not in RESOURCE_TYPE_EXTENSIONS]
+        log(f"请求拦截: {len(BLOCKED_URL_PATTERNS)} 条规则，资源类型 {BLOCKED_TYPES or '无'}"
+            + (f"（未知类型 {', '.join(unknown)} 已忽略）" if unknown else ""))
+        if IGNORED_URL_PATTERNS:
+            log(f"⚠ 以下规则与允许列表重叠，不会生效: {', '.join(IGNORED_URL_PATTERNS)}")
+    
+    # 存储所有账号的结果
+    started_at = time.time()
+    summary = ResultSummary()
+    all_results = run_accounts(source, total_accounts, workers, resumed, args.api_only, summary)
+    
+    shutdown_browsers()
+    history.record_run(all_results, started_at, tracer.spans(), shard)
+    
+    if args.results_file:
+        try:
+            write_results_artifact(args.results_file, all_results, total_accounts, shard)
+            log(f"结果已写入: {args.results_file}")
+        except OSError as e:
+            log(f"⚠ 写入结果文件失败: {e}")
+    
+    log_results_summary(all_results, total_accounts, summary)
+    record_summary_metrics(summary, total_accounts, time.time() - started_at)
+    
+    # 推送总结；分片运行时由 merge 汇总后统一推送
+    if shard:
+        log("分片模式: 不推送总结，所有分片完成后运行 merge 统一推送")
+    else:
+        push_summary()
+    
+    in_summary = False
+    http_pool.log_stats()
+    rate_limiter.log_stats()
+    wait_ledger.log_report()
+    page_stats.log_report()
+    tracer.log_phase_table()
+    if args.trace_file:
+        try:
+            tracer.export_chrome_trace(args.trace_file)
+            log(f"⏱ 阶段追踪已导出到 {args.trace_file}（可在 chrome://tracing 或 Perfetto 中打开）")
+        except OSError as e:
+            log(f"⚠ 阶段追踪导出失败: {e}")
+    if args.metrics_file:
+        write_metrics_file(args.metrics_file)
+    
+    exit_with_summary(summary, enable_failure_exit)
+
+def merge_main(argv):
+    """python jlc.py merge 结果文件1 结果文件2 ... [失败退出标志]：汇总各分片的结果，输出总结并推送一次"""
+    global in_summary
+    
+    enable_failure_exit = False
+    if argv and argv[-1].lower() in ('true', 'false'):
+        enable_failure_exit = argv.pop().lower() == 'true'
+    if not argv:
+        print_usage()
+        sys.exit(1)
+    
+    try:
+        all_results, complete = merge_results_artifacts(argv)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        log(f"❌ 读取结果文件失败: {e}")
+        sys.exit(1)
+    
+    summary = log_results_summary(all_results, len(all_results))
+    push_summary()
+    in_summary = False
+    if METRICS_FILE:
+        record_summary_metrics(summary, len(all_results))
+        write_metrics_file(METRICS_FILE)
+    if enable_failure_exit and not complete:
+        log("❌ 部分分片没有结果，返回报错退出码")
+        sys.exit(1)
+    exit_with_summary(summary, enable_failure_exit)
+
+def history_main(argv):
+    """python jlc.py history [天数]：输出历史记录统计"""
+    days = int(argv[0]) if argv else 30
+    if not history.enabled or not os.path.exists(history.path):
+        log(f"没有历史记录: {history.path}")
+        sys.exit(1)
+    history.log_report(days)
+
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:2] == ['merge']:
+        merge_main(sys.argv[2:])
+    elif sys.argv[1:2] == ['history']:
+        history_main(sys.argv[2:])
+    else:
+        main()